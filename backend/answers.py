@@ -0,0 +1,115 @@
+from datetime import datetime, timezone
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import idempotency
+from deps import Principal, parse_session_id
+from job_queue import enqueue
+from models import Answer
+from models import Session as InterviewSession
+from question_catalog import get_question_async
+from rollups import record_completed_session
+
+# recording an answer, shared by /answer and /answer-audio in main.py. kept free of the tts and
+# stt providers, the audio for the response is added after the commit (main.after_answer)
+
+
+async def replayed_response(db: AsyncSession, user_id: int, key: str | None, request_fingerprint: str):
+    if not key:
+        return None
+    try:
+        stored = await idempotency.replay(db, user_id, key, request_fingerprint)
+    except idempotency.IdempotencyMismatch:
+        raise HTTPException(status_code=422, detail="Idempotency-Key was already used for a different request")
+    if stored is None:
+        return None
+    return JSONResponse(stored, headers={"Idempotent-Replayed": "true"})
+
+
+async def record_answer(
+    db: AsyncSession,
+    user: Principal,
+    session_id: str,
+    transcript: str,
+    index: int | None,
+    key: str | None,
+    request_fingerprint: str | None,
+    extra: dict | None = None,
+):
+    # shared by /answer and /answer-audio. returns (response, interview session), or a
+    # JSONResponse when the key was seen before. extra goes into the stored response
+    # locked so completing the session is ordered with the graders' rollup updates,
+    # and so a duplicate request waits here until the first one has committed
+    interview_session = (await db.execute(
+        select(InterviewSession)
+        .where(InterviewSession.id == parse_session_id(session_id))
+        .where(InterviewSession.user_id == user.id)
+        .with_for_update()
+    )).scalars().first()
+    if not interview_session:
+        raise HTTPException(status_code=404, detail="Interview session not found")
+
+    replayed = await replayed_response(db, user.id, key, request_fingerprint)
+    if replayed is not None:
+        return replayed, interview_session
+
+    if interview_session.status != "in_progress":
+        raise HTTPException(status_code=400, detail="Interview session is not active")
+
+    if interview_session.current_index >= interview_session.question_count:
+        raise HTTPException(status_code=400, detail="All questions have been answered")
+
+    if index is not None and index != interview_session.current_index:
+        raise HTTPException(status_code=409, detail="This question has already been answered")
+
+    position = interview_session.current_index
+    question_id = interview_session.question_ids[position]
+    question = await get_question_async(question_id)
+    if not question:
+        raise HTTPException(status_code=404, detail="Question not found")
+
+    if not transcript.strip():
+        raise HTTPException(status_code=400, detail="Transcript cannot be empty")
+
+    answer = Answer(
+        session_id=interview_session.id,
+        question_id=question_id,
+        position=position,
+        transcript=transcript,
+        score=0,
+        feedback="",
+        keywords_hit=[],
+    )
+    db.add(answer)
+    await db.flush()
+
+    # graded by worker.py, the job commits together with the answer
+    enqueue(db, "grade_answer", {"answer_id": answer.id})
+
+    interview_session.current_index += 1
+    if interview_session.current_index >= interview_session.question_count:
+        interview_session.status = "completed"
+        interview_session.end_time = datetime.now(timezone.utc)
+        await db.run_sync(record_completed_session, interview_session)
+        # overall feedback is queued by the worker that grades the last outstanding answer
+
+    response = {
+        "ok": True,
+        "completed": interview_session.status == "completed",
+        "closing_text": interview_session.closing_text if interview_session.status == "completed" else None,
+        "closing_audio_url": None, # filled in by after_answer, a replay returns it empty
+        **(extra or {}),
+    }
+    if key:
+        idempotency.remember(db, user.id, key, request_fingerprint, response)
+    try:
+        await db.commit()
+    except IntegrityError:
+        # the same key used concurrently on another session, or the position already taken
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="Answer was already submitted")
+    return response, interview_session
@@ -0,0 +1,56 @@
+import asyncio
+import threading
+
+import bulkheads
+import metrics
+from bulkheads import BulkheadFull
+from tts import generate_question_audio
+
+# question audio for async endpoints, on the provider_io bulkhead. while the candidate answers
+# question N the clip for N+1 is already being synthesised, so the answer response and /current
+# find it cached (tts.py keeps clips by text hash) or join the synthesis that is still running.
+# one synthesis per text at a time in this process, later callers wait on the same future
+metrics.describe("tts_prefetch_started_total", "Question clips synthesised ahead of time")
+metrics.describe("tts_prefetch_skipped_total", "Prefetches dropped because the provider_io bulkhead was full")
+metrics.describe("tts_joined_in_flight_total", "Audio requests that waited on a synthesis already running")
+
+_in_flight = {} # text -> concurrent future
+_lock = threading.Lock()
+
+
+def _forget(text: str, future):
+    with _lock:
+        if _in_flight.get(text) is future:
+            del _in_flight[text]
+
+
+def _synthesis(text: str):
+    # raises BulkheadFull
+    with _lock:
+        future = _in_flight.get(text)
+        if future is not None:
+            metrics.inc("tts_joined_in_flight_total")
+            return future
+        future = bulkheads.provider_io.submit(generate_question_audio, text)
+        _in_flight[text] = future
+    future.add_done_callback(lambda f: _forget(text, f))
+    return future
+
+
+async def question_audio(text: str) -> str | None:
+    # None when every tts provider is down or the bulkhead is full, the client then shows the text only
+    try:
+        future = _synthesis(text)
+    except BulkheadFull:
+        return None
+    # shielded, a caller that goes away must not cancel a synthesis others are waiting on
+    return await asyncio.shield(asyncio.wrap_future(future))
+
+
+def prefetch_audio(text: str):
+    # fire and forget, a full bulkhead just means the clip is made when it is asked for
+    try:
+        _synthesis(text)
+        metrics.inc("tts_prefetch_started_total")
+    except BulkheadFull:
+        metrics.inc("tts_prefetch_skipped_total")
@@ -0,0 +1,37 @@
+from sqlalchemy import text
+
+from db import engine
+
+# python backfill_rollups.py
+# rebuilds the analytics rollups (rollups.py) from the answers table, safe to run again.
+# the tables are locked against writes while it runs, so submits and grading wait for it
+
+STEPS = [
+    ("answers", "UPDATE answers SET counted_score = CASE WHEN grading_status = 'graded' THEN score END"),
+    ("sessions",
+     "UPDATE sessions SET graded_count = coalesce(a.graded_count, 0), score_sum = coalesce(a.score_sum, 0) "
+     "FROM sessions s LEFT JOIN ("
+     "  SELECT session_id, count(*) AS graded_count, sum(counted_score) AS score_sum "
+     "  FROM answers WHERE counted_score IS NOT NULL GROUP BY session_id"
+     ") a ON a.session_id = s.id WHERE sessions.id = s.id"),
+    ("old topic stats", "DELETE FROM user_topic_stats"),
+    ("topic stats",
+     "INSERT INTO user_topic_stats (user_id, topic, answers_count, score_sum) "
+     "SELECT s.user_id, q.topic, count(*), sum(a.counted_score) "
+     "FROM answers a JOIN sessions s ON s.id = a.session_id JOIN questions q ON q.id = a.question_id "
+     "WHERE a.counted_score IS NOT NULL AND s.status = 'completed' "
+     "GROUP BY s.user_id, q.topic"),
+]
+
+
+def backfill():
+    with engine.begin() as conn:
+        conn.execute(text("LOCK TABLE sessions, answers, user_topic_stats IN SHARE ROW EXCLUSIVE MODE"))
+        for name, statement in STEPS:
+            result = conn.execute(text(statement))
+            print(f"{name}: {result.rowcount} rows")
+
+
+if __name__ == "__main__":
+    backfill()
+    print("Rollups backfilled.")
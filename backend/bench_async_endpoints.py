@@ -0,0 +1,152 @@
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from db import DB_MAX_OVERFLOW, DB_POOL_SIZE, SessionLocal, get_async_db, get_db
+from models import Session as InterviewSession
+from queries import history_page, history_page_async
+
+# python bench_async_endpoints.py [--concurrency 200] [--requests 5000] [--sleep-ms 0] [--json out.json]
+# requests/sec and latency of the same history page query served by a sync def endpoint (threadpool + SessionLocal)
+# and an async def endpoint (event loop + the async engine), each app in its own uvicorn process.
+# --sleep-ms adds a pg_sleep to every request (postgres only) to stand in for a slow query or a busy database.
+# the pool settings from db.py (DB_POOL_SIZE, DB_MAX_OVERFLOW) apply to both, so compare runs with the same env
+
+BENCH_USER_ID = int(os.getenv("BENCH_USER_ID", "0"))
+BENCH_SLEEP_MS = float(os.getenv("BENCH_SLEEP_MS", "0"))
+
+sync_app = FastAPI()
+async_app = FastAPI()
+
+
+@sync_app.get("/history")
+def sync_history(db: Session = Depends(get_db)):
+    if BENCH_SLEEP_MS:
+        db.execute(text("SELECT pg_sleep(:s)"), {"s": BENCH_SLEEP_MS / 1000})
+    rows, _ = history_page(db, BENCH_USER_ID)
+    return {"sessions": len(rows)}
+
+
+@async_app.get("/history")
+async def async_history(db: AsyncSession = Depends(get_async_db)):
+    if BENCH_SLEEP_MS:
+        await db.execute(text("SELECT pg_sleep(:s)"), {"s": BENCH_SLEEP_MS / 1000})
+    rows, _ = await history_page_async(db, BENCH_USER_ID)
+    return {"sessions": len(rows)}
+
+
+def busiest_user() -> int:
+    db = SessionLocal()
+    try:
+        return db.execute(
+            select(InterviewSession.user_id)
+            .where(InterviewSession.status == "completed")
+            .group_by(InterviewSession.user_id)
+            .order_by(func.count().desc())
+            .limit(1)
+        ).scalar() or 0
+    finally:
+        db.close()
+
+
+def start_server(app_name: str, port: int, user_id: int, sleep_ms: float) -> subprocess.Popen:
+    env = dict(os.environ, BENCH_USER_ID=str(user_id), BENCH_SLEEP_MS=str(sleep_ms))
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", f"bench_async_endpoints:{app_name}", "--port", str(port), "--log-level", "warning"],
+        env=env,
+    )
+    url = f"http://127.0.0.1:{port}/history"
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url).status_code == 200:
+                return server
+        except httpx.TransportError:
+            pass
+        time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError(f"{app_name} did not start on port {port}")
+
+
+async def load(url: str, concurrency: int, requests: int) -> dict:
+    times, errors = [], 0
+    remaining = requests
+
+    async def client_loop(client: httpx.AsyncClient):
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            try:
+                response = await client.get(url)
+                if response.status_code != 200:
+                    errors += 1
+                    continue
+            except httpx.HTTPError:
+                errors += 1
+                continue
+            times.append((time.perf_counter() - start) * 1000)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=60) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(client_loop(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    times.sort()
+    return {
+        "rps": len(times) / elapsed,
+        "p50_ms": times[len(times) // 2] if times else None,
+        "p99_ms": times[min(len(times) - 1, int(len(times) * 0.99))] if times else None,
+        "errors": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--warmup", type=int, default=200)
+    parser.add_argument("--sleep-ms", type=float, default=0, help="pg_sleep per request, postgres only")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--user-id", type=int, default=None, help="defaults to the user with the most sessions")
+    parser.add_argument("--json", default=None)
+    args = parser.parse_args()
+
+    user_id = args.user_id or busiest_user()
+    print(f"History page of user {user_id}, concurrency {args.concurrency}, pool {DB_POOL_SIZE}+{DB_MAX_OVERFLOW}, "
+          f"sleep {args.sleep_ms:g} ms")
+
+    report = {}
+    for name, app_name in (("sync", "sync_app"), ("async", "async_app")):
+        server = start_server(app_name, args.port, user_id, args.sleep_ms)
+        try:
+            url = f"http://127.0.0.1:{args.port}/history"
+            asyncio.run(load(url, min(args.concurrency, args.warmup), args.warmup))
+            report[name] = asyncio.run(load(url, args.concurrency, args.requests))
+        finally:
+            server.terminate()
+            server.wait()
+
+    print(f"{'endpoint':<8} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for name, result in report.items():
+        print(f"{name:<8} {result['rps']:>9.0f} {result['p50_ms'] or 0:>9.1f} {result['p99_ms'] or 0:>9.1f} {result['errors']:>7}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"concurrency": args.concurrency, "requests": args.requests, "sleep_ms": args.sleep_ms,
+                       "pool_size": DB_POOL_SIZE, "max_overflow": DB_MAX_OVERFLOW, "results": report}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
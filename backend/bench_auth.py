@@ -0,0 +1,73 @@
+import argparse
+import json
+import statistics
+import time
+import uuid
+from datetime import timedelta
+
+import deps
+from db import SessionLocal
+from models import User
+from security import create_access_token
+
+# python bench_auth.py [--requests 2000] [--tokens 50] [--json out.json]
+# auth overhead per request (get_current_user with a fresh db session each time, like a request)
+# with the principal cache off (jwt decode + users query every time) and on
+
+def run(tokens: list, requests: int) -> list:
+    times = []
+    for i in range(requests):
+        db = SessionLocal()
+        try:
+            start = time.perf_counter()
+            deps.get_current_user(tokens[i % len(tokens)], db)
+            times.append((time.perf_counter() - start) * 1000)
+        finally:
+            db.close()
+    return times
+
+
+def stats(times: list) -> dict:
+    times = sorted(times)
+    return {
+        "mean_ms": statistics.mean(times),
+        "p50_ms": times[len(times) // 2],
+        "p99_ms": times[min(len(times) - 1, int(len(times) * 0.99))],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--tokens", type=int, default=50, help="distinct users making the requests")
+    parser.add_argument("--json", default=None)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    users = [User(email=f"bench-auth-{uuid.uuid4().hex[:8]}@example.com", password_hash="x") for _ in range(args.tokens)]
+    db.add_all(users)
+    db.commit()
+    try:
+        tokens = [create_access_token(str(u.id), timedelta(minutes=30)) for u in users]
+        results = {}
+        for name, ttl in (("no cache", 0), ("principal cache", 60)):
+            deps.AUTH_CACHE_TTL_SECONDS = ttl
+            deps._principals.clear()
+            run(tokens, min(100, args.requests)) # warm up the pool (and the cache)
+            results[name] = stats(run(tokens, args.requests))
+    finally:
+        for u in users:
+            db.delete(u)
+        db.commit()
+        db.close()
+
+    print(f"{'':<16} {'mean ms':>8} {'p50 ms':>8} {'p99 ms':>8}")
+    for name, r in results.items():
+        print(f"{name:<16} {r['mean_ms']:>8.3f} {r['p50_ms']:>8.3f} {r['p99_ms']:>8.3f}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
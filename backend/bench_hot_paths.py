@@ -0,0 +1,176 @@
+import argparse
+import json
+import statistics
+import time
+import uuid
+
+from sqlalchemy import select, text
+
+from db import Base, engine
+from models import Question
+from models import Session as InterviewSession
+from queries import HISTORY_PAGE_SIZE, history_query, session_answers_query, timeseries_query, topic_breakdown_query
+
+# python bench_hot_paths.py [--users 50] [--sessions 400] [--answers 5] [--questions 2000] [--repeats 20] [--json out.json]
+# seeds a synthetic dataset, then records EXPLAIN ANALYZE plans and latency for each endpoint query
+# without and with the hot path indexes (alembic revision 0002).
+# everything runs in one transaction that is rolled back, but dropping indexes locks the tables
+# until then, so point DATABASE_URL at a scratch or staging copy, not the live database.
+
+TOPICS = ["Data Structures", "Databases", "Operating Systems", "Networking & Web Technologies"]
+DIFFICULTIES = ["easy", "medium", "hard"]
+HOT_PATH_TABLES = ("sessions", "answers", "questions", "reference_answers")
+
+
+def hot_path_indexes():
+    return [index for name in HOT_PATH_TABLES for index in Base.metadata.tables[name].indexes]
+
+
+def seed(conn, args, run: str) -> dict:
+    pattern = f"bench-{run}-%"
+    conn.execute(text(
+        "INSERT INTO users (email, password_hash) "
+        "SELECT 'bench-' || :run || '-' || g || '@example.com', 'x' FROM generate_series(1, :users) g"
+    ), {"run": run, "users": args.users})
+    conn.execute(text(
+        "INSERT INTO questions (topic, difficulty, text, reference_answer, keywords) "
+        "SELECT (:topics)[1 + g % 4], (:difficulties)[1 + g % 3], 'bench question ' || g, 'reference', '[]' "
+        "FROM generate_series(1, :questions) g"
+    ), {"topics": TOPICS, "difficulties": DIFFICULTIES, "questions": args.questions})
+    # one in ten sessions is still in progress so the status filter has something to skip
+    conn.execute(text(
+        "INSERT INTO sessions (id, user_id, topic, difficulty, question_count, status, start_time, end_time, "
+        "question_ids, current_index, transition_text, overall_feedback, overall_status, graded_count, score_sum) "
+        "SELECT gen_random_uuid(), u.id, (:topics)[1 + g % 4], (:difficulties)[1 + g % 3], :answers, "
+        "CASE WHEN g % 10 = 0 THEN 'in_progress' ELSE 'completed' END, "
+        "now() - make_interval(mins => g), now() - make_interval(mins => g) + interval '20 minutes', "
+        "'[]', :answers, '[]', 'feedback', 'ready', :answers, :answers * 50 "
+        "FROM users u CROSS JOIN generate_series(1, :sessions) g WHERE u.email LIKE :pattern"
+    ), {"topics": TOPICS, "difficulties": DIFFICULTIES, "answers": args.answers,
+        "sessions": args.sessions, "pattern": pattern})
+    question_ids = conn.execute(text(
+        "SELECT min(id), max(id) FROM questions WHERE text LIKE 'bench question %'"
+    )).one()
+    conn.execute(text(
+        "INSERT INTO answers (session_id, question_id, transcript, score, feedback, keywords_hit, grading_status, provisional) "
+        "SELECT s.id, :qmin + floor(random() * (:qmax - :qmin + 1))::int, 'bench answer', "
+        "floor(random() * 101)::int, 'feedback', '[]', 'graded', false "
+        "FROM sessions s JOIN users u ON u.id = s.user_id CROSS JOIN generate_series(1, :answers) g "
+        "WHERE u.email LIKE :pattern"
+    ), {"qmin": question_ids[0], "qmax": question_ids[1], "answers": args.answers, "pattern": pattern})
+    conn.execute(text("ANALYZE users, questions, sessions, answers"))
+
+    user_id = conn.execute(text("SELECT min(id) FROM users WHERE email LIKE :pattern"), {"pattern": pattern}).scalar()
+    session_id = conn.execute(text(
+        "SELECT id FROM sessions WHERE user_id = :user_id AND status = 'completed' ORDER BY start_time DESC LIMIT 1"
+    ), {"user_id": user_id}).scalar()
+    return {"user_id": user_id, "session_id": session_id}
+
+
+def cases(target: dict) -> dict:
+    user_id, session_id = target["user_id"], target["session_id"]
+    return {
+        "session lookup": (
+            select(InterviewSession)
+            .where(InterviewSession.id == session_id)
+            .where(InterviewSession.user_id == user_id)
+        ),
+        "start: questions": (
+            select(Question).where(Question.topic == TOPICS[0]).where(Question.difficulty == DIFFICULTIES[0])
+        ),
+        "start: mixed questions": select(Question).where(Question.difficulty == DIFFICULTIES[0]),
+        "summary": session_answers_query(session_id),
+        "history page": history_query(user_id, limit=HISTORY_PAGE_SIZE + 1),
+        "topic breakdown": topic_breakdown_query(user_id),
+        "timeseries": timeseries_query(user_id),
+    }
+
+
+def scans(plan: list) -> str:
+    # the scan nodes are what the indexes change, e.g. "Seq Scan on answers" -> "Index Scan using ix_answers_session_id"
+    nodes = []
+    for line in plan:
+        node = line.strip().lstrip("->").strip().split("  (")[0]
+        if "Scan" in node and node not in nodes:
+            nodes.append(node)
+    return "; ".join(nodes)
+
+
+def measure(conn, queries: dict, repeats: int) -> dict:
+    results = {}
+    for name, query in queries.items():
+        compiled = query.compile(dialect=conn.dialect)
+        sql, params = str(compiled), compiled.params
+        plan = [row[0] for row in conn.exec_driver_sql("EXPLAIN (ANALYZE, BUFFERS) " + sql, params)]
+
+        times = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            conn.exec_driver_sql(sql, params).fetchall()
+            times.append((time.perf_counter() - start) * 1000)
+        times.sort()
+        results[name] = {
+            "median_ms": statistics.median(times),
+            "p95_ms": times[min(len(times) - 1, int(len(times) * 0.95))],
+            "scans": scans(plan),
+            "plan": plan,
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--sessions", type=int, default=400, help="sessions per user")
+    parser.add_argument("--answers", type=int, default=5, help="answers per session")
+    parser.add_argument("--questions", type=int, default=2000)
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--plans", action="store_true", help="print the full plans")
+    parser.add_argument("--json", default=None)
+    args = parser.parse_args()
+
+    if engine.dialect.name != "postgresql":
+        raise SystemExit("bench_hot_paths.py needs postgres (generate_series, EXPLAIN ANALYZE)")
+
+    indexes = hot_path_indexes()
+    report = {}
+    with engine.connect() as conn:
+        transaction = conn.begin()
+        try:
+            start = time.perf_counter()
+            target = seed(conn, args, uuid.uuid4().hex[:8])
+            print(f"Seeded {args.users * args.sessions} sessions, {args.users * args.sessions * args.answers} answers "
+                  f"in {time.perf_counter() - start:.1f}s")
+            queries = cases(target)
+
+            before = conn.begin_nested()
+            for index in indexes:
+                conn.exec_driver_sql(f"DROP INDEX IF EXISTS {index.name}")
+            report["before"] = measure(conn, queries, args.repeats)
+            before.rollback()
+
+            for index in indexes:
+                index.create(conn, checkfirst=True)
+            conn.execute(text("ANALYZE sessions, answers, questions"))
+            report["after"] = measure(conn, queries, args.repeats)
+        finally:
+            transaction.rollback() # leaves the database as it was
+
+    print(f"{'query':<24} {'before ms':>10} {'after ms':>9} {'before p95':>10} {'after p95':>9}  after scans")
+    for name in report["after"]:
+        b, a = report["before"][name], report["after"][name]
+        print(f"{name:<24} {b['median_ms']:>10.2f} {a['median_ms']:>9.2f} {b['p95_ms']:>10.2f} {a['p95_ms']:>9.2f}  "
+              f"{a['scans']}")
+    if args.plans:
+        for phase, results in report.items():
+            for name, result in results.items():
+                print(f"\n-- {name} ({phase})")
+                print("\n".join(result["plan"]))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), **report}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import argparse
+import json
+import statistics
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+# python bench_login_burst.py --url http://localhost:8000 [--accounts 20] [--logins 400] [--concurrency 50]
+# fires a burst of /token logins at a running api while timing /health alongside it, so the
+# report shows both login latency and whether other endpoints were starved during the burst.
+# every request comes from this machine's ip, start the api with LOGIN_IP_BURST / LOGIN_IP_PER_MINUTE
+# (and the account limits) raised to measure the pool rather than the throttle
+
+def percentile(values: list, p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] if values else 0.0
+
+
+def summarise(times: list) -> dict:
+    return {
+        "count": len(times),
+        "p50_ms": percentile(times, 0.50),
+        "p99_ms": percentile(times, 0.99),
+        "max_ms": max(times) if times else 0.0,
+        "mean_ms": statistics.mean(times) if times else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--accounts", type=int, default=20)
+    parser.add_argument("--logins", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--json", default=None)
+    args = parser.parse_args()
+
+    password = "bench-password"
+    emails = [f"bench-login-{uuid.uuid4().hex[:8]}@example.com" for _ in range(args.accounts)]
+    for email in emails:
+        r = requests.post(f"{args.url}/auth/signup", json={"email": email, "password": password}, timeout=30)
+        r.raise_for_status()
+
+    login_times, statuses = [], Counter()
+    lock = threading.Lock()
+
+    def login(i: int):
+        start = time.perf_counter()
+        r = requests.post(f"{args.url}/token", data={"username": emails[i % len(emails)], "password": password}, timeout=60)
+        elapsed = (time.perf_counter() - start) * 1000
+        with lock:
+            statuses[r.status_code] += 1
+            if r.status_code == 200:
+                login_times.append(elapsed)
+
+    health_times = []
+    done = threading.Event()
+
+    def probe():
+        # a cheap endpoint, its latency shows how much the burst slows everything else
+        while not done.is_set():
+            start = time.perf_counter()
+            requests.get(f"{args.url}/health", timeout=60)
+            health_times.append((time.perf_counter() - start) * 1000)
+            time.sleep(0.05)
+
+    prober = threading.Thread(target=probe, daemon=True)
+    prober.start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(args.concurrency) as pool:
+        list(pool.map(login, range(args.logins)))
+    duration = time.perf_counter() - start
+    done.set()
+    prober.join()
+
+    report = {
+        "duration_s": duration,
+        "statuses": dict(statuses),
+        "login": summarise(login_times),
+        "health_during_burst": summarise(health_times),
+    }
+    print(f"{args.logins} logins in {duration:.1f}s, statuses {dict(statuses)}")
+    for name in ("login", "health_during_burst"):
+        r = report[name]
+        print(f"{name:<20} p50 {r['p50_ms']:>8.1f} ms  p99 {r['p99_ms']:>8.1f} ms  max {r['max_ms']:>8.1f} ms")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import argparse
+import json
+import random
+import statistics
+import time
+
+from prompt_compaction import OVERALL_FEEDBACK_TOKEN_BUDGET, compact_overall_summary, count_tokens, to_prompt_json
+
+# python bench_prompt_compaction.py [--questions 1 3 5 10] [--answer-words 60 250 600]
+# python bench_prompt_compaction.py --live  (also times real generate_overall_feedback calls)
+
+TOPICS = ["Data Structures", "Databases", "Operating Systems", "Networking & Web Technologies"]
+FILLER = (
+    "so basically what happens is the data gets stored and then when you need it you look it up and "
+    "um the main idea is that it is faster because you do not have to scan everything and I think "
+    "that is why people use it in practice especially for large inputs where performance matters"
+).split()
+FEEDBACK = (
+    "What went well:\n- Explained the core idea clearly\n"
+    "Needs work:\n- Mention time complexity explicitly\n- Give a concrete example\n"
+    "Next step: Practise explaining trade-offs with one worked example."
+)
+REFERENCE = " ".join(FILLER[:45])
+
+
+def make_summary(questions: int, answer_words: int, rng: random.Random) -> list:
+    # same shape build_overall_feedback produced before compaction
+    return [
+        {
+            "question_id": i + 1,
+            "topic": rng.choice(TOPICS),
+            "question_text": "Explain how a hash table works and what its time complexity is for lookups and inserts?",
+            "reference_answer": REFERENCE,
+            "transcript": " ".join(rng.choice(FILLER) for _ in range(answer_words)),
+            "score": rng.choice([35, 52, 68, 74, 88]),
+            "feedback": FEEDBACK,
+            "keywords_hit": ["hash function", "buckets", "O(1)"],
+        }
+        for i in range(questions)
+    ]
+
+
+def time_live(payload, repeats: int) -> float:
+    from groq import generate_overall_feedback
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        generate_overall_feedback(payload)
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--questions", type=int, nargs="+", default=[1, 3, 5, 10])
+    parser.add_argument("--answer-words", type=int, nargs="+", default=[60, 250, 600])
+    parser.add_argument("--budget", type=int, default=OVERALL_FEEDBACK_TOKEN_BUDGET)
+    parser.add_argument("--live", action="store_true")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--json", default=None)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    rows = []
+    header = f"{'questions':>9} {'words':>6} {'before tok':>10} {'after tok':>9} {'compact ms':>10}"
+    if args.live:
+        header += f" {'before ms':>10} {'after ms':>9}"
+    print(header)
+
+    for questions in args.questions:
+        for words in args.answer_words:
+            summary = make_summary(questions, words, rng)
+            # the old prompt payload was the full summary list
+            before = count_tokens(json.dumps(summary, ensure_ascii=True))
+
+            start = time.perf_counter()
+            compacted = compact_overall_summary(summary, args.budget)
+            compact_ms = (time.perf_counter() - start) * 1000
+            after = count_tokens(to_prompt_json(compacted))
+
+            row = {"questions": questions, "answer_words": words, "before_tokens": before,
+                   "after_tokens": after, "compaction_ms": compact_ms}
+            line = f"{questions:>9} {words:>6} {before:>10} {after:>9} {compact_ms:>10.2f}"
+            if args.live:
+                row["before_latency_ms"] = time_live(summary, args.repeats)
+                row["after_latency_ms"] = time_live(compacted, args.repeats)
+                line += f" {row['before_latency_ms']:>10.0f} {row['after_latency_ms']:>9.0f}"
+            rows.append(row)
+            print(line)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import argparse
+import json
+import random
+import statistics
+import time
+
+from sentence_transformers import SentenceTransformer
+
+from embedding_scoring import answer_windows, chunked_similarity
+
+# python bench_sbert_chunking.py [--sizes 50 100 200 400 800 1600 3200] [--repeats 5] [--json out.json]
+# compares the old single pass encode (silently truncated) with chunked scoring
+
+REFERENCE = (
+    "A hash table stores key value pairs in an array of buckets. A hash function maps each key to a bucket index, "
+    "giving average O(1) lookup, insert and delete. Collisions are handled with chaining or open addressing, "
+    "and the table is resized when the load factor gets too high."
+)
+
+SENTENCES = [
+    "So a hash table is basically a structure that maps keys to values.",
+    "You run the key through a hash function and that gives you an index into an array.",
+    "Um, the nice thing is lookups are constant time on average.",
+    "If two keys land in the same bucket you get a collision.",
+    "One way to deal with that is chaining where each bucket holds a linked list.",
+    "Another way is open addressing, like linear probing, where you look for the next free slot.",
+    "When the table fills up past the load factor you resize it and rehash everything.",
+    "In the worst case with a bad hash function everything collides and it becomes linear.",
+    "Python dictionaries and Java HashMaps are both built on this idea.",
+    "I think that is the main trade off, you use extra memory to get fast access.",
+]
+
+
+def make_transcript(words: int, rng: random.Random) -> str:
+    parts, count = [], 0
+    while count < words:
+        sentence = rng.choice(SENTENCES)
+        parts.append(sentence)
+        count += len(sentence.split())
+    return " ".join(parts)
+
+
+def single_pass(model, answer: str, reference: str) -> float:
+    emb = model.encode([answer, reference], convert_to_tensor=True, normalize_embeddings=True)
+    return float(emb[0] @ emb[1])
+
+
+def time_call(fn, repeats: int):
+    fn() # warm up
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return result, statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 100, 200, 400, 800, 1600, 3200])
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--json", default=None)
+    args = parser.parse_args()
+
+    model = SentenceTransformer("all-MiniLM-L6-v2")
+    rng = random.Random(0)
+    rows = []
+
+    print(f"{'words':>6} {'tokens':>7} {'windows':>7} {'single ms':>10} {'chunked ms':>11} {'ms/100w':>8} {'single sim':>11} {'chunked sim':>12}")
+    for size in args.sizes:
+        answer = make_transcript(size, rng)
+        tokens = len(model.tokenizer.tokenize(answer))
+        windows = answer_windows(model, answer)
+        single_sim, single_ms = time_call(lambda: single_pass(model, answer, REFERENCE), args.repeats)
+        chunked_sim, chunked_ms = time_call(lambda: chunked_similarity(model, answer, REFERENCE), args.repeats)
+        words = len(answer.split())
+        rows.append({
+            "words": words,
+            "tokens": tokens,
+            "windows": len(windows),
+            "single_ms": single_ms,
+            "chunked_ms": chunked_ms,
+            "chunked_ms_per_100_words": chunked_ms / words * 100,
+            "single_sim": single_sim,
+            "chunked_sim": chunked_sim,
+        })
+        print(f"{words:>6} {tokens:>7} {len(windows):>7} {single_ms:>10.1f} {chunked_ms:>11.1f} "
+              f"{chunked_ms / words * 100:>8.2f} {single_sim:>11.3f} {chunked_sim:>12.3f}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import anyio.to_thread
+from fastapi import HTTPException
+
+import metrics
+
+# separate, sized executors so one kind of slow work cannot take the threads another needs.
+#   provider_io: calls to external providers (tts), mostly waiting on the network
+#   ml_cpu: local models (whisper stt), cpu bound so only a few at once
+#   db: anyio's thread limiter, which runs every sync def endpoint and dependency
+# each has a queue limit, past it callers get BulkheadFull (503) straight away instead of
+# piling up behind a provider that has slowed down
+BULKHEAD_PROVIDER_IO_WORKERS = int(os.getenv("BULKHEAD_PROVIDER_IO_WORKERS", "8"))
+BULKHEAD_PROVIDER_IO_QUEUE = int(os.getenv("BULKHEAD_PROVIDER_IO_QUEUE", "32"))
+BULKHEAD_ML_CPU_WORKERS = int(os.getenv("BULKHEAD_ML_CPU_WORKERS", "2"))
+BULKHEAD_ML_CPU_QUEUE = int(os.getenv("BULKHEAD_ML_CPU_QUEUE", "8"))
+BULKHEAD_DB_WORKERS = int(os.getenv("BULKHEAD_DB_WORKERS", "40"))
+BULKHEAD_DB_QUEUE = int(os.getenv("BULKHEAD_DB_QUEUE", "100"))
+
+metrics.describe("bulkhead_workers", "Threads of the bulkhead")
+metrics.describe("bulkhead_running", "Calls running on a bulkhead thread")
+metrics.describe("bulkhead_queued", "Calls waiting for a bulkhead thread")
+metrics.describe("bulkhead_saturation", "Running and queued calls over workers plus queue limit")
+metrics.describe("bulkhead_rejected_total", "Calls refused because the bulkhead queue was full")
+metrics.describe("bulkhead_queue_wait_seconds_total", "Time calls spent waiting for a bulkhead thread")
+
+
+class BulkheadFull(Exception):
+    def __init__(self, name: str):
+        super().__init__(f"{name} bulkhead is full")
+        self.name = name
+
+
+def bulkhead_full() -> HTTPException:
+    return HTTPException(status_code=503, detail="Server busy, try again shortly", headers={"Retry-After": "1"})
+
+
+class Bulkhead:
+    def __init__(self, name: str, workers: int, queue: int):
+        self.name = name
+        self.workers = workers
+        self.queue = queue
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix=f"bulkhead-{name}")
+        self._slots = threading.BoundedSemaphore(workers + queue) # running + waiting
+        self._lock = threading.Lock()
+        self.running = 0
+        self.submitted = 0 # running + waiting
+
+    def _adjust(self, running: int = 0, submitted: int = 0):
+        with self._lock:
+            self.running += running
+            self.submitted += submitted
+
+    def _call(self, submitted_at: float, fn, args, kwargs):
+        metrics.inc("bulkhead_queue_wait_seconds_total", time.perf_counter() - submitted_at, bulkhead=self.name)
+        self._adjust(running=1)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self._adjust(running=-1)
+
+    def _finished(self, future):
+        # the slot is held until the work is really over, even if the caller stopped waiting
+        self._adjust(submitted=-1)
+        self._slots.release()
+
+    def submit(self, fn, *args, **kwargs):
+        if not self._slots.acquire(blocking=False):
+            metrics.inc("bulkhead_rejected_total", bulkhead=self.name)
+            raise BulkheadFull(self.name)
+        self._adjust(submitted=1)
+        try:
+            future = self._executor.submit(self._call, time.perf_counter(), fn, args, kwargs)
+        except Exception:
+            self._adjust(submitted=-1)
+            self._slots.release()
+            raise
+        future.add_done_callback(self._finished)
+        return future
+
+    def call(self, fn, *args, **kwargs):
+        # from sync code, blocks the calling thread until the result is there
+        return self.submit(fn, *args, **kwargs).result()
+
+    async def run(self, fn, *args, **kwargs):
+        # from async endpoints, the event loop is free while the work runs
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def collect(self):
+        with self._lock:
+            running, submitted = self.running, self.submitted
+        metrics.set_gauge("bulkhead_workers", self.workers, bulkhead=self.name)
+        metrics.set_gauge("bulkhead_running", running, bulkhead=self.name)
+        metrics.set_gauge("bulkhead_queued", submitted - running, bulkhead=self.name)
+        metrics.set_gauge("bulkhead_saturation", submitted / (self.workers + self.queue), bulkhead=self.name)
+
+
+provider_io = Bulkhead("provider_io", BULKHEAD_PROVIDER_IO_WORKERS, BULKHEAD_PROVIDER_IO_QUEUE)
+ml_cpu = Bulkhead("ml_cpu", BULKHEAD_ML_CPU_WORKERS, BULKHEAD_ML_CPU_QUEUE)
+
+
+def configure_db_bulkhead():
+    # call from the app's startup, the limiter belongs to the running event loop
+    anyio.to_thread.current_default_thread_limiter().total_tokens = BULKHEAD_DB_WORKERS
+
+
+async def admit_db():
+    # route dependency for sync def endpoints, refuses new work while too many already wait for a thread
+    if anyio.to_thread.current_default_thread_limiter().statistics().tasks_waiting >= BULKHEAD_DB_QUEUE:
+        metrics.inc("bulkhead_rejected_total", bulkhead="db")
+        raise bulkhead_full()
+
+
+@metrics.register_collector
+def _collect():
+    provider_io.collect()
+    ml_cpu.collect()
+
+
+def collect_db():
+    # needs the event loop's limiter, so the async /metrics endpoint calls it before rendering
+    stats = anyio.to_thread.current_default_thread_limiter().statistics()
+    metrics.set_gauge("bulkhead_workers", BULKHEAD_DB_WORKERS, bulkhead="db")
+    metrics.set_gauge("bulkhead_running", stats.borrowed_tokens, bulkhead="db")
+    metrics.set_gauge("bulkhead_queued", stats.tasks_waiting, bulkhead="db")
+    metrics.set_gauge("bulkhead_saturation", (stats.borrowed_tokens + stats.tasks_waiting) /
+                      (BULKHEAD_DB_WORKERS + BULKHEAD_DB_QUEUE), bulkhead="db")
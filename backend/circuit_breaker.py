@@ -0,0 +1,135 @@
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import metrics
+
+# per provider circuit breakers, state is per process.
+# closed: calls go through and outcomes are recorded over a sliding window
+# open: too many failures or slow calls, calls fail fast until open_seconds pass
+# half_open: one trial call decides between closed and open
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+metrics.describe("circuit_breaker_state", "0 closed, 1 half open, 2 open")
+metrics.describe("circuit_breaker_calls_total", "provider calls by outcome")
+
+
+class CircuitOpen(Exception):
+    pass
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, window: int = 20, min_calls: int = 5, failure_rate: float = 0.5,
+                 slow_call_seconds: float = 10.0, slow_call_rate: float = 0.5, open_seconds: float = 30.0):
+        self.name = name
+        self.window = window
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate = slow_call_rate
+        self.open_seconds = open_seconds
+
+        self._lock = threading.Lock()
+        self._outcomes = deque(maxlen=window) # (failed, slow)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._trial_running = False
+        self._publish()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def _publish(self):
+        metrics.set_gauge("circuit_breaker_state", STATE_VALUES[self._state], provider=self.name)
+
+    def _set_state(self, state: str):
+        if state != self._state:
+            print(f"[BREAKER] {self.name}: {self._state} -> {state}")
+        self._state = state
+        self._publish()
+
+    def raise_if_open(self):
+        # cheap check before queueing for a rate limit slot
+        with self._lock:
+            if self._state == OPEN and time.monotonic() < self._opened_at + self.open_seconds:
+                metrics.inc("circuit_breaker_calls_total", provider=self.name, outcome="rejected")
+                raise CircuitOpen(f"{self.name} circuit is open")
+
+    def _allow(self) -> bool:
+        with self._lock:
+            if self._state == OPEN:
+                if time.monotonic() < self._opened_at + self.open_seconds:
+                    return False
+                self._set_state(HALF_OPEN)
+            if self._state == HALF_OPEN:
+                if self._trial_running:
+                    return False
+                self._trial_running = True
+            return True
+
+    def _record(self, failed: bool, duration: float):
+        slow = duration >= self.slow_call_seconds
+        outcome = "failure" if failed else ("slow" if slow else "success")
+        metrics.inc("circuit_breaker_calls_total", provider=self.name, outcome=outcome)
+
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._trial_running = False
+                if failed or slow:
+                    self._trip()
+                else:
+                    self._outcomes.clear()
+                    self._set_state(CLOSED)
+                return
+
+            self._outcomes.append((failed, slow))
+            calls = len(self._outcomes)
+            if calls < self.min_calls:
+                return
+            failures = sum(1 for f, _ in self._outcomes if f)
+            slow_calls = sum(1 for _, s in self._outcomes if s)
+            if failures / calls >= self.failure_rate or slow_calls / calls >= self.slow_call_rate:
+                self._trip()
+
+    def _trip(self):
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+        self._set_state(OPEN)
+
+    @contextmanager
+    def call(self):
+        # with breaker.call(): make the provider request (raising on failure)
+        if not self._allow():
+            metrics.inc("circuit_breaker_calls_total", provider=self.name, outcome="rejected")
+            raise CircuitOpen(f"{self.name} circuit is open")
+        start = time.monotonic()
+        try:
+            yield
+        except BaseException:
+            self._record(True, time.monotonic() - start)
+            raise
+        self._record(False, time.monotonic() - start)
+
+
+def _from_env(name: str, prefix: str) -> CircuitBreaker:
+    return CircuitBreaker(
+        name,
+        window=int(os.getenv(f"{prefix}_BREAKER_WINDOW", "20")),
+        min_calls=int(os.getenv(f"{prefix}_BREAKER_MIN_CALLS", "5")),
+        failure_rate=float(os.getenv(f"{prefix}_BREAKER_FAILURE_RATE", "0.5")),
+        slow_call_seconds=float(os.getenv(f"{prefix}_BREAKER_SLOW_SECONDS", "10")),
+        slow_call_rate=float(os.getenv(f"{prefix}_BREAKER_SLOW_RATE", "0.5")),
+        open_seconds=float(os.getenv(f"{prefix}_BREAKER_OPEN_SECONDS", "30")),
+    )
+
+
+breakers = {
+    "xai": _from_env("xai", "XAI"),
+    "openai_tts": _from_env("openai_tts", "OPENAI_TTS"),
+    "gtts": _from_env("gtts", "GTTS"),
+}
@@ -1,16 +1,106 @@
 import os
-from sqlalchemy import create_engine
+import time
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from dotenv import load_dotenv
 
+import metrics
+
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise ValueError("DATABASE_URL environment variable is not set")
 
-engine = create_engine(DATABASE_URL,pool_pre_ping=True) # sqlachemy creates connection engine to database if database is alive
+# pool sizing, per engine and per process. size + overflow is the most connections one pool opens.
+# the web pool serves requests, the background pool serves worker.py jobs and the question catalog
+# reloads, so a burst of grading can never take the connections requests are waiting for
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30")) # seconds a checkout waits before failing
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800")) # seconds before a connection is replaced
+DB_BACKGROUND_POOL_SIZE = int(os.getenv("DB_BACKGROUND_POOL_SIZE", "2"))
+DB_BACKGROUND_MAX_OVERFLOW = int(os.getenv("DB_BACKGROUND_MAX_OVERFLOW", "4"))
+DB_BACKGROUND_POOL_TIMEOUT = float(os.getenv("DB_BACKGROUND_POOL_TIMEOUT", "60"))
+
+metrics.describe("db_pool_size", "Connections the pool keeps open")
+metrics.describe("db_pool_checked_out", "Connections currently in use")
+metrics.describe("db_pool_overflow", "Connections open beyond the pool size")
+metrics.describe("db_pool_checkouts_total", "Connections handed out by the pool")
+metrics.describe("db_pool_checkout_wait_seconds_total", "Time spent waiting for (or opening) a connection")
+metrics.describe("db_pool_checkout_timeouts_total", "Checkouts that gave up after the pool timeout")
+metrics.describe("db_pool_pre_ping_failures_total", "Pooled connections found dead by the pre-ping")
+
+
+class _TimedCheckout:
+    # checkout wait per pool, named by pool_logging_name (kept when the pool is recreated)
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            metrics.inc("db_pool_checkout_timeouts_total", pool=self.logging_name)
+            raise
+        finally:
+            metrics.inc("db_pool_checkout_wait_seconds_total", time.perf_counter() - start, pool=self.logging_name)
+        metrics.inc("db_pool_checkouts_total", pool=self.logging_name)
+        return connection
+
+
+class InstrumentedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+
+def pool_options(url, pool_size: int = DB_POOL_SIZE, max_overflow: int = DB_MAX_OVERFLOW,
+                 timeout: float = DB_POOL_TIMEOUT) -> dict:
+    if make_url(url).get_backend_name() == "sqlite":
+        return {} # sqlite picks its own pool class
+    return {
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": timeout,
+        "pool_recycle": DB_POOL_RECYCLE,
+    }
+
+
+def instrument(sync_engine, name: str):
+    # gauges read from the pool when /metrics is rendered, pre-ping failures counted as they happen
+    @event.listens_for(sync_engine, "handle_error")
+    def _count_pre_ping_failure(context):
+        if context.is_pre_ping:
+            metrics.inc("db_pool_pre_ping_failures_total", pool=name)
+
+    @metrics.register_collector
+    def _collect():
+        pool = sync_engine.pool
+        if not isinstance(pool, QueuePool):
+            return
+        metrics.set_gauge("db_pool_size", pool.size(), pool=name)
+        metrics.set_gauge("db_pool_checked_out", pool.checkedout(), pool=name)
+        metrics.set_gauge("db_pool_overflow", max(0, pool.overflow()), pool=name)
+
+
+def make_engine(url, name: str, **options):
+    if options:
+        options["poolclass"] = InstrumentedQueuePool
+    created = create_engine(url, pool_pre_ping=True, pool_logging_name=name, **options) # checks a pooled connection is alive before handing it out
+    instrument(created, name)
+    return created
+
+
+engine = make_engine(DATABASE_URL, "web", **pool_options(DATABASE_URL)) # sqlachemy creates connection engine to database
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine) # each request gets its own session
+background_options = pool_options(DATABASE_URL, DB_BACKGROUND_POOL_SIZE, DB_BACKGROUND_MAX_OVERFLOW, DB_BACKGROUND_POOL_TIMEOUT)
+# sqlite (tests, local runs) keeps one engine, a second in memory database would be empty
+background_engine = make_engine(DATABASE_URL, "background", **background_options) if background_options else engine
+BackgroundSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=background_engine) # worker jobs
 Base = declarative_base() # parent class to create database tables using python
 
 def get_db():
@@ -18,4 +108,46 @@ def get_db():
     try:
         yield db # session is given to endpoint
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+# async engine for the async def endpoints, same database through asyncpg (aiosqlite for sqlite).
+# created on first use so the worker and scripts never need the async drivers
+ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL")
+
+_async_engine = None
+_async_sessionmaker = None
+
+
+def async_database_url() -> str:
+    if ASYNC_DATABASE_URL:
+        return ASYNC_DATABASE_URL
+    url = make_url(DATABASE_URL)
+    return url.set(drivername=ASYNC_DRIVERS.get(url.get_backend_name(), url.drivername)).render_as_string(hide_password=False)
+
+
+def get_async_engine():
+    global _async_engine, _async_sessionmaker
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+        url = async_database_url()
+        options = pool_options(url)
+        if options:
+            options["poolclass"] = InstrumentedAsyncQueuePool
+        _async_engine = create_async_engine(url, pool_pre_ping=True, pool_logging_name="web_async", **options)
+        instrument(_async_engine.sync_engine, "web_async")
+        # expire_on_commit off, attributes read after a commit would need an awaited refresh
+        _async_sessionmaker = async_sessionmaker(_async_engine, autoflush=False, expire_on_commit=False)
+    return _async_engine
+
+
+def AsyncSessionLocal():
+    get_async_engine()
+    return _async_sessionmaker()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db: # closed (connection back in the pool) after the response
+        yield db
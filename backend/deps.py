@@ -1,35 +1,142 @@
+import hashlib
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from db import get_db
+from db import get_async_db, get_db
+from events import broker, publish
 from models import User
 from security import decode_access_token
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token") # uses bearer authentication
 
+# verified principals by token hash, a hit skips both the jwt decode and the users query.
+# entries live AUTH_CACHE_TTL_SECONDS (never past the token's exp), 0 turns the cache off.
+# account changes go through invalidate_principal so every process forgets the user
+AUTH_CACHE_TTL_SECONDS = float(os.getenv("AUTH_CACHE_TTL_SECONDS", "60"))
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "10000"))
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db), # database session
-) -> User:
-    credentials_exception = HTTPException( # 401 error if anything goes wrong
+
+@dataclass(frozen=True)
+class Principal:
+    id: int
+    email: str
+
+
+_principals = OrderedDict() # token hash -> (principal, expires at wall clock)
+_lock = threading.Lock()
+
+
+def _cached(key: str) -> Principal | None:
+    with _lock:
+        entry = _principals.get(key)
+        if entry is None:
+            return None
+        principal, expires_at = entry
+        if time.time() >= expires_at:
+            del _principals[key]
+            return None
+        _principals.move_to_end(key)
+        return principal
+
+
+def _remember(key: str, principal: Principal, token_exp):
+    expires_at = time.time() + AUTH_CACHE_TTL_SECONDS
+    if token_exp:
+        expires_at = min(expires_at, float(token_exp))
+    with _lock:
+        _principals[key] = (principal, expires_at)
+        while len(_principals) > AUTH_CACHE_SIZE:
+            _principals.popitem(last=False)
+
+
+def _forget_user(key: str, data: dict):
+    with _lock:
+        for token_key in [k for k, (p, _) in _principals.items() if p.id == data["user_id"]]:
+            del _principals[token_key]
+
+
+broker.add_handler("principal_invalidated", _forget_user)
+
+
+def invalidate_principal(db: Session, user_id: int):
+    # call in the transaction that changes or deletes the account, applied everywhere on commit
+    publish(db, f"user:{user_id}", "principal_invalidated", {"user_id": user_id})
+
+
+def _token_key(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException( # 401 error if anything goes wrong
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
+
+def _decode(token: str) -> tuple:
+    # (user id, exp) from a valid token
     try:
         payload = decode_access_token(token)
         sub = payload.get("sub")
         if sub is None:
-            raise credentials_exception
-        user_id = int(sub)
+            raise _credentials_exception()
+        return int(sub), payload.get("exp")
     except Exception:
-        raise credentials_exception
+        raise _credentials_exception()
 
-    user = db.query(User).filter(User.id == user_id).first()
+
+def _principal(key: str, user, token_exp) -> Principal:
     if not user:
-        raise credentials_exception
+        raise _credentials_exception()
+    principal = Principal(id=user.id, email=user.email)
+    if AUTH_CACHE_TTL_SECONDS > 0:
+        _remember(key, principal, token_exp)
+    return principal
+
+
+def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db), # database session, only used on a cache miss
+) -> Principal:
+    key = _token_key(token)
+    principal = _cached(key) if AUTH_CACHE_TTL_SECONDS > 0 else None
+    if principal:
+        return principal
+
+    user_id, token_exp = _decode(token)
+    user = db.query(User.id, User.email).filter(User.id == user_id).first()
+    return _principal(key, user, token_exp)
+
+
+async def get_current_user_async(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db), # shared with the async endpoint, only used on a cache miss
+) -> Principal:
+    key = _token_key(token)
+    principal = _cached(key) if AUTH_CACHE_TTL_SECONDS > 0 else None
+    if principal:
+        return principal
+
+    user_id, token_exp = _decode(token)
+    user = (await db.execute(select(User.id, User.email).where(User.id == user_id))).first()
+    return _principal(key, user, token_exp)
 
-    return user
+
+def parse_session_id(session_id: str) -> uuid.UUID:
+    # asyncpg wants a real uuid, anything else cannot be a session
+    try:
+        return uuid.UUID(session_id)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Interview session not found")
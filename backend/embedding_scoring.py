@@ -0,0 +1,100 @@
+import os
+import re
+from typing import List
+
+import torch
+
+# long transcripts are split into overlapping sentence windows so nothing is cut off
+# at the model's max sequence length, all windows are encoded in one batch
+SBERT_CHUNKING = os.getenv("SBERT_CHUNKING", "auto") # off | auto | always
+SBERT_AGGREGATION = os.getenv("SBERT_AGGREGATION", "max") # max | weighted
+SBERT_WINDOW_WORDS = int(os.getenv("SBERT_WINDOW_WORDS", "120")) # stays under MiniLM's 256 word pieces
+SBERT_WINDOW_OVERLAP = int(os.getenv("SBERT_WINDOW_OVERLAP", "1")) # sentences shared by neighbouring windows
+SBERT_BATCH_SIZE = int(os.getenv("SBERT_BATCH_SIZE", "32"))
+
+SBERT_MODEL_NAME = "all-MiniLM-L6-v2"
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def split_sentences(text: str, max_words: int) -> List[List[str]]:
+    # sentences as word lists, run-ons without punctuation are cut at max_words
+    sentences = []
+    for sentence in _SENTENCE_END.split(text.strip()):
+        words = sentence.split()
+        for start in range(0, len(words), max_words):
+            sentences.append(words[start:start + max_words])
+    return [s for s in sentences if s]
+
+
+def split_windows(text: str, max_words: int = SBERT_WINDOW_WORDS, overlap: int = SBERT_WINDOW_OVERLAP) -> List[str]:
+    sentences = split_sentences(text, max_words)
+    if not sentences:
+        return []
+
+    windows = []
+    start = 0
+    while start < len(sentences):
+        # pack whole sentences until the word budget is used
+        end = start
+        words = 0
+        while end < len(sentences) and (end == start or words + len(sentences[end]) <= max_words):
+            words += len(sentences[end])
+            end += 1
+        windows.append(" ".join(" ".join(s) for s in sentences[start:end]))
+        if end >= len(sentences):
+            break
+        # step back for overlap but always move forward
+        start = max(start + 1, end - overlap)
+    return windows
+
+
+def needs_chunking(model, text: str) -> bool:
+    if SBERT_CHUNKING == "always":
+        return True
+    if SBERT_CHUNKING == "off":
+        return False
+    return len(model.tokenizer.tokenize(text)) > model.max_seq_length - 2 # [CLS] and [SEP]
+
+
+def answer_windows(model, answer: str) -> List[str]:
+    if not needs_chunking(model, answer):
+        return [answer]
+    return split_windows(answer) or [answer]
+
+
+def aggregate(similarities: torch.Tensor, windows: List[str], aggregation: str = SBERT_AGGREGATION) -> float:
+    # similarities has one value per window
+    if aggregation == "weighted":
+        weights = torch.tensor([float(len(w.split())) for w in windows], device=similarities.device)
+        return float((similarities * weights).sum() / weights.sum())
+    return float(similarities.max())
+
+
+def encode_references(model, references: List[str]) -> torch.Tensor:
+    # one row per reference answer, unit length
+    return model.encode(
+        references,
+        convert_to_tensor=True,
+        normalize_embeddings=True,
+        batch_size=SBERT_BATCH_SIZE,
+    )
+
+
+def similarity_to_references(model, answer: str, reference_matrix: torch.Tensor, aggregation: str = SBERT_AGGREGATION) -> float:
+    # cosine similarity of the answer to its closest reference, in [-1, 1]
+    windows = answer_windows(model, answer)
+    window_emb = model.encode(
+        windows,
+        convert_to_tensor=True,
+        normalize_embeddings=True,
+        batch_size=SBERT_BATCH_SIZE,
+    )
+    # everything is unit length so one (windows x dim) @ (dim x references) product gives all cosines
+    similarities = window_emb @ reference_matrix.to(window_emb.device).T
+    # best matching reference for each window, then aggregate over windows
+    return aggregate(similarities.max(dim=1).values, windows, aggregation)
+
+
+def chunked_similarity(model, answer: str, reference: str, aggregation: str = SBERT_AGGREGATION) -> float:
+    return similarity_to_references(model, answer, encode_references(model, [reference]), aggregation)
@@ -0,0 +1,155 @@
+import asyncio
+import json
+import os
+import select
+import threading
+import uuid
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from db import BackgroundSessionLocal, SessionLocal, engine
+from models import Answer
+from models import Session as InterviewSession
+
+# grading progress events for /interview/{id}/events
+# workers publish inside their transaction, events only go out if it commits.
+# postgres: LISTEN/NOTIFY carries events from worker processes to every web process
+# memory: publisher and subscribers must share a process (tests, single process setups)
+EVENTS_BACKEND = os.getenv("EVENTS_BACKEND", "postgres")
+EVENTS_CHANNEL = "interview_events"
+
+
+class EventBroker:
+    # in-process fan out from whichever backend delivered the event to the open streams
+
+    def __init__(self):
+        self._subscribers = {} # key -> list of (loop, queue)
+        self._handlers = {} # event type -> in-process callbacks, e.g. cache invalidation
+        self._lock = threading.Lock()
+
+    def add_handler(self, event_type: str, handler):
+        # handler(key, data) runs on the dispatching thread for every event of that type
+        self._handlers.setdefault(event_type, []).append(handler)
+
+    def subscribe(self, key: str) -> asyncio.Queue:
+        # call from the event loop that will read the queue
+        queue = asyncio.Queue()
+        with self._lock:
+            self._subscribers.setdefault(key, []).append((asyncio.get_running_loop(), queue))
+        return queue
+
+    def unsubscribe(self, key: str, queue: asyncio.Queue):
+        with self._lock:
+            remaining = [(l, q) for l, q in self._subscribers.get(key, []) if q is not queue]
+            if remaining:
+                self._subscribers[key] = remaining
+            else:
+                self._subscribers.pop(key, None)
+
+    def dispatch(self, key: str, message: dict):
+        # safe to call from any thread
+        for handler in self._handlers.get(message["type"], []):
+            try:
+                handler(key, message["data"])
+            except Exception as e:
+                print(f"[EVENTS] {message['type']} handler failed: {e}")
+        with self._lock:
+            targets = list(self._subscribers.get(key, []))
+        for loop, queue in targets:
+            loop.call_soon_threadsafe(queue.put_nowait, message)
+
+
+broker = EventBroker()
+
+
+def publish(db, key: str, event_type: str, data: dict):
+    message = {"key": key, "type": event_type, "data": data}
+    if EVENTS_BACKEND == "postgres":
+        # NOTIFY is transactional, postgres delivers it on commit and drops it on rollback
+        db.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": EVENTS_CHANNEL, "payload": json.dumps(message)})
+    else:
+        db.info.setdefault("pending_events", []).append(message)
+
+
+def _dispatch_pending(session):
+    for message in session.info.pop("pending_events", []):
+        broker.dispatch(message["key"], message)
+
+
+def _drop_pending(session, previous_transaction):
+    session.info.pop("pending_events", None)
+
+
+for _sessionmaker in (SessionLocal, BackgroundSessionLocal):
+    event.listen(_sessionmaker, "after_commit", _dispatch_pending)
+    event.listen(_sessionmaker, "after_soft_rollback", _drop_pending)
+
+
+def _listen_forever():
+    # own connection outside the pool so the stream listener never takes a request's slot,
+    # reconnects if the database goes away
+    while True:
+        dbapi_conn = None
+        try:
+            cargs, cparams = engine.dialect.create_connect_args(engine.url)
+            dbapi_conn = engine.dialect.connect(*cargs, **cparams)
+            dbapi_conn.autocommit = True
+            cursor = dbapi_conn.cursor()
+            cursor.execute(f"LISTEN {EVENTS_CHANNEL}")
+            print(f"[EVENTS] Listening on {EVENTS_CHANNEL}")
+            while True:
+                if select.select([dbapi_conn], [], [], 30) == ([], [], []):
+                    continue
+                dbapi_conn.poll()
+                while dbapi_conn.notifies:
+                    notify = dbapi_conn.notifies.pop(0)
+                    message = json.loads(notify.payload)
+                    broker.dispatch(message["key"], message)
+        except Exception as e:
+            print(f"[EVENTS] Listener error: {e}, reconnecting")
+            threading.Event().wait(2)
+        finally:
+            if dbapi_conn is not None:
+                try:
+                    dbapi_conn.close()
+                except Exception:
+                    pass
+
+
+def start_listener():
+    if EVENTS_BACKEND != "postgres":
+        return
+    threading.Thread(target=_listen_forever, name="events-listener", daemon=True).start()
+
+
+def grading_snapshot(db: Session, session_id: uuid.UUID, user_id: int) -> list[dict] | None:
+    # what has already happened, sent first so a late subscriber misses nothing
+    interview_session = (
+        db.query(InterviewSession.status, InterviewSession.overall_status)
+        .filter(InterviewSession.id == session_id)
+        .filter(InterviewSession.user_id == user_id)
+        .first()
+    )
+    if not interview_session:
+        return None
+    answers = (
+        db.query(Answer.id, Answer.question_id, Answer.score, Answer.grading_status, Answer.provisional)
+        .filter(Answer.session_id == session_id)
+        .filter(Answer.grading_status != "pending")
+        .all()
+    )
+    messages = [
+        {"type": "graded", "data": {"answer_id": a.id, "question_id": a.question_id, "score": a.score,
+                                    "grading_status": a.grading_status, "provisional": a.provisional}}
+        for a in answers
+    ]
+    if interview_session.overall_status == "ready":
+        messages.append({"type": "overall_feedback_ready", "data": {"session_id": str(session_id)}})
+    elif interview_session.overall_status == "failed":
+        messages.append({"type": "overall_feedback_failed", "data": {"session_id": str(session_id)}})
+    return messages
+
+
+def format_sse(message: dict) -> str:
+    return f"event: {message['type']}\ndata: {json.dumps(message['data'])}\n\n"
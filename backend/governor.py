@@ -0,0 +1,190 @@
+import math
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+# one governor for every outbound provider call (xai llm, openai tts).
+# token buckets for requests/min and tokens/min plus a concurrency cap, shared by every
+# process on the machine through a small sqlite file (uvicorn workers, worker.py).
+# interactive calls (tts for /current) can use the whole budget, batch calls (grading,
+# overall feedback) leave GOVERNOR_BATCH_RESERVE of it free for interactive ones
+GOVERNOR_STATE_PATH = os.getenv("GOVERNOR_STATE_PATH", os.path.join(tempfile.gettempdir(), "fyp_governor.sqlite3"))
+GOVERNOR_BATCH_RESERVE = float(os.getenv("GOVERNOR_BATCH_RESERVE", "0.25"))
+GOVERNOR_LEASE_SECONDS = float(os.getenv("GOVERNOR_LEASE_SECONDS", "120")) # frees slots of crashed processes
+
+INTERACTIVE = "interactive"
+BATCH = "batch"
+
+PROVIDERS = {
+    "xai": {
+        "rpm": int(os.getenv("XAI_RPM", "60")),
+        "tpm": int(os.getenv("XAI_TPM", "100000")),
+        "concurrency": int(os.getenv("XAI_CONCURRENCY", "8")),
+    },
+    "openai_tts": {
+        "rpm": int(os.getenv("OPENAI_TTS_RPM", "50")),
+        "tpm": None,
+        "concurrency": int(os.getenv("OPENAI_TTS_CONCURRENCY", "4")),
+    },
+}
+
+DEFAULT_TIMEOUT = {INTERACTIVE: 15.0, BATCH: 300.0}
+
+
+class GovernorTimeout(Exception):
+    pass
+
+
+_local = threading.local()
+
+
+def _connection() -> sqlite3.Connection:
+    # one connection per thread, sqlite serialises writers across processes with its file lock
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(GOVERNOR_STATE_PATH, timeout=10, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)")
+        conn.execute("CREATE TABLE IF NOT EXISTS leases (id INTEGER PRIMARY KEY, provider TEXT NOT NULL, expires REAL NOT NULL)")
+        _local.conn = conn
+    return conn
+
+
+def _refilled(conn, key: str, capacity: float, per_second: float, now: float) -> float:
+    row = conn.execute("SELECT tokens, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+    if row is None:
+        return capacity
+    tokens, updated = row
+    return min(capacity, tokens + (now - updated) * per_second)
+
+
+def _save(conn, key: str, tokens: float, now: float):
+    conn.execute(
+        "INSERT INTO buckets (key, tokens, updated) VALUES (?, ?, ?) "
+        "ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated",
+        (key, tokens, now),
+    )
+
+
+def take(buckets: list, reserve: float = 0.0) -> float:
+    # buckets: (key, capacity, refill per second, cost). takes from all of them or none.
+    # a bucket only pays out while reserve * capacity is left afterwards, a cost bigger than
+    # the rest of the bucket is clamped to it (it could never be paid otherwise).
+    # returns 0 on success, otherwise roughly how many seconds until it could succeed
+    buckets = [(key, capacity, per_second, min(cost, capacity * (1 - reserve))) for key, capacity, per_second, cost in buckets]
+    conn = _connection()
+    now = time.time()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        wait = 0.0
+        levels = []
+        for key, capacity, per_second, cost in buckets:
+            tokens = _refilled(conn, key, capacity, per_second, now)
+            levels.append(tokens)
+            shortfall = cost + reserve * capacity - tokens
+            if shortfall > 0:
+                wait = max(wait, shortfall / per_second)
+        if wait == 0.0:
+            for (key, capacity, per_second, cost), tokens in zip(buckets, levels):
+                _save(conn, key, tokens - cost, now)
+        conn.execute("COMMIT")
+        return wait
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def _lease(provider: str, limit: int) -> int | None:
+    conn = _connection()
+    now = time.time()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute("DELETE FROM leases WHERE expires < ?", (now,))
+        active = conn.execute("SELECT COUNT(*) FROM leases WHERE provider = ?", (provider,)).fetchone()[0]
+        lease_id = None
+        if active < limit:
+            lease_id = conn.execute(
+                "INSERT INTO leases (provider, expires) VALUES (?, ?)", (provider, now + GOVERNOR_LEASE_SECONDS)
+            ).lastrowid
+        conn.execute("COMMIT")
+        return lease_id
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def _release(lease_id: int):
+    _connection().execute("DELETE FROM leases WHERE id = ?", (lease_id,))
+
+
+def retry_after_seconds(value: str | None, default: float = 10.0) -> float:
+    # Retry-After is either delay seconds or an http date
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return default
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def report_throttled(provider: str, retry_after: float = 10.0):
+    # the provider answered 429, empty the request bucket so every process backs off together
+    config = PROVIDERS[provider]
+    per_second = config["rpm"] / 60.0
+    conn = _connection()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        _save(conn, f"{provider}:requests", -retry_after * per_second, time.time())
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+
+@contextmanager
+def governed(provider: str, priority: str = BATCH, tokens: int = 0, timeout: float | None = None):
+    # with governed("xai", BATCH, tokens=estimate): make the call
+    config = PROVIDERS[provider]
+    reserve = GOVERNOR_BATCH_RESERVE if priority == BATCH else 0.0
+    deadline = time.monotonic() + (timeout if timeout is not None else DEFAULT_TIMEOUT[priority])
+
+    buckets = [(f"{provider}:requests", config["rpm"], config["rpm"] / 60.0, 1)]
+    if config["tpm"] and tokens:
+        buckets.append((f"{provider}:tokens", config["tpm"], config["tpm"] / 60.0, tokens))
+    limit = config["concurrency"]
+    if priority == BATCH:
+        limit = max(1, limit - math.ceil(limit * GOVERNOR_BATCH_RESERVE))
+
+    lease_id = None
+    while True:
+        wait = take(buckets, reserve)
+        if wait == 0.0:
+            break
+        if time.monotonic() + wait > deadline:
+            raise GovernorTimeout(f"{provider} rate limit, {priority} call would wait {wait:.1f}s")
+        time.sleep(min(wait, 1.0) + random.uniform(0, 0.05))
+
+    while lease_id is None:
+        lease_id = _lease(provider, limit)
+        if lease_id is None:
+            if time.monotonic() > deadline:
+                raise GovernorTimeout(f"{provider} concurrency limit reached for {priority} call")
+            time.sleep(0.05 + random.uniform(0, 0.05))
+
+    try:
+        yield
+    finally:
+        _release(lease_id)
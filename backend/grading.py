@@ -29,11 +29,30 @@ import os
 from typing import List, Tuple
 import requests
 from dotenv import load_dotenv
-from sentence_transformers import SentenceTransformer, util
+from sentence_transformers import SentenceTransformer
+
+from circuit_breaker import breakers
+from embedding_scoring import SBERT_MODEL_NAME, chunked_similarity, similarity_to_references
+from governor import BATCH, governed, report_throttled, retry_after_seconds
+from prompt_compaction import count_tokens
+from score_model import load_score_model, snap_to_bucket
 
 
 load_dotenv()
 
+# llm = always ask the llm, local = only use the trained score model,
+# prescreen = use the score model when it is close to a rubric value and ask the llm otherwise
+SCORE_MODE = os.getenv("SCORE_MODE", "llm")
+SCORE_PRESCREEN_MARGIN = float(os.getenv("SCORE_PRESCREEN_MARGIN", "5"))
+# when xai is failing or its breaker is open, grade locally and mark the score provisional
+# instead of failing the job (0 = keep retrying until the llm is back)
+ALLOW_PROVISIONAL_GRADING = os.getenv("ALLOW_PROVISIONAL_GRADING", "1") == "1"
+XAI_TIMEOUT_SECONDS = float(os.getenv("XAI_TIMEOUT_SECONDS", "20"))
+
+
+class LLMUnavailable(Exception):
+    pass
+
 
 class GradingSystem:
     def __init__(self):
@@ -42,25 +61,72 @@ class GradingSystem:
             raise RuntimeError("Missing GROQ_API in environment")
         self.base_url = "https://api.x.ai/v1/chat/completions"
         self.model = os.getenv("XAI_MODEL", "grok-3-mini")
-        self.sbert = SentenceTransformer("all-MiniLM-L6-v2")
-
-    def grade(self, answer: str, reference: str, question: str, keywords: List[str])  -> Tuple[float, List[str]]:
-        sbert_score = self._sbert_score(answer, reference)
+        self.sbert = SentenceTransformer(SBERT_MODEL_NAME)
+        self.score_mode = SCORE_MODE
+        self.score_model = load_score_model() # also the provisional fallback when the llm is down
+        if self.score_mode != "llm" and not self.score_model:
+            print(f"SCORE_MODE={self.score_mode} but no score model found, using the LLM only")
+
+    def grade(self, answer: str, reference: str, question: str, keywords: List[str], topic: str | None = None,
+              reference_matrix=None)  -> Tuple[float, List[str]]:
+        result = self.grade_detailed(answer, reference, question, keywords, topic, reference_matrix)
+        return result["final"], result["hits"]
+
+    def grade_detailed(self, answer: str, reference: str, question: str, keywords: List[str], topic: str | None = None,
+                       reference_matrix=None) -> dict:
+        # reference_matrix holds embeddings of every accepted reference answer (see reference_answers.py)
+        sbert_score = self._sbert_score(answer, reference, reference_matrix)
         keyword_score, hits  = self._keyword_score(answer, keywords)
-        llm_score = self._llm_score(question, reference, answer, keywords)
-
-        print(f"SBERT: {sbert_score:.1f}/100, Keywords: {keyword_score:.1f}/100, LLM: {llm_score:.1f}/100")
+        llm_score, llm_source, provisional = self._rubric_score(question, reference, answer, keywords, sbert_score, keyword_score, topic)
 
         baseline = sbert_score * 0.40 + keyword_score * 0.30
-        final = baseline + llm_score * 0.30
+        if llm_score is None:
+            # no rubric score at all, reweight the other two
+            print(f"SBERT: {sbert_score:.1f}/100, Keywords: {keyword_score:.1f}/100, LLM: unavailable")
+            final = baseline / 0.70
+        else:
+            print(f"SBERT: {sbert_score:.1f}/100, Keywords: {keyword_score:.1f}/100, LLM ({llm_source}): {llm_score:.1f}/100")
+            final = baseline + llm_score * 0.30
         final_float_score = max(0.0, min(100.0, final)) / 100.0
-        return final_float_score, hits
-
-    def _sbert_score(self, answer: str, reference: str) -> float:
-        if not answer or not reference:
+        return {
+            "final": final_float_score,
+            "hits": hits,
+            "sbert": sbert_score,
+            "keyword": keyword_score,
+            "llm": llm_score,
+            "llm_source": llm_source,
+            "provisional": provisional,
+        }
+
+    def _rubric_score(self, question: str, reference: str, answer: str, keywords: List[str],
+                      sbert_score: float, keyword_score: float, topic: str | None) -> Tuple[float | None, str, bool]:
+        # (rubric score, where it came from, provisional)
+        # rubric score from the local model when allowed, otherwise from the llm
+        predicted = None
+        if self.score_model:
+            predicted = self.score_model.predict(sbert_score, keyword_score, answer, topic)
+            bucket = snap_to_bucket(predicted)
+            if self.score_mode == "local" or (self.score_mode == "prescreen" and abs(predicted - bucket) <= SCORE_PRESCREEN_MARGIN):
+                return float(bucket), "local", False
+        try:
+            return self._llm_score(question, reference, answer, keywords), "llm", False
+        except Exception as e:
+            if not ALLOW_PROVISIONAL_GRADING:
+                raise
+            print(f"LLM score unavailable ({e}), grading provisionally")
+            if predicted is not None:
+                return float(snap_to_bucket(predicted)), "local", True
+            return None, "none", True
+
+    def _sbert_score(self, answer: str, reference: str, reference_matrix=None) -> float:
+        if not answer:
+            return 0.0
+        if reference_matrix is not None and len(reference_matrix) > 0:
+            sim = similarity_to_references(self.sbert, answer, reference_matrix)
+            return sim * 100.0
+        if not reference:
             return 0.0
-        emb = self.sbert.encode([answer, reference], convert_to_tensor=True)
-        sim = util.pytorch_cos_sim(emb[0], emb[1]).item()
+        sim = chunked_similarity(self.sbert, answer, reference)
         return sim * 100.0
 
     def _keyword_score(self, answer: str, keywords: List[str]) -> Tuple[float, List[str]]:
@@ -119,30 +185,39 @@ class GradingSystem:
         Output EXACTLY one line and nothing else:
         SCORE: [0|25|50|75|100]"""
 
-        try:
-            r = requests.post(
-                self.base_url,
-                headers={
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json",
-                },
-                json={
-                    "model": self.model,
-                    "messages": [
-                        {
-                            "role": "system",
-                            "content": "You are a strict Computer Science interview grader. Output exactly one line in the required format.",
-                        },
-                        {"role": "user", "content": prompt},
-                    ],
-                    "temperature": 0.0,
-                    "max_tokens": 20,
-                },
-                timeout=30,
-            )
+        # provider problems raise LLMUnavailable, a reply that does not parse still scores 0
+        breaker = breakers["xai"]
+        breaker.raise_if_open()
+        with governed("xai", BATCH, tokens=count_tokens(prompt) + 20), breaker.call():
+            try:
+                r = requests.post(
+                    self.base_url,
+                    headers={
+                        "Authorization": f"Bearer {self.api_key}",
+                        "Content-Type": "application/json",
+                    },
+                    json={
+                        "model": self.model,
+                        "messages": [
+                            {
+                                "role": "system",
+                                "content": "You are a strict Computer Science interview grader. Output exactly one line in the required format.",
+                            },
+                            {"role": "user", "content": prompt},
+                        ],
+                        "temperature": 0.0,
+                        "max_tokens": 20,
+                    },
+                    timeout=XAI_TIMEOUT_SECONDS,
+                )
+            except requests.RequestException as e:
+                raise LLMUnavailable(f"xAI request failed: {e}") from e
+            if r.status_code == 429:
+                report_throttled("xai", retry_after_seconds(r.headers.get("retry-after")))
             if not r.ok:
-                return 0.0
+                raise LLMUnavailable(f"xAI returned {r.status_code}")
 
+        try:
             content = r.json()["choices"][0]["message"]["content"].strip()
 
             # Robust parse (handles extra whitespace)
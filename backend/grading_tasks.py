@@ -0,0 +1,186 @@
+import uuid
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from events import publish
+from job_queue import JOB_MAX_ATTEMPTS, enqueue
+from prompt_compaction import compact_overall_summary
+from queries import answer_summary, session_answers
+from question_catalog import get_question
+from models import Answer
+from models import Session as InterviewSession
+from rollups import bump_analytics_version, record_graded_answer
+
+# job handlers run by worker.py, each gets the worker's db session and must not commit,
+# the worker commits the handler's writes together with marking the job done.
+# raising makes the job retry with backoff. the grading models and llm clients are imported
+# where they are used, worker.py loads them up front
+
+# provisional answers (graded while xai was down) get a delayed "upgrade" regrade
+PROVISIONAL_REGRADE_DELAY_SECONDS = 300
+PROVISIONAL_FEEDBACK = (
+    "Provisional score: detailed feedback is temporarily unavailable. "
+    "Your answer will be re-graded automatically."
+)
+
+
+def grade_answer(db: Session, payload: dict):
+    from grading import grader
+    from groq import generate_feedback
+    from reference_answers import load_reference_matrix
+
+    answer_id = payload["answer_id"]
+    answer = db.query(Answer).filter(Answer.id == answer_id).first()
+    if not answer:
+        print(f"[GRADING] Answer {answer_id} no longer exists")
+        return
+    upgrade = payload.get("upgrade", False)
+    if answer.grading_status == "graded" and not (upgrade and answer.provisional):
+        print(f"[GRADING] Answer {answer_id} already graded")
+        return
+
+    # an upgrade of an answer the overall feedback may already have been built from
+    upgrading = upgrade and answer.grading_status == "graded"
+    print(f"[GRADING] Starting grading for answer {answer_id}")
+    question = get_question(answer.question_id)
+    if not question:
+        print(f"Question {answer.question_id} not found for answer {answer_id}")
+        return
+
+    keywords = question.keywords or []
+    result = grader.grade_detailed(
+        answer=answer.transcript,
+        reference=question.reference_answer,
+        question=question.text,
+        keywords=keywords,
+        topic=question.topic,
+        reference_matrix=load_reference_matrix(db, grader.sbert, question.id),
+    )
+    score = int(round(result["final"] * 100))
+
+    if result["provisional"]:
+        if upgrade:
+            raise RuntimeError("LLM still unavailable, keeping the provisional grade") # retried with backoff
+        feedback = PROVISIONAL_FEEDBACK
+        enqueue(
+            db, "grade_answer", {"answer_id": answer_id, "upgrade": True},
+            delay_seconds=PROVISIONAL_REGRADE_DELAY_SECONDS, max_attempts=JOB_MAX_ATTEMPTS * 2,
+        )
+    else:
+        print(f"[GRADING] Generating feedback for answer {answer_id}")
+        feedback = generate_feedback(
+            question_text=question.text,
+            reference_answer=question.reference_answer,
+            transcript=answer.transcript,
+            score=score
+        )
+
+    answer.score = score
+    answer.feedback = feedback
+    answer.keywords_hit = result["hits"]
+    answer.llm_score = int(result["llm"]) if result["llm"] is not None else None
+    answer.llm_score_source = result["llm_source"] if result["llm"] is not None else None
+    answer.provisional = result["provisional"]
+    finish_answer(db, answer, "graded", rebuild_overall=upgrading)
+    print(f"[GRADING] Completed answer {answer_id} with score {score}%{' (provisional)' if answer.provisional else ''}")
+
+
+def finish_answer(db: Session, answer: Answer, grading_status: str, rebuild_overall: bool = False):
+    # the session row lock serialises the graders of one session, so after taking it this
+    # transaction sees every other grader's committed status and exactly one of them
+    # sees the last pending answer finish
+    interview_session = (
+        db.query(InterviewSession)
+        .filter(InterviewSession.id == answer.session_id)
+        .with_for_update()
+        .one()
+    )
+    answer.grading_status = grading_status
+    if rebuild_overall and interview_session.status == "completed" and interview_session.overall_status in ("ready", "failed"):
+        # built from the provisional score, queued again below once no answer is pending
+        interview_session.overall_status = "pending"
+        print(f"[OVERALL] Answer {answer.id} upgraded, rebuilding overall feedback for session {interview_session.id}")
+    if grading_status == "graded":
+        record_graded_answer(db, interview_session, answer)
+    db.flush()
+    publish(db, str(answer.session_id), "graded", {
+        "answer_id": answer.id,
+        "question_id": answer.question_id,
+        "score": answer.score,
+        "grading_status": grading_status,
+        "provisional": answer.provisional,
+    })
+    queue_overall_feedback_if_ready(db, interview_session)
+
+
+def queue_overall_feedback_if_ready(db: Session, interview_session: InterviewSession) -> bool:
+    # caller must hold the session row lock (finish_answer), so exactly one grader queues the build
+    if interview_session.status != "completed" or interview_session.overall_status != "pending":
+        return False
+    pending = (
+        db.query(func.count(Answer.id))
+        .filter(Answer.session_id == interview_session.id)
+        .filter(Answer.grading_status == "pending")
+        .scalar()
+    )
+    if pending:
+        return False
+    interview_session.overall_status = "queued"
+    enqueue(db, "overall_feedback", {"session_id": str(interview_session.id)})
+    print(f"[OVERALL] All answers graded, queued overall feedback for session {interview_session.id}")
+    return True
+
+
+def overall_summary(db: Session, session_id) -> list[dict]:
+    # answers that could not be graded are left out rather than summarised with placeholder scores
+    return [answer_summary(answer) for answer in session_answers(db, session_id, grading_status="graded")]
+
+
+def build_overall_feedback(db: Session, payload: dict):
+    session_id = uuid.UUID(payload["session_id"])
+    print(f"[OVERALL] Starting overall feedback for session {session_id}")
+    interview_session = db.query(InterviewSession).filter(InterviewSession.id == session_id).first()
+    if not interview_session:
+        print(f"Session {session_id} not found for overall feedback")
+        return
+    if interview_session.overall_status == "ready":
+        print(f"[OVERALL] Session {session_id} already has overall feedback")
+        return
+
+    summary = overall_summary(db, interview_session.id)
+    if summary:
+        from groq import generate_overall_feedback
+
+        interview_session.overall_feedback = generate_overall_feedback(compact_overall_summary(summary))
+    else:
+        interview_session.overall_feedback = "Summary: None of the answers in this session could be graded."
+    interview_session.overall_status = "ready"
+    bump_analytics_version(db, interview_session.user_id) # has_overall_feedback in the history
+    publish(db, str(interview_session.id), "overall_feedback_ready", {"session_id": str(interview_session.id)})
+    print(f"[OVERALL] Completed overall feedback for session {session_id}")
+
+
+def grade_answer_dead(db: Session, payload: dict):
+    # out of retries, stop the session waiting on this answer
+    answer = db.query(Answer).filter(Answer.id == payload["answer_id"]).first()
+    if answer and answer.grading_status == "pending":
+        finish_answer(db, answer, "failed")
+
+
+def overall_feedback_dead(db: Session, payload: dict):
+    interview_session = db.query(InterviewSession).filter(InterviewSession.id == uuid.UUID(payload["session_id"])).first()
+    if interview_session and interview_session.overall_status != "ready":
+        interview_session.overall_status = "failed"
+        publish(db, str(interview_session.id), "overall_feedback_failed", {"session_id": str(interview_session.id)})
+
+
+HANDLERS = {
+    "grade_answer": grade_answer,
+    "overall_feedback": build_overall_feedback,
+}
+
+DEAD_HANDLERS = {
+    "grade_answer": grade_answer_dead,
+    "overall_feedback": overall_feedback_dead,
+}
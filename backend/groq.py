@@ -1,15 +1,37 @@
 import os
-import json
-from openai import OpenAI
+from openai import OpenAI, RateLimitError
 from dotenv import load_dotenv
+
+from circuit_breaker import breakers
+from governor import BATCH, governed, report_throttled, retry_after_seconds
+from prompt_compaction import count_tokens, to_prompt_json
 load_dotenv()
 
 client = OpenAI(
     api_key= os.getenv("GROQ_API"),
-    base_url="https://api.x.ai/v1"
+    base_url="https://api.x.ai/v1",
+    timeout=float(os.getenv("XAI_TIMEOUT_SECONDS", "20")),
 )
 
 
+def governed_completion(messages: list, max_tokens: int, temperature: float = 0.3):
+    # every xai call goes through the shared rate limiter (governor.py) and the xai circuit breaker
+    tokens = sum(count_tokens(m["content"]) for m in messages) + max_tokens
+    breaker = breakers["xai"]
+    breaker.raise_if_open()
+    with governed("xai", BATCH, tokens=tokens), breaker.call():
+        try:
+            return client.chat.completions.create(
+                model = "grok-3-mini",
+                messages = messages,
+                max_tokens = max_tokens,
+                temperature = temperature
+            )
+        except RateLimitError as e:
+            report_throttled("xai", retry_after_seconds(e.response.headers.get("retry-after")))
+            raise
+
+
 def generate_feedback(question_text: str, reference_answer: str, transcript: str, score: int) -> str:
     messages = [
         {
@@ -47,15 +69,11 @@ def generate_feedback(question_text: str, reference_answer: str, transcript: str
 
         },
     ]
-    chat_completion = client.chat.completions.create(
-        model = "grok-3-mini",
-        messages = messages,
-        max_tokens = 140,
-        temperature = 0.3
-    )
+    chat_completion = governed_completion(messages, max_tokens=140)
     return chat_completion.choices[0].message.content.strip()
 
-def generate_overall_feedback(overall_feedback: list) -> str:
+def generate_overall_feedback(overall_feedback: dict) -> str:
+    # overall_feedback is the compacted session from prompt_compaction.compact_overall_summary
     messages = [
         {
 
@@ -84,17 +102,12 @@ def generate_overall_feedback(overall_feedback: list) -> str:
                 "Rules:\n"
                 "- Keep bullets short (max 12 words).\n"
                 "- No extra sections.\n\n"
-                f"Session JSON:\n{json.dumps(overall_feedback, ensure_ascii=True)}"
+                f"Session JSON:\n{to_prompt_json(overall_feedback)}"
             )
 
         },
     ]
-    chat_completion_overall = client.chat.completions.create(
-        model = "grok-3-mini",
-        messages = messages,
-        max_tokens = 250,
-        temperature = 0.3
-    )
+    chat_completion_overall = governed_completion(messages, max_tokens=250)
     return chat_completion_overall.choices[0].message.content.strip()
 
 def test_feedback():
@@ -0,0 +1,59 @@
+import hashlib
+import json
+import os
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from models import IdempotencyKey
+
+# requests sent with an Idempotency-Key header store their response together with the work they did,
+# in the same transaction, so a retry or double click gets the original response back and nothing
+# is inserted or queued twice. keys are per user and kept IDEMPOTENCY_KEY_TTL_HOURS,
+# python worker.py --prune-idempotency-keys deletes the expired ones
+IDEMPOTENCY_KEY_TTL_HOURS = float(os.getenv("IDEMPOTENCY_KEY_TTL_HOURS", "24"))
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+
+class IdempotencyMismatch(Exception):
+    # the key was already used for a different request
+    pass
+
+
+def fingerprint(request: dict) -> str:
+    return hashlib.sha256(json.dumps(request, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def _expired_before() -> datetime:
+    return datetime.now(timezone.utc) - timedelta(hours=IDEMPOTENCY_KEY_TTL_HOURS)
+
+
+async def replay(db: AsyncSession, user_id: int, key: str, request_fingerprint: str) -> dict | None:
+    # the stored response, None if the key is new. call it holding the lock that orders the
+    # requests (the session row for answers), so a concurrent duplicate sees the committed key
+    row = (await db.execute(
+        select(IdempotencyKey).where(IdempotencyKey.user_id == user_id).where(IdempotencyKey.key == key)
+    )).scalars().first()
+    if row is None:
+        return None
+    created_at = row.created_at if row.created_at.tzinfo else row.created_at.replace(tzinfo=timezone.utc)
+    if created_at < _expired_before():
+        await db.delete(row)
+        await db.flush()
+        return None
+    if row.fingerprint != request_fingerprint:
+        raise IdempotencyMismatch()
+    return row.response
+
+
+def remember(db, user_id: int, key: str, request_fingerprint: str, response: dict):
+    # added to the caller's transaction, only kept if the work it describes commits
+    db.add(IdempotencyKey(user_id=user_id, key=key, fingerprint=request_fingerprint, response=response))
+
+
+def prune(db: Session) -> int:
+    result = db.execute(delete(IdempotencyKey).where(IdempotencyKey.created_at < _expired_before()))
+    db.commit()
+    return result.rowcount
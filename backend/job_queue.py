@@ -0,0 +1,151 @@
+import os
+import random
+
+from sqlalchemy import DateTime, and_, literal, or_, update
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+from sqlalchemy.sql.expression import FunctionElement
+
+from models import Job
+
+# jobs live in the database so they survive restarts and deploys, any number of
+# worker processes on any number of machines can consume them (python worker.py)
+JOB_VISIBILITY_SECONDS = int(os.getenv("JOB_VISIBILITY_SECONDS", "300")) # lease before another worker may retry
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+JOB_BACKOFF_SECONDS = float(os.getenv("JOB_BACKOFF_SECONDS", "5"))
+JOB_BACKOFF_MAX_SECONDS = float(os.getenv("JOB_BACKOFF_MAX_SECONDS", "600"))
+
+
+class seconds_from_now(FunctionElement):
+    # the database clock plus an offset, postgres and sqlite (tests, local runs) spell it differently
+    type = DateTime(timezone=True)
+    inherit_cache = True
+
+    def __init__(self, seconds: float):
+        super().__init__(literal(float(seconds)))
+
+
+@compiles(seconds_from_now)
+def _seconds_from_now(element, compiler, **kw):
+    return "now() + %s * interval '1 second'" % compiler.process(element.clauses, **kw)
+
+
+@compiles(seconds_from_now, "sqlite")
+def _seconds_from_now_sqlite(element, compiler, **kw):
+    return "datetime('now', printf('%%+f seconds', %s))" % compiler.process(element.clauses, **kw)
+
+
+def enqueue(db: Session, kind: str, payload: dict, delay_seconds: float = 0, max_attempts: int = JOB_MAX_ATTEMPTS) -> Job:
+    # added to the caller's transaction so the job only exists if the caller commits
+    job = Job(kind=kind, payload=payload, status="queued", attempts=0, max_attempts=max_attempts)
+    if delay_seconds:
+        job.run_after = seconds_from_now(delay_seconds)
+    db.add(job)
+    return job
+
+
+def claim(db: Session, worker_id: str, kinds: list[str] | None = None, visibility_seconds: int = JOB_VISIBILITY_SECONDS,
+          on_dead=None) -> Job | None:
+    # take one due job, SKIP LOCKED lets concurrent workers claim different rows without waiting
+    # all times come from the database clock so workers on different machines agree
+    # on_dead(db, job) runs in the same transaction when a job is dead-lettered
+    while True:
+        query = (
+            db.query(Job)
+            .filter(
+                or_(
+                    and_(Job.status == "queued", Job.run_after <= func.now()),
+                    and_(Job.status == "running", Job.locked_until < func.now()), # worker died or hung
+                )
+            )
+        )
+        if kinds:
+            query = query.filter(Job.kind.in_(kinds))
+        job = query.order_by(Job.run_after, Job.id).with_for_update(skip_locked=True).first()
+        if not job:
+            db.rollback()
+            return None
+
+        if job.status == "running" and job.attempts >= job.max_attempts:
+            # the last allowed attempt never reported back
+            job.status = "dead"
+            job.locked_by = None
+            job.locked_until = None
+            job.last_error = job.last_error or "lease expired on final attempt"
+            if on_dead:
+                on_dead(db, job)
+            db.commit()
+            continue
+
+        job.status = "running"
+        job.attempts += 1
+        job.locked_by = worker_id
+        job.locked_until = seconds_from_now(visibility_seconds)
+        db.commit()
+        return job
+
+
+def _owned(job_id: int, worker_id: str, attempt: int):
+    # a worker only owns the job while its lease is the current one
+    return and_(
+        Job.id == job_id,
+        Job.status == "running",
+        Job.locked_by == worker_id,
+        Job.attempts == attempt,
+    )
+
+
+def complete(db: Session, job_id: int, worker_id: str, attempt: int) -> bool:
+    # marks the job done in the same transaction as the handler's writes, commits both together
+    result = db.execute(
+        update(Job)
+        .where(_owned(job_id, worker_id, attempt))
+        .values(status="done", locked_by=None, locked_until=None, last_error=None)
+    )
+    if result.rowcount != 1:
+        # lease expired and another worker took over, drop this attempt's writes
+        db.rollback()
+        return False
+    db.commit()
+    return True
+
+
+def backoff_seconds(attempt: int) -> float:
+    # exponential with jitter so retries from a failure burst spread out
+    delay = min(JOB_BACKOFF_MAX_SECONDS, JOB_BACKOFF_SECONDS * (2 ** (attempt - 1)))
+    return delay * random.uniform(0.8, 1.2)
+
+
+def fail(db: Session, job_id: int, worker_id: str, attempt: int, error: str, on_dead=None) -> str:
+    # schedules a retry or moves the job to the dead letter state, returns the new status
+    db.rollback() # discard whatever the handler wrote
+    job = db.query(Job).filter(_owned(job_id, worker_id, attempt)).with_for_update().first()
+    if not job:
+        db.rollback()
+        return "lost"
+
+    job.last_error = error[:4000]
+    job.locked_by = None
+    job.locked_until = None
+    if job.attempts >= job.max_attempts:
+        job.status = "dead"
+        if on_dead:
+            on_dead(db, job)
+    else:
+        job.status = "queued"
+        job.run_after = seconds_from_now(backoff_seconds(job.attempts))
+    db.commit()
+    return job.status
+
+
+def requeue_dead(db: Session, kinds: list[str] | None = None) -> int:
+    query = db.query(Job).filter(Job.status == "dead")
+    if kinds:
+        query = query.filter(Job.kind.in_(kinds))
+    count = query.update(
+        {Job.status: "queued", Job.attempts: 0, Job.run_after: func.now(), Job.last_error: None},
+        synchronize_session=False,
+    )
+    db.commit()
+    return count
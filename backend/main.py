@@ -1,34 +1,42 @@
 from fastapi.middleware.cors import CORSMiddleware
 
 from question_selector import selected_mixed_random_questions
-from models import Question
+from question_catalog import get_catalog, get_question_async
 from datetime import timedelta
 
-from fastapi import Depends, FastAPI, HTTPException, status, BackgroundTasks
+from fastapi import Depends, FastAPI, File, Form, HTTPException, Request, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 from fastapi.security import OAuth2PasswordRequestForm
 from pydantic import BaseModel, EmailStr
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from db import get_db
+from db import get_async_db, get_db
 from models import User
-from security import (
-    ACCESS_TOKEN_EXPIRE_MINUTES,
-    create_access_token,
-    get_password_hash,
-    verify_password,
-)
-from deps import get_current_user
+from security import ACCESS_TOKEN_EXPIRE_MINUTES, create_access_token
+from password_pool import PasswordPoolBusy, hash_password, throttle_wait, verify_password_pooled
+from deps import Principal, get_current_user, get_current_user_async, invalidate_principal, parse_session_id
 from models import Session as InterviewSession
+import asyncio
+import hashlib
+import math
 import random
 from models import Answer
-from datetime import datetime, timezone
 from fastapi.staticfiles import StaticFiles # allow browser to request mp3 files
-from tts import generate_tts_audio, generate_OPENAI_tts_audio
-from stt import router as stt_router
-from grading import grader
-from groq import generate_feedback, generate_overall_feedback
+from audio_prefetch import prefetch_audio, question_audio
+from stt import router as stt_router, transcribe_bytes
+from job_queue import enqueue
+from answers import record_answer, replayed_response
+from queries import answer_summary, history_page_async, session_answers_async, timeseries_query, topic_breakdown_query
+from events import broker, format_sse, grading_snapshot, start_listener
+import bulkheads
+import idempotency
+import metrics
+import summary_cache
+from bulkheads import BulkheadFull, admit_db, bulkhead_full
 from interview_transitions import build_intro, build_transitions, build_closing
-from sqlalchemy import func
 
 app = FastAPI()
 app.include_router(stt_router)
@@ -38,34 +46,66 @@ app.add_middleware( # cross origin resource sharing
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Idempotent-Replayed"],
 )
 # make files in static folder available at /static url
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
+@app.on_event("startup")
+async def start_event_listener():
+    bulkheads.configure_db_bulkhead()
+    start_listener() # grading events from worker processes
+
+# async so they never wait for a thread, whatever the bulkheads (bulkheads.py) are doing
 @app.get("/health") # uvicorn main:app --reload --port 8000
-def health(): # check if api is running
+async def health(): # check if api is running
     return {"status": "API running"}
 
-@app.get("/questions/count") #return number of questions in database
-def question_count(db: Session = Depends(get_db)):
-    return {"count": db.query(Question).count()}
+@app.get("/metrics", response_class=PlainTextResponse)
+async def read_metrics():
+    bulkheads.collect_db()
+    return metrics.render()
+
+@app.get("/questions/count", dependencies=[Depends(admit_db)]) #return number of questions in database
+def question_count():
+    return {"count": len(get_catalog())}
 
 class SignupRequirements(BaseModel):
     email: EmailStr
     password: str
 
 
-@app.post("/auth/signup")
-def signup(payload: SignupRequirements, db: Session = Depends(get_db)):
+def check_login_throttle(request: Request, account: str | None = None):
+    wait = throttle_wait(request.client.host if request.client else None, account)
+    if wait:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many attempts, try again later",
+            headers={"Retry-After": str(math.ceil(wait))},
+        )
+
+
+def password_pool_busy() -> HTTPException:
+    return HTTPException(status_code=503, detail="Server busy, try again shortly", headers={"Retry-After": "1"})
+
+
+@app.post("/auth/signup", dependencies=[Depends(admit_db)])
+def signup(payload: SignupRequirements, request: Request, db: Session = Depends(get_db)):
 
     if len(payload.password) < 4:
         raise HTTPException(status_code=400, detail="Password must be at least 4 characters")
 
+    check_login_throttle(request)
+
     if db.query(User).filter(User.email == payload.email).first(): #check if user already exists
         raise HTTPException(status_code=400, detail="Email already exists")
 
-    # create user
-    user = User(email=payload.email, password_hash=get_password_hash(payload.password))
+    # create user, bcrypt runs in the password pool (password_pool.py)
+    try:
+        password_hash = hash_password(payload.password)
+    except PasswordPoolBusy:
+        raise password_pool_busy()
+    user = User(email=payload.email, password_hash=password_hash)
     db.add(user)
     db.commit()
     db.refresh(user) # refresh object with database generated values (id)
@@ -80,20 +120,35 @@ def signup(payload: SignupRequirements, db: Session = Depends(get_db)):
     }
 
 
-@app.post("/token")
+@app.post("/token", dependencies=[Depends(admit_db)])
 def login_for_access_token(  #login OAuth2PasswordBearer
+    request: Request,
     form_data: OAuth2PasswordRequestForm = Depends(), # extract login for data
     db: Session = Depends(get_db),
 ):
+    # throttled per ip and per account before any bcrypt work
+    check_login_throttle(request, form_data.username)
+
     #find user by email
     user = db.query(User).filter(User.email == form_data.username).first()
 
-    if not user or not verify_password(form_data.password, user.password_hash):
+    verified, new_hash = False, None
+    if user:
+        try:
+            verified, new_hash = verify_password_pooled(form_data.password, user.password_hash)
+        except PasswordPoolBusy:
+            raise password_pool_busy()
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    if new_hash:
+        # stored with older cost parameters, upgraded now that the password is known
+        user.password_hash = new_hash
+        invalidate_principal(db, user.id)
+        db.commit()
 
     expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     token = create_access_token(sub=str(user.id), expires_delta=expires)
@@ -102,7 +157,7 @@ def login_for_access_token(  #login OAuth2PasswordBearer
 
 # gets jwt token from authorisation header and validates
 @app.get("/users/me") #protected endpoint needs token
-def read_users_me(current_user: User = Depends(get_current_user)):
+async def read_users_me(current_user: Principal = Depends(get_current_user_async)):
     return {"id": current_user.id, "email": current_user.email}
 
 class startInterviewRequirements(BaseModel):
@@ -110,26 +165,24 @@ class startInterviewRequirements(BaseModel):
     difficulty: str
     question_count: int
 
-@app.post("/interview/start")
+@app.post("/interview/start", dependencies=[Depends(admit_db)])
 def start_interview(
     payload: startInterviewRequirements,
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     if payload.question_count < 1 or payload.question_count > 10:
         raise HTTPException(status_code=400, detail="Question count must be between 1 and 10")
     
     if payload.topic == "Mixed":
-        selected_questions = selected_mixed_random_questions(db, payload.difficulty, payload.question_count)
+        try:
+            selected_questions = selected_mixed_random_questions(payload.difficulty, payload.question_count)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         question_ids = [question.id for question in selected_questions]
     else:
 
-        questions_filtered = (
-            db.query(Question)
-            .filter(Question.topic == payload.topic)
-            .filter(Question.difficulty == payload.difficulty)
-            .all()
-        )
+        questions_filtered = get_catalog().for_topic(payload.topic, payload.difficulty)
         if len(questions_filtered) < payload.question_count:
             raise HTTPException(
                 status_code=400,
@@ -166,317 +219,323 @@ def start_interview(
 
 class submitAnswerRequirements(BaseModel):
     transcript: str
+    index: int | None = None # question the client is answering, a stale one gets 409
+
+# the hot paths below (answer, current, summary, history, analytics) are async def on the
+# async engine (db.py), so a request waiting on postgres holds no threadpool thread.
+# sync helpers that use the orm session run through db.run_sync, tts on the provider_io bulkhead (audio_prefetch.py)
+
+def idempotency_key(request: Request) -> str | None:
+    # retries and double clicks: send the same Idempotency-Key and get the first response back,
+    # nothing is inserted or queued twice (idempotency.py)
+    key = request.headers.get("idempotency-key")
+    if key is not None and not 0 < len(key) <= idempotency.IDEMPOTENCY_KEY_MAX_LENGTH:
+        raise HTTPException(status_code=400, detail="Invalid Idempotency-Key")
+    return key
+
+
+async def after_answer(response: dict, interview_session: InterviewSession, include_next: bool) -> dict:
+    # audio for what the client plays next, after the commit so the session lock is never held
+    # while tts runs. the closing clip was prefetched with the last question, the next question's
+    # clip while this answer was being given, so the client needs no /current call
+    if response["completed"]:
+        if interview_session.closing_text:
+            response = {**response, "closing_audio_url": await question_audio(interview_session.closing_text)}
+    elif include_next:
+        response = {**response, "next": await question_payload(interview_session)}
+    return response
 
-def process_answer_async(session_id: str, answer_id: int, question_id: int, transcript: str):
-    from db import SessionLocal
-    db = SessionLocal()
-    try:
-        print(f"[GRADING] Starting grading for answer {answer_id}")
-        question = db.query(Question).filter(Question.id == question_id).first()
-        if not question:
-            print(f"Question {question_id} not found for answer {answer_id}")
-            return
-        
-        keywords = question.keywords or []
-        sim, keywords_hit = grader.grade(
-            answer=transcript,
-            reference=question.reference_answer,
-            question=question.text,
-            keywords=keywords,
-        )
-        score = int(round(sim * 100))
-        
-        print(f"[GRADING] Generating feedback for answer {answer_id}")
-        feedback = generate_feedback(
-            question_text=question.text,
-            reference_answer=question.reference_answer,
-            transcript=transcript,
-            score=score
-        )
-        
-        answer = db.query(Answer).filter(Answer.id == answer_id).first()
-        if answer:
-            answer.score = score
-            answer.feedback = feedback
-            answer.keywords_hit = keywords_hit
-            db.commit()
-            print(f"[GRADING] Completed answer {answer_id} with score {score}%")
-    except Exception as e:
-        print(f"[GRADING] Failed to process answer: {e}")
-        db.rollback()
-    finally:
-        db.close()
-
-def process_overall_feedback_async(session_id: str):
-    from db import SessionLocal
-    db = SessionLocal()
-    try:
-        print(f"[OVERALL] Starting overall feedback for session {session_id}")
-        interview_session = db.query(InterviewSession).filter(InterviewSession.id == session_id).first()
-        if not interview_session:
-            print(f"Session {session_id} not found for overall feedback")
-            return
-        answers = db.query(Answer).filter(Answer.session_id == session_id).all()
-        summary = []
-        for answer in answers:
-            question = db.query(Question).filter(Question.id == answer.question_id).first()
-            summary.append({
-                "question_id": question.id,
-                "topic": question.topic,
-                "question_text": question.text,
-                "reference_answer": question.reference_answer,
-                "transcript": answer.transcript,
-                "score": answer.score,
-                "feedback": answer.feedback,
-                "keywords_hit": answer.keywords_hit,
-            })
-        interview_session.overall_feedback = generate_overall_feedback(summary)
-        db.commit()
-        print(f"[OVERALL] Completed overall feedback for session {session_id}")
-    except Exception as e:
-        print(f"[OVERALL] Failed to generate overall feedback: {e}")
-        db.rollback()
-    finally:
-        db.close()
 
 @app.post("/interview/{session_id}/answer")
-def submit_answer(
+async def submit_answer(
     session_id: str,
     payload: submitAnswerRequirements,
-    background_tasks: BackgroundTasks,
-    user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    request: Request,
+    include_next: bool = True,
+    user: Principal = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    interview_session = (
-        db.query(InterviewSession)
-        .filter(InterviewSession.id == session_id)
-        .filter(InterviewSession.user_id == user.id)
-        .first()
+    key = idempotency_key(request)
+    request_fingerprint = idempotency.fingerprint({
+        "path": "answer", "session_id": session_id, "transcript": payload.transcript, "index": payload.index,
+    }) if key else None
+    response, interview_session = await record_answer(
+        db, user, session_id, payload.transcript, payload.index, key, request_fingerprint,
     )
-    if not interview_session:
-        raise HTTPException(status_code=404, detail="Interview session not found")
+    if isinstance(response, Response):
+        return response
+    return await after_answer(response, interview_session, include_next)
 
-    if interview_session.status != "in_progress":
-        raise HTTPException(status_code=400, detail="Interview session is not active")
 
-    if interview_session.current_index >= interview_session.question_count:
-        raise HTTPException(status_code=400, detail="All questions have been answered")
-
-    question_id = interview_session.question_ids[interview_session.current_index]
-    question = db.query(Question).filter(Question.id == question_id).first()
-    if not question:
-        raise HTTPException(status_code=404, detail="Question not found")
-
-    if not payload.transcript.strip():
-        raise HTTPException(status_code=400, detail="Transcript cannot be empty")
-
-    answer = Answer(
-        session_id=interview_session.id,
-        question_id=question_id,
-        transcript=payload.transcript,
-        score=0,
-        feedback="",
-        keywords_hit=[],
-    )
-    db.add(answer)
-    db.flush()
+@app.post("/interview/{session_id}/answer-audio")
+async def submit_answer_audio(
+    session_id: str,
+    request: Request,
+    file: UploadFile = File(...),
+    index: int | None = Form(None),
+    include_next: bool = True,
+    user: Principal = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
+):
+    # /stt/transcribe and /answer in one request: one auth, one session lookup, no round trip
+    key = idempotency_key(request)
+    audio = await file.read()
+    if not audio:
+        raise HTTPException(status_code=400, detail="No file uploaded")
+    request_fingerprint = idempotency.fingerprint({
+        "path": "answer-audio", "session_id": session_id, "audio": hashlib.sha256(audio).hexdigest(), "index": index,
+    }) if key else None
+
+    # a replay is answered before transcribing again, record_answer checks once more under the lock
+    replayed = await replayed_response(db, user.id, key, request_fingerprint)
+    if replayed is not None:
+        return replayed
+    # ends the transaction the replay check (or the auth lookup) started, so no web_async
+    # connection sits idle in transaction while whisper runs or waits on ml_cpu
+    await db.rollback()
 
-    background_tasks.add_task(process_answer_async, session_id, answer.id, question_id, payload.transcript)
+    try:
+        transcript = await transcribe_bytes(file.filename or "answer.webm", audio)
+    except BulkheadFull:
+        raise bulkhead_full()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Transcription failed: {str(e)}")
 
-    interview_session.current_index += 1
-    closing_audio_url = None
-    if interview_session.current_index >= interview_session.question_count:
-        interview_session.status = "completed"
-        interview_session.end_time = datetime.now(timezone.utc)
+    response, interview_session = await record_answer(
+        db, user, session_id, transcript, index, key, request_fingerprint, extra={"transcript": transcript},
+    )
+    if isinstance(response, Response):
+        return response
+    return await after_answer(response, interview_session, include_next)
 
-        if interview_session.closing_text:
-            closing_audio_url = generate_OPENAI_tts_audio(interview_session.closing_text)
 
-        background_tasks.add_task(process_overall_feedback_async, session_id)
+def history_item(r) -> dict:
+    return {
+        "id": str(r.id),
+        "topic": r.topic,
+        "difficulty": r.difficulty,
+        "status": r.status,
+        "start_time": r.start_time.isoformat() if r.start_time else None,
+        "end_time": r.end_time.isoformat() if r.end_time else None,
+        "question_count": r.question_count,
+        "answered_count": int(r.answered_count or 0),
+        "avg_score": int(round(float(r.avg_score or 0))),
+        "has_overall_feedback": bool(r.has_overall_feedback),
+    }
 
-    db.commit()
 
+def topic_item(r) -> dict:
     return {
-        "ok": True,
-        "completed": interview_session.status == "completed",
-        "closing_text": interview_session.closing_text if interview_session.status == "completed" else None,
-        "closing_audio_url": closing_audio_url,
+        "topic": r.topic,
+        "answers_count": int(r.answers_count),
+        "avg_score": int(round(float(r.avg_score or 0))),
     }
-@app.get("/interviews/history")
-def get_interview_history(
-    user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
-):
 
-    rows = (
-        db.query(
-            InterviewSession.id.label("id"),
-            InterviewSession.topic.label("topic"),
-            InterviewSession.difficulty.label("difficulty"),
-            InterviewSession.status.label("status"),
-            InterviewSession.start_time.label("start_time"),
-            InterviewSession.end_time.label("end_time"),
-            InterviewSession.question_count.label("question_count"),
-            func.coalesce(func.avg(Answer.score), 0).label("avg_score"),
-            func.count(Answer.id).label("answered_count"),
-            InterviewSession.overall_feedback.label("overall_feedback"),
-        )
-        .outerjoin(Answer, Answer.session_id == InterviewSession.id)
-        .filter(InterviewSession.user_id == user.id)
-        .filter(InterviewSession.status == "completed")
-        .group_by(InterviewSession.id)
-        .order_by(InterviewSession.start_time.desc())
-        .all()
-    )
 
+def timeseries_point(r) -> dict:
     return {
-        "sessions": [
-            {
-                "id": str(r.id),
-                "topic": r.topic,
-                "difficulty": r.difficulty,
-                "status": r.status,
-                "start_time": r.start_time.isoformat() if r.start_time else None,
-                "end_time": r.end_time.isoformat() if r.end_time else None,
-                "question_count": r.question_count,
-                "answered_count": int(r.answered_count or 0),
-                "avg_score": int(round(float(r.avg_score or 0))),
-                "has_overall_feedback": bool(r.overall_feedback),
-            }
-            for r in rows
-        ]
+        "id": str(r.id),
+        "ts": r.start_time.isoformat() if r.start_time else None,
+        "avg_score": int(round(float(r.avg_score or 0))),
+        "answered_count": int(r.answered_count or 0),
+        "topic": r.topic,
+        "difficulty": r.difficulty,
     }
 
+
+@app.get("/interviews/history")
+async def get_interview_history(
+    cursor: str | None = None,
+    limit: int | None = None,
+    user: Principal = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
+):
+    # newest first, pass next_cursor back for the following page
+    try:
+        rows, next_cursor = await history_page_async(db, user.id, cursor, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"sessions": [history_item(r) for r in rows], "next_cursor": next_cursor}
+
 @app.get("/analytics/topic-breakdown")
-def topic_breakdown(
-    user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+async def topic_breakdown(
+    user: Principal = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    rows = (
-        db.query(
-            Question.topic.label("topic"),
-            func.count(Answer.id).label("answers_count"),
-            func.coalesce(func.avg(Answer.score), 0).label("avg_score"),
-        )
-        .join(InterviewSession, InterviewSession.id == Answer.session_id)
-        .join(Question, Question.id == Answer.question_id)
-        .filter(InterviewSession.user_id == user.id)
-        .filter(InterviewSession.status == "completed")
-        .group_by(Question.topic)
-        .order_by(func.coalesce(func.avg(Answer.score), 0).desc())
-        .all()
-    )
+    rows = (await db.execute(topic_breakdown_query(user.id))).all()
+    return {"topics": [topic_item(r) for r in rows]}
 
-    return {
-        "topics": [
-            {
-                "topic": r.topic,
-                "answers_count": int(r.answers_count),
-                "avg_score": int(round(float(r.avg_score or 0))),
-            }
-            for r in rows
-        ]
-    }
 @app.get("/analytics/sessions-timeseries")
-def sessions_timeseries(
-    user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+async def sessions_timeseries(
+    user: Principal = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    rows = (
-        db.query(
-            InterviewSession.id.label("id"),
-            InterviewSession.start_time.label("start_time"),
-            InterviewSession.topic.label("topic"),
-            InterviewSession.difficulty.label("difficulty"),
-            func.coalesce(func.avg(Answer.score), 0).label("avg_score"),
-            func.count(Answer.id).label("answered_count"),
-        )
-        .outerjoin(Answer, Answer.session_id == InterviewSession.id)
-        .filter(InterviewSession.user_id == user.id)
-        .filter(InterviewSession.status == "completed")
-        .group_by(InterviewSession.id)
-        .order_by(InterviewSession.start_time.asc())
-        .all()
-    )
+    rows = (await db.execute(timeseries_query(user.id))).all()
+    return {"points": [timeseries_point(r) for r in rows]}
 
-    return {
-        "points": [
-            {
-                "id": str(r.id),
-                "ts": r.start_time.isoformat() if r.start_time else None,
-                "avg_score": int(round(float(r.avg_score or 0))),
-                "answered_count": int(r.answered_count or 0),
-                "topic": r.topic,
-                "difficulty": r.difficulty,
-            }
-            for r in rows
-        ]
+
+@app.get("/analytics/dashboard")
+async def analytics_dashboard(
+    request: Request,
+    user: Principal = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
+):
+    # history, topic breakdown and timeseries in one response. the etag is the user's
+    # analytics_version, bumped by every rollup change, so an unchanged dashboard costs no aggregation
+    version = (await db.execute(select(User.analytics_version).where(User.id == user.id))).scalar()
+    etag = f'"dashboard-{user.id}-{version}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers=headers)
+
+    # first history page only, the timeseries has every session but no text columns
+    rows, next_cursor = await history_page_async(db, user.id)
+    topics = (await db.execute(topic_breakdown_query(user.id))).all()
+    points = (await db.execute(timeseries_query(user.id))).all()
+    body = {
+        "sessions": [history_item(r) for r in rows],
+        "next_cursor": next_cursor,
+        "topics": [topic_item(r) for r in topics],
+        "points": [timeseries_point(r) for r in points],
     }
+    return JSONResponse(body, headers=headers)
 
 
 @app.get("/interview/{session_id}/summary")
-def get_interview_summary(
+async def get_interview_summary(
     session_id: str,
-    user: User = Depends(get_current_user),
+    request: Request,
+    user: Principal = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
+):
+    # finished summaries come from summary_cache.py without touching sessions or answers
+    session_uuid = parse_session_id(session_id)
+    cached = await db.run_sync(summary_cache.get, session_uuid, user.id)
+    if cached is None:
+        # shared lock until the response is cached, a regrade cannot commit in between
+        interview_session = (await db.execute(
+            select(InterviewSession)
+            .where(InterviewSession.id == session_uuid)
+            .where(InterviewSession.user_id == user.id)
+            .with_for_update(read=True)
+        )).scalars().first()
+        if not interview_session:
+            raise HTTPException(status_code=404, detail="Interview session not found")
+
+        if interview_session.status != "completed":
+            raise HTTPException(status_code=400, detail="Interview session is not completed")
+
+        answers = await session_answers_async(db, interview_session.id)
+        body = {
+            "session": {
+                "id": str(interview_session.id),
+                "topic": interview_session.topic,
+                "difficulty": interview_session.difficulty,
+                "status": interview_session.status,
+                "overall_feedback": interview_session.overall_feedback,
+                "overall_status": interview_session.overall_status,
+            },
+            "answers": [answer_summary(answer) for answer in answers],
+        }
+        if not summary_cache.is_final(interview_session, answers):
+            # still being graded, the client polls or listens on /events
+            return JSONResponse(body, headers={"Cache-Control": "private, no-cache"})
+        cached = await db.run_sync(summary_cache.put, session_uuid, user.id, body)
+
+    headers = {"ETag": cached.etag, "Cache-Control": summary_cache.CACHE_CONTROL}
+    if cached.etag in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers=headers)
+    return Response(cached.body, media_type="application/json", headers=headers)
+
+
+@app.post("/interview/{session_id}/regrade", dependencies=[Depends(admit_db)])
+def regrade_interview(
+    session_id: str,
+    user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
+    # grades every answer and the overall feedback again, the only way a finished summary changes
     interview_session = (
         db.query(InterviewSession)
-        .filter(InterviewSession.id == session_id)
+        .filter(InterviewSession.id == parse_session_id(session_id))
         .filter(InterviewSession.user_id == user.id)
+        .with_for_update()
         .first()
     )
     if not interview_session:
         raise HTTPException(status_code=404, detail="Interview session not found")
+    if interview_session.status != "completed" or interview_session.overall_status not in ("ready", "failed"):
+        raise HTTPException(status_code=409, detail="Interview session is still being graded")
 
-    if interview_session.status != "completed":
-        raise HTTPException(status_code=400, detail="Interview session is not completed")
-
-    answers = (
-        db.query(Answer)
-        .filter(Answer.session_id == interview_session.id)
-        .all()
-    )
-
-    summary = []
+    answers = db.query(Answer).filter(Answer.session_id == interview_session.id).all()
     for answer in answers:
-        question = db.query(Question).filter(Question.id == answer.question_id).first()
-        summary.append(
-            {
-                "question_id": question.id,
-                "topic": question.topic,
-                "question_text": question.text,
-                "reference_answer": question.reference_answer,
-                "transcript": answer.transcript,
-                "score": answer.score,
-                "feedback": answer.feedback,
-                "keywords_hit": answer.keywords_hit,
-            }
-        )
-
-    return {
-        "session": {
-            "id": str(interview_session.id),
-            "topic": interview_session.topic,
-            "difficulty": interview_session.difficulty,
-            "status": interview_session.status,
-            "overall_feedback": interview_session.overall_feedback,
-        },
-        "answers": summary,
-    }
+        answer.grading_status = "pending"
+        enqueue(db, "grade_answer", {"answer_id": answer.id})
+    # rebuilt by the worker once the last answer is graded again
+    interview_session.overall_status = "pending"
+    summary_cache.invalidate(db, interview_session.id)
+    db.commit()
+    return {"ok": True, "answers": len(answers)}
 
-@app.get("/interview/{session_id}/current")
-def get_current_question(
+@app.get("/interview/{session_id}/events")
+async def interview_events(
     session_id: str,
-    user: User = Depends(get_current_user),
+    request: Request,
+    user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    interview_session = (
-        db.query(InterviewSession)
-        .filter(InterviewSession.id == session_id)
-        .filter(InterviewSession.user_id == user.id)
-        .first()
+    # server sent events: "graded" per answer, then "overall_feedback_ready" (or "overall_feedback_failed")
+    session_uuid = parse_session_id(session_id)
+    session_id = str(session_uuid) # the key grading_tasks publishes under
+    queue = broker.subscribe(session_id) # before the snapshot so nothing falls in between
+    try:
+        snapshot = await run_in_threadpool(grading_snapshot, db, session_uuid, user.id)
+    except Exception:
+        broker.unsubscribe(session_id, queue)
+        raise
+    # give the connection back to the pool instead of holding it for the whole stream
+    await run_in_threadpool(db.close)
+    if snapshot is None:
+        broker.unsubscribe(session_id, queue)
+        raise HTTPException(status_code=404, detail="Interview session not found")
+
+    final_events = ("overall_feedback_ready", "overall_feedback_failed")
+
+    async def stream():
+        try:
+            for message in snapshot:
+                yield format_sse(message)
+                if message["type"] in final_events:
+                    return
+            while not await request.is_disconnected():
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield format_sse(message)
+                if message["type"] in final_events:
+                    return
+        finally:
+            broker.unsubscribe(session_id, queue)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
+
+@app.get("/interview/{session_id}/current")
+async def get_current_question(
+    session_id: str,
+    user: Principal = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
+):
+    interview_session = (await db.execute(
+        select(InterviewSession)
+        .where(InterviewSession.id == parse_session_id(session_id))
+        .where(InterviewSession.user_id == user.id)
+    )).scalars().first()
     if not interview_session:
         raise HTTPException(status_code=404, detail="Interview session not found")
 
@@ -486,32 +545,50 @@ def get_current_question(
     if interview_session.current_index >= interview_session.question_count:
         raise HTTPException(status_code=400, detail="All questions have been answered")
 
-    # get current question from json array
-    question_id = interview_session.question_ids[interview_session.current_index]
-    question = db.query(Question).filter(Question.id == question_id).first()
+    return await question_payload(interview_session)
+
 
+async def spoken_question(interview_session: InterviewSession, index: int):
+    # (question, text the interviewer says) for the question at index, (None, None) if it is gone
+    question_id = interview_session.question_ids[index]
+    question = await get_question_async(question_id)
     if not question:
-        raise HTTPException(status_code=500, detail="Question not found")
+        return None, None
 
-    #create mp3 file for question
-    #audio_url = generate_tts_audio(question.text)
     base_text = question.text
     pre = ""
 
-    if interview_session.current_index == 0 and interview_session.introduction_text:
+    if index == 0 and interview_session.introduction_text:
         pre = interview_session.introduction_text.strip()
-    elif interview_session.current_index > 0:
-        i = interview_session.current_index - 1
+    elif index > 0:
+        i = index - 1
         transitions = interview_session.transition_text or []
         if i < len(transitions):
             pre = str(transitions[i]).strip()
 
     full_text = f"{pre} {base_text}".strip() if pre else base_text
-    audio_url = generate_OPENAI_tts_audio(full_text)
+    return question, full_text
+
+
+async def question_payload(interview_session: InterviewSession) -> dict:
+    # the session's current question with its audio, for /current and the answer responses
+    index = interview_session.current_index
+    question, full_text = await spoken_question(interview_session, index)
+    if not question:
+        raise HTTPException(status_code=500, detail="Question not found")
+    audio_url = await question_audio(full_text)
+
+    # start on what comes after while the candidate answers this one
+    if index + 1 < interview_session.question_count:
+        _, next_text = await spoken_question(interview_session, index + 1)
+        if next_text:
+            prefetch_audio(next_text)
+    elif interview_session.closing_text:
+        prefetch_audio(interview_session.closing_text)
 
     return {
         "done": False,
-        "index": interview_session.current_index,
+        "index": index,
         "total": interview_session.question_count,
         "question": {
             "id": question.id,
@@ -520,4 +597,4 @@ def get_current_question(
             "text": question.text,
             "audio_url": audio_url,
         },
-    }
\ No newline at end of file
+    }
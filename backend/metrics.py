@@ -0,0 +1,84 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# minimal metrics registry rendered in the prometheus text format at /metrics
+# (and by worker.py --metrics-port), no client library needed
+_lock = threading.Lock()
+_gauges = {} # (name, labels) -> value
+_counters = {}
+_help = {}
+_collectors = [] # called before rendering to refresh gauges that are read on demand
+
+
+def _key(name: str, labels: dict):
+    return name, tuple(sorted(labels.items()))
+
+
+def describe(name: str, text: str):
+    _help[name] = text
+
+
+def set_gauge(name: str, value: float, **labels):
+    with _lock:
+        _gauges[_key(name, labels)] = float(value)
+
+
+def inc(name: str, amount: float = 1.0, **labels):
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0.0) + amount
+
+
+def register_collector(fn):
+    _collectors.append(fn)
+    return fn
+
+
+def _format(name: str, labels: tuple, value: float) -> str:
+    if labels:
+        inner = ",".join(f'{k}="{v}"' for k, v in labels)
+        return f"{name}{{{inner}}} {value}"
+    return f"{name} {value}"
+
+
+def render() -> str:
+    for collector in _collectors:
+        try:
+            collector()
+        except Exception as e:
+            print(f"[METRICS] Collector failed: {e}")
+
+    with _lock:
+        series = [(name, labels, value, "counter") for (name, labels), value in _counters.items()]
+        series += [(name, labels, value, "gauge") for (name, labels), value in _gauges.items()]
+
+    lines = []
+    seen = set()
+    for name, labels, value, kind in sorted(series):
+        if name not in seen:
+            seen.add(name)
+            if name in _help:
+                lines.append(f"# HELP {name} {_help[name]}")
+            lines.append(f"# TYPE {name} {kind}")
+        lines.append(_format(name, labels, value))
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve_metrics(port: int):
+    # for processes without the fastapi app (worker.py)
+    server = ThreadingHTTPServer(("0.0.0.0", port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    print(f"[METRICS] Serving on :{port}")
@@ -0,0 +1,154 @@
+"""baseline schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+
+The schema as migrate.py left it. Databases created before alembic already have
+some of these tables, for them only the missing tables and migrate.py steps are applied.
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+# the steps from the old migrate.py, kept for databases that stopped part way
+LEGACY_STEPS = [
+    ("0001_answer_llm_score", [
+        "ALTER TABLE answers ADD COLUMN IF NOT EXISTS llm_score INTEGER",
+        "ALTER TABLE answers ADD COLUMN IF NOT EXISTS llm_score_source VARCHAR(10)",
+    ]),
+    ("0002_grading_status", [
+        "ALTER TABLE answers ADD COLUMN IF NOT EXISTS grading_status VARCHAR(20) NOT NULL DEFAULT 'pending'",
+        "UPDATE answers SET grading_status = 'graded' WHERE feedback <> ''",
+        "ALTER TABLE sessions ADD COLUMN IF NOT EXISTS overall_status VARCHAR(20) NOT NULL DEFAULT 'pending'",
+        "UPDATE sessions SET overall_status = 'ready' WHERE overall_feedback IS NOT NULL",
+    ]),
+    ("0003_provisional_scores", [
+        "ALTER TABLE answers ADD COLUMN IF NOT EXISTS provisional BOOLEAN NOT NULL DEFAULT false",
+    ]),
+]
+
+
+def upgrade():
+    if not op.get_context().as_sql: # --sql output assumes an empty database
+        bind = op.get_bind()
+        tables = set(sa.inspect(bind).get_table_names())
+        if "users" in tables:
+            _upgrade_legacy(bind, tables)
+            return
+
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("email", sa.String(255), nullable=False, unique=True),
+        sa.Column("password_hash", sa.String(255), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_table(
+        "questions",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("topic", sa.String(50), nullable=False),
+        sa.Column("difficulty", sa.String(20), nullable=False),
+        sa.Column("text", sa.Text, nullable=False),
+        sa.Column("reference_answer", sa.Text, nullable=False),
+        sa.Column("keywords", sa.JSON, nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    _create_reference_answers()
+    op.create_table(
+        "sessions",
+        sa.Column("id", UUID(as_uuid=True), primary_key=True),
+        sa.Column("user_id", sa.Integer, sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("topic", sa.String(50), nullable=False),
+        sa.Column("difficulty", sa.String(20), nullable=False),
+        sa.Column("question_count", sa.Integer, nullable=False),
+        sa.Column("status", sa.String(20), nullable=False),
+        sa.Column("start_time", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("end_time", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("question_ids", sa.JSON, nullable=False),
+        sa.Column("current_index", sa.Integer, nullable=False),
+        sa.Column("overall_feedback", sa.Text, nullable=True),
+        sa.Column("introduction_text", sa.Text, nullable=True),
+        sa.Column("transition_text", sa.JSON, nullable=False),
+        sa.Column("closing_text", sa.Text, nullable=True),
+        sa.Column("overall_status", sa.String(20), nullable=False, server_default="pending"),
+    )
+    op.create_table(
+        "answers",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("session_id", UUID(as_uuid=True), sa.ForeignKey("sessions.id"), nullable=False),
+        sa.Column("question_id", sa.Integer, sa.ForeignKey("questions.id"), nullable=False),
+        sa.Column("transcript", sa.Text, nullable=False),
+        sa.Column("score", sa.Integer, nullable=False),
+        sa.Column("feedback", sa.Text, nullable=False),
+        sa.Column("keywords_hit", sa.JSON, nullable=False),
+        sa.Column("grading_status", sa.String(20), nullable=False, server_default="pending"),
+        sa.Column("provisional", sa.Boolean, nullable=False, server_default=sa.false()),
+        sa.Column("llm_score", sa.Integer, nullable=True),
+        sa.Column("llm_score_source", sa.String(10), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    _create_jobs()
+
+
+def _create_reference_answers():
+    op.create_table(
+        "reference_answers",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("question_id", sa.Integer, sa.ForeignKey("questions.id"), nullable=False),
+        sa.Column("text", sa.Text, nullable=False),
+        sa.Column("embedding", sa.JSON, nullable=True),
+        sa.Column("embedding_model", sa.String(100), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+
+
+def _create_jobs():
+    op.create_table(
+        "jobs",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("kind", sa.String(50), nullable=False),
+        sa.Column("payload", sa.JSON, nullable=False),
+        sa.Column("status", sa.String(20), nullable=False),
+        sa.Column("attempts", sa.Integer, nullable=False),
+        sa.Column("max_attempts", sa.Integer, nullable=False),
+        sa.Column("run_after", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.Column("locked_by", sa.String(200), nullable=True),
+        sa.Column("locked_until", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("last_error", sa.Text, nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_jobs_status_run_after", "jobs", ["status", "run_after"])
+
+
+def _upgrade_legacy(bind, tables):
+    # create_all used to add new tables, migrate.py new columns. a database from before
+    # either of them has only users, questions, sessions and answers
+    if "reference_answers" not in tables:
+        _create_reference_answers()
+        print("Created reference_answers")
+    if "jobs" not in tables:
+        _create_jobs()
+        print("Created jobs")
+    applied = set()
+    if "schema_migrations" in tables:
+        applied = {row[0] for row in bind.execute(sa.text("SELECT name FROM schema_migrations"))}
+    for name, statements in LEGACY_STEPS:
+        if name in applied:
+            continue
+        for statement in statements:
+            op.execute(statement)
+        print(f"Applied {name}")
+    if "schema_migrations" in tables:
+        op.drop_table("schema_migrations")
+
+
+def downgrade():
+    for table in ("jobs", "answers", "sessions", "reference_answers", "questions", "users"):
+        op.drop_table(table)
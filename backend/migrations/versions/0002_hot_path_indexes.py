@@ -0,0 +1,36 @@
+"""indexes for the hot query paths
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+
+Built CONCURRENTLY so a live database keeps taking writes, see bench_hot_paths.py
+for the plans and latencies before and after.
+"""
+from alembic import op
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("ix_sessions_user_status_start", "sessions", ["user_id", "status", "start_time"]),
+    ("ix_answers_session_id", "answers", ["session_id"]),
+    ("ix_answers_question_id", "answers", ["question_id"]),
+    ("ix_questions_topic_difficulty", "questions", ["topic", "difficulty"]),
+    ("ix_questions_difficulty", "questions", ["difficulty"]),
+    ("ix_reference_answers_question_id", "reference_answers", ["question_id"]),
+]
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, if_not_exists=True, postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _ in INDEXES:
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
@@ -0,0 +1,44 @@
+"""question bank version for the in-process question catalog
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+
+Any write to questions bumps the single version row, question_catalog.py reloads when it moves.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "question_bank_version",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("version", sa.Integer, nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.execute("INSERT INTO question_bank_version (id, version) VALUES (1, 1)")
+    op.execute("""
+        CREATE FUNCTION bump_question_bank_version() RETURNS trigger AS $$
+        BEGIN
+            UPDATE question_bank_version SET version = version + 1, updated_at = now() WHERE id = 1;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER questions_bump_version
+        AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON questions
+        FOR EACH STATEMENT EXECUTE FUNCTION bump_question_bank_version()
+    """)
+
+
+def downgrade():
+    op.execute("DROP TRIGGER IF EXISTS questions_bump_version ON questions")
+    op.execute("DROP FUNCTION IF EXISTS bump_question_bank_version()")
+    op.drop_table("question_bank_version")
@@ -0,0 +1,35 @@
+"""per user analytics rollups
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19
+
+Filled for existing data by python backfill_rollups.py.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("sessions", sa.Column("graded_count", sa.Integer, nullable=False, server_default="0"))
+    op.add_column("sessions", sa.Column("score_sum", sa.Integer, nullable=False, server_default="0"))
+    op.add_column("answers", sa.Column("counted_score", sa.Integer, nullable=True))
+    op.create_table(
+        "user_topic_stats",
+        sa.Column("user_id", sa.Integer, sa.ForeignKey("users.id"), primary_key=True),
+        sa.Column("topic", sa.String(50), primary_key=True),
+        sa.Column("answers_count", sa.Integer, nullable=False, server_default="0"),
+        sa.Column("score_sum", sa.Integer, nullable=False, server_default="0"),
+    )
+
+
+def downgrade():
+    op.drop_table("user_topic_stats")
+    op.drop_column("answers", "counted_score")
+    op.drop_column("sessions", "score_sum")
+    op.drop_column("sessions", "graded_count")
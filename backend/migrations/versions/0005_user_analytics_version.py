@@ -0,0 +1,21 @@
+"""users.analytics_version for the dashboard etag
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("users", sa.Column("analytics_version", sa.Integer, nullable=False, server_default="0"))
+
+
+def downgrade():
+    op.drop_column("users", "analytics_version")
@@ -0,0 +1,28 @@
+"""add id to the sessions history index for the keyset cursor
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19
+"""
+from alembic import op
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        op.create_index("ix_sessions_user_status_start_id", "sessions", ["user_id", "status", "start_time", "id"],
+                        if_not_exists=True, postgresql_concurrently=True)
+        op.drop_index("ix_sessions_user_status_start", table_name="sessions", if_exists=True,
+                      postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.create_index("ix_sessions_user_status_start", "sessions", ["user_id", "status", "start_time"],
+                        if_not_exists=True, postgresql_concurrently=True)
+        op.drop_index("ix_sessions_user_status_start_id", table_name="sessions", if_exists=True,
+                      postgresql_concurrently=True)
@@ -0,0 +1,41 @@
+"""answer positions and idempotency keys for answer submission
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("answers", sa.Column("position", sa.Integer, nullable=True))
+    # existing answers are numbered in insert order, so earlier double submits keep distinct positions
+    op.execute(
+        "UPDATE answers SET position = numbered.position FROM ("
+        "SELECT id, row_number() OVER (PARTITION BY session_id ORDER BY id) - 1 AS position FROM answers"
+        ") numbered WHERE answers.id = numbered.id"
+    )
+    op.alter_column("answers", "position", nullable=False)
+    op.create_unique_constraint("uq_answers_session_position", "answers", ["session_id", "position"])
+    op.create_table(
+        "idempotency_keys",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("user_id", sa.Integer, sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("key", sa.String(255), nullable=False),
+        sa.Column("fingerprint", sa.String(64), nullable=False),
+        sa.Column("response", sa.JSON, nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.UniqueConstraint("user_id", "key", name="uq_idempotency_keys_user_key"),
+    )
+
+
+def downgrade():
+    op.drop_table("idempotency_keys")
+    op.drop_constraint("uq_answers_session_position", "answers", type_="unique")
+    op.drop_column("answers", "position")
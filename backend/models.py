@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, ForeignKey
+from sqlalchemy import Boolean, Column, Integer, String, Text, DateTime, JSON, ForeignKey, Index, UniqueConstraint
+from sqlalchemy.orm import relationship, validates
 from sqlalchemy.sql import func
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
@@ -12,11 +13,16 @@ class User(Base):
     id = Column(Integer, primary_key=True)
     email = Column(String(255), unique=True, nullable=False)
     password_hash = Column(String(255), nullable=False)
+    analytics_version = Column(Integer, nullable=False, default=0) # bumped whenever the dashboard data changes, etag
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
 
 class Question(Base):
     __tablename__ = "questions"
+    __table_args__ = (
+        Index("ix_questions_topic_difficulty", "topic", "difficulty"), # question selection
+        Index("ix_questions_difficulty", "difficulty"), # mixed topic selection
+    )
 
     id = Column(Integer, primary_key=True)
     topic = Column(String(50), nullable=False)
@@ -26,9 +32,47 @@ class Question(Base):
     keywords = Column(JSON, nullable=False, default=list)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    answers = relationship("Answer", back_populates="question")
+
+
+class QuestionBankVersion(Base):
+    # single row (id 1), bumped by a trigger on every write to questions, see question_catalog.py
+    __tablename__ = "question_bank_version"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=1)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class ReferenceAnswer(Base):
+    __tablename__ = "reference_answers"
+    __table_args__ = (
+        Index("ix_reference_answers_question_id", "question_id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    question_id = Column(Integer, ForeignKey("questions.id"), nullable=False)
+    text = Column(Text, nullable=False)
+    embedding = Column(JSON, nullable=True) # unit length sbert vector, filled by seed.py
+    embedding_model = Column(String(100), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    @validates("text")
+    def _clear_stale_embedding(self, key, text):
+        # an edited reference is re-encoded by load_reference_matrix or seed.py
+        if self.text is not None and text != self.text:
+            self.embedding = None
+            self.embedding_model = None
+        return text
+
 
 class Session(Base):
     __tablename__ = "sessions"
+    __table_args__ = (
+        # history and analytics filter on (user_id, status) ordered by (start_time, id), the history
+        # keyset cursor, lookups by (id, user_id) go through the primary key
+        Index("ix_sessions_user_status_start_id", "user_id", "status", "start_time", "id"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -44,17 +88,92 @@ class Session(Base):
     introduction_text = Column(Text, nullable=True)
     transition_text = Column(JSON, nullable=False, default=list)
     closing_text = Column(Text, nullable=True)
+    overall_status = Column(String(20), nullable=False, default="pending") # pending, queued, ready, failed
+    graded_count = Column(Integer, nullable=False, default=0) # rollups kept by rollups.py
+    score_sum = Column(Integer, nullable=False, default=0)
+
+    answers = relationship("Answer", back_populates="session", order_by="Answer.id")
 
 
 class Answer(Base):
     __tablename__ = "answers"
+    __table_args__ = (
+        Index("ix_answers_session_id", "session_id"), # summary, history and analytics joins
+        Index("ix_answers_question_id", "question_id"),
+        # one answer per question slot, a duplicate submit fails instead of skipping a question
+        UniqueConstraint("session_id", "position", name="uq_answers_session_position"),
+    )
 
     id = Column(Integer, primary_key=True)
     session_id = Column(UUID(as_uuid=True), ForeignKey("sessions.id"), nullable=False)
     question_id = Column(Integer, ForeignKey("questions.id"), nullable=False)
+    position = Column(Integer, nullable=False) # index into the session's question_ids
     transcript = Column(Text, nullable=False)
     score = Column(Integer, nullable=False)
     feedback = Column(Text, nullable=False)
     keywords_hit= Column(JSON, nullable=False, default=list)
+    grading_status = Column(String(20), nullable=False, default="pending") # pending, graded, failed
+    provisional = Column(Boolean, nullable=False, default=False) # graded without the llm, regraded later
+    llm_score = Column(Integer, nullable=True) # rubric component, training data for score_model
+    llm_score_source = Column(String(10), nullable=True) # "llm" or "local"
+    counted_score = Column(Integer, nullable=True) # score currently included in the rollups, None until graded
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    session = relationship("Session", back_populates="answers")
+    question = relationship("Question", back_populates="answers")
+
+
+class SessionSummary(Base):
+    # serialised summary of a finished session, the shared tier of summary_cache.py
+    __tablename__ = "session_summaries"
+
+    session_id = Column(UUID(as_uuid=True), ForeignKey("sessions.id"), primary_key=True)
+    user_id = Column(Integer, nullable=False)
+    etag = Column(String(100), nullable=False)
+    body = Column(Text, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class IdempotencyKey(Base):
+    # response of a request sent with an Idempotency-Key header, replayed on retries, see idempotency.py
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        UniqueConstraint("user_id", "key", name="uq_idempotency_keys_user_key"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    key = Column(String(255), nullable=False)
+    fingerprint = Column(String(64), nullable=False) # sha256 of the request it answered
+    response = Column(JSON, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+
+class UserTopicStats(Base):
+    # graded answers of completed sessions per user and question topic, kept by rollups.py
+    __tablename__ = "user_topic_stats"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    topic = Column(String(50), primary_key=True)
+    answers_count = Column(Integer, nullable=False, default=0)
+    score_sum = Column(Integer, nullable=False, default=0)
+
+
+class Job(Base):
+    __tablename__ = "jobs"
+    __table_args__ = (
+        Index("ix_jobs_status_run_after", "status", "run_after"), # workers poll on this
+    )
+
+    id = Column(Integer, primary_key=True)
+    kind = Column(String(50), nullable=False) # handler name, see worker.py
+    payload = Column(JSON, nullable=False, default=dict)
+    status = Column(String(20), nullable=False, default="queued") # queued, running, done, dead
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    run_after = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    locked_by = Column(String(200), nullable=True)
+    locked_until = Column(DateTime(timezone=True), nullable=True) # lease, expired leases are picked up again
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,112 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+import metrics
+from governor import take
+from security import get_password_hash, verify_and_update_password
+
+# bcrypt runs in a small process pool of its own so a login burst cannot take the cpu and
+# the request threadpool away from interview endpoints. at most PASSWORD_HASH_QUEUE hashes
+# are running or waiting, beyond that callers get PasswordPoolBusy (503) straight away.
+# attempts are throttled per ip and per account before any hash is computed
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+PASSWORD_HASH_QUEUE = int(os.getenv("PASSWORD_HASH_QUEUE", "16"))
+PASSWORD_HASH_TIMEOUT_SECONDS = float(os.getenv("PASSWORD_HASH_TIMEOUT_SECONDS", "10"))
+LOGIN_IP_BURST = int(os.getenv("LOGIN_IP_BURST", "20"))
+LOGIN_IP_PER_MINUTE = float(os.getenv("LOGIN_IP_PER_MINUTE", "10"))
+LOGIN_ACCOUNT_BURST = int(os.getenv("LOGIN_ACCOUNT_BURST", "5"))
+LOGIN_ACCOUNT_PER_MINUTE = float(os.getenv("LOGIN_ACCOUNT_PER_MINUTE", "3"))
+
+metrics.describe("password_hash_in_flight", "password hashes running or queued")
+metrics.describe("password_hash_rejected_total", "password hashes refused, by reason")
+
+
+class PasswordPoolBusy(Exception):
+    pass
+
+
+_slots = threading.BoundedSemaphore(PASSWORD_HASH_QUEUE)
+_in_flight = 0
+_in_flight_lock = threading.Lock()
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _pool() -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # spawn, forking a process that already runs threads is not safe
+            _executor = ProcessPoolExecutor(PASSWORD_HASH_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _executor
+
+
+def _reset_pool():
+    global _executor
+    with _executor_lock:
+        _executor = None
+
+
+def _adjust_in_flight(delta: int):
+    global _in_flight
+    with _in_flight_lock:
+        _in_flight += delta
+
+
+def _finished(future):
+    _adjust_in_flight(-1)
+    _slots.release()
+
+
+def _run(fn, *args):
+    if not _slots.acquire(blocking=False):
+        metrics.inc("password_hash_rejected_total", reason="queue_full")
+        raise PasswordPoolBusy("too many password checks in progress")
+    _adjust_in_flight(1)
+    try:
+        future = _pool().submit(fn, *args)
+    except Exception:
+        _finished(None)
+        raise
+    # the slot is held until the hash really finishes, even if this caller stops waiting
+    future.add_done_callback(_finished)
+    try:
+        return future.result(timeout=PASSWORD_HASH_TIMEOUT_SECONDS)
+    except TimeoutError:
+        metrics.inc("password_hash_rejected_total", reason="timeout")
+        raise PasswordPoolBusy("password check timed out")
+    except BrokenProcessPool:
+        _reset_pool()
+        raise PasswordPoolBusy("password hashing pool restarted")
+
+
+def hash_password(password: str) -> str:
+    return _run(get_password_hash, password)
+
+
+def verify_password_pooled(password: str, hashed: str) -> tuple[bool, str | None]:
+    # (matches, replacement hash when BCRYPT_ROUNDS changed)
+    return _run(verify_and_update_password, password, hashed)
+
+
+def throttle_wait(ip: str | None, account: str | None = None) -> float:
+    # seconds until another attempt is allowed, 0 means go ahead (the attempt is counted)
+    buckets = []
+    if ip:
+        buckets.append((f"login:ip:{ip}", LOGIN_IP_BURST, LOGIN_IP_PER_MINUTE / 60.0, 1))
+    if account:
+        buckets.append((f"login:account:{account.lower()}", LOGIN_ACCOUNT_BURST, LOGIN_ACCOUNT_PER_MINUTE / 60.0, 1))
+    if not buckets:
+        return 0.0
+    wait = take(buckets)
+    if wait:
+        metrics.inc("password_hash_rejected_total", reason="throttled")
+    return wait
+
+
+@metrics.register_collector
+def _collect():
+    metrics.set_gauge("password_hash_in_flight", _in_flight)
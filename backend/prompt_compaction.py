@@ -0,0 +1,109 @@
+import json
+import os
+
+# shrinks the per-answer session data sent to generate_overall_feedback so the prompt
+# stays under a fixed token budget no matter how many questions or how long the answers
+OVERALL_FEEDBACK_TOKEN_BUDGET = int(os.getenv("OVERALL_FEEDBACK_TOKEN_BUDGET", "1500"))
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("o200k_base")
+except Exception: # tiktoken missing or its encoding file cannot be downloaded
+    _encoding = None
+
+CHARS_PER_TOKEN = 4 # used when tiktoken is not installed
+TRANSCRIPT_CAPS = [160, 80, 40, 20, 0] # tokens per transcript, tried in order
+QUESTION_CAP = 40
+
+
+def count_tokens(text: str) -> int:
+    if _encoding:
+        return len(_encoding.encode(text))
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def trim_to_tokens(text: str, max_tokens: int) -> str:
+    text = " ".join(text.split())
+    if max_tokens <= 0:
+        return ""
+    if _encoding:
+        tokens = _encoding.encode(text)
+        if len(tokens) <= max_tokens:
+            return text
+        return _encoding.decode(tokens[:max_tokens]).rstrip() + " ..."
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    return text[:max_chars].rsplit(" ", 1)[0] + " ..."
+
+
+def to_prompt_json(data) -> str:
+    # no indentation or spaces, they are tokens too
+    return json.dumps(data, ensure_ascii=True, separators=(",", ":"))
+
+
+def _needs_work(feedback: str) -> str:
+    # the per answer feedback follows a fixed format, the "Needs work" part is what the summary builds on
+    lines = [line.strip() for line in (feedback or "").splitlines() if line.strip()]
+    if "Needs work:" in lines:
+        start = lines.index("Needs work:") + 1
+        bullets = [line.lstrip("- ") for line in lines[start:] if line.startswith("-")]
+        if bullets:
+            return "; ".join(bullets)
+    return " ".join(lines)
+
+
+def topic_aggregates(summary: list) -> list:
+    topics = {}
+    for item in summary:
+        entry = topics.setdefault(item["topic"], {"topic": item["topic"], "answers": 0, "score_sum": 0})
+        entry["answers"] += 1
+        entry["score_sum"] += item["score"]
+    return [
+        {"topic": t["topic"], "answers": t["answers"], "avg_score": round(t["score_sum"] / t["answers"])}
+        for t in topics.values()
+    ]
+
+
+def compact_overall_summary(summary: list, budget: int = OVERALL_FEEDBACK_TOKEN_BUDGET) -> dict:
+    # summary items are the dicts build_overall_feedback collects per answer.
+    # reference answers and ids are dropped, they do not help a session level summary
+    scores = [item["score"] for item in summary]
+    header = {
+        "answers": len(summary),
+        "avg_score": round(sum(scores) / len(scores)) if scores else 0,
+        "topics": topic_aggregates(summary),
+    }
+
+    # progressively cheaper representations until the payload fits
+    levels = []
+    for cap in TRANSCRIPT_CAPS:
+        levels.append({"transcript": cap, "feedback": "full", "keywords": True})
+    levels.append({"transcript": 0, "feedback": "needs_work", "keywords": False})
+
+    payload = None
+    for level in levels:
+        answers = []
+        for item in summary:
+            entry = {
+                "topic": item["topic"],
+                "question": trim_to_tokens(item["question_text"], QUESTION_CAP),
+                "score": item["score"],
+            }
+            if level["transcript"]:
+                entry["answer"] = trim_to_tokens(item["transcript"], level["transcript"])
+            if level["feedback"] == "full":
+                entry["feedback"] = " ".join((item["feedback"] or "").split())
+            else:
+                entry["needs_work"] = _needs_work(item["feedback"])
+            if level["keywords"] and item.get("keywords_hit"):
+                entry["keywords_hit"] = item["keywords_hit"]
+            answers.append(entry)
+        payload = {**header, "per_answer": answers}
+        if count_tokens(to_prompt_json(payload)) <= budget:
+            return payload
+
+    # still too big (very many answers), keep the aggregates and as many answers as fit
+    while payload["per_answer"] and count_tokens(to_prompt_json(payload)) > budget:
+        payload["per_answer"].pop()
+    return payload
@@ -0,0 +1,155 @@
+import base64
+import os
+import uuid
+from datetime import datetime
+
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload
+
+from models import Answer, UserTopicStats
+from models import Session as InterviewSession
+
+# queries shared by the api, the grading worker and bench_hot_paths.py
+# the builders return an unexecuted select(), so the same statement runs on a sync Session
+# (db.execute) or an AsyncSession (await db.execute) and the benchmark can EXPLAIN it
+
+
+def session_answers_query(session_id, grading_status: str | None = None):
+    # answers with their questions joined in, one SELECT however many questions the session has
+    query = (
+        select(Answer)
+        .options(joinedload(Answer.question))
+        .where(Answer.session_id == session_id)
+    )
+    if grading_status:
+        query = query.where(Answer.grading_status == grading_status)
+    return query.order_by(Answer.id)
+
+
+def session_answers(db: Session, session_id, grading_status: str | None = None) -> list[Answer]:
+    return list(db.execute(session_answers_query(session_id, grading_status)).scalars())
+
+
+async def session_answers_async(db: AsyncSession, session_id, grading_status: str | None = None) -> list[Answer]:
+    return list((await db.execute(session_answers_query(session_id, grading_status))).scalars())
+
+
+def answer_summary(answer: Answer) -> dict:
+    question = answer.question
+    return {
+        "question_id": question.id,
+        "topic": question.topic,
+        "question_text": question.text,
+        "reference_answer": question.reference_answer,
+        "transcript": answer.transcript,
+        "score": answer.score,
+        "feedback": answer.feedback,
+        "keywords_hit": answer.keywords_hit,
+        "grading_status": answer.grading_status,
+        "provisional": answer.provisional,
+    }
+
+
+def _average(total, count):
+    return func.coalesce(total * 1.0 / func.nullif(count, 0), 0)
+
+
+# history and analytics read the rollups kept by rollups.py, no per answer aggregation.
+# history is paged with a keyset cursor on (start_time, id), newest first
+HISTORY_PAGE_SIZE = int(os.getenv("HISTORY_PAGE_SIZE", "20"))
+HISTORY_MAX_PAGE_SIZE = int(os.getenv("HISTORY_MAX_PAGE_SIZE", "100"))
+
+
+def encode_history_cursor(row) -> str:
+    raw = f"{row.start_time.isoformat()}|{row.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_history_cursor(cursor: str) -> tuple:
+    # ValueError on anything that is not a cursor from encode_history_cursor
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        start_time, session_id = raw.split("|")
+        return datetime.fromisoformat(start_time), uuid.UUID(session_id)
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def history_query(user_id: int, cursor: str | None = None, limit: int | None = None):
+    query = (
+        select(
+            InterviewSession.id.label("id"),
+            InterviewSession.topic.label("topic"),
+            InterviewSession.difficulty.label("difficulty"),
+            InterviewSession.status.label("status"),
+            InterviewSession.start_time.label("start_time"),
+            InterviewSession.end_time.label("end_time"),
+            InterviewSession.question_count.label("question_count"),
+            _average(InterviewSession.score_sum, InterviewSession.graded_count).label("avg_score"),
+            InterviewSession.current_index.label("answered_count"),
+            # the feedback text itself is never read here
+            func.coalesce(InterviewSession.overall_feedback != "", False).label("has_overall_feedback"),
+        )
+        .where(InterviewSession.user_id == user_id)
+        .where(InterviewSession.status == "completed")
+    )
+    if cursor:
+        query = query.where(tuple_(InterviewSession.start_time, InterviewSession.id) < tuple_(*decode_history_cursor(cursor)))
+    query = query.order_by(InterviewSession.start_time.desc(), InterviewSession.id.desc())
+    if limit:
+        query = query.limit(limit)
+    return query
+
+
+def _page_limit(limit: int | None) -> int:
+    return max(1, min(limit or HISTORY_PAGE_SIZE, HISTORY_MAX_PAGE_SIZE))
+
+
+def _history_page(rows: list, limit: int) -> tuple:
+    # one row more than the page is fetched to know whether another page follows
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_history_cursor(rows[-1])
+
+
+def history_page(db: Session, user_id: int, cursor: str | None = None, limit: int | None = None) -> tuple:
+    # (rows, cursor for the next page or None)
+    limit = _page_limit(limit)
+    return _history_page(db.execute(history_query(user_id, cursor, limit + 1)).all(), limit)
+
+
+async def history_page_async(db: AsyncSession, user_id: int, cursor: str | None = None, limit: int | None = None) -> tuple:
+    limit = _page_limit(limit)
+    return _history_page((await db.execute(history_query(user_id, cursor, limit + 1))).all(), limit)
+
+
+def topic_breakdown_query(user_id: int):
+    avg_score = _average(UserTopicStats.score_sum, UserTopicStats.answers_count)
+    return (
+        select(
+            UserTopicStats.topic.label("topic"),
+            UserTopicStats.answers_count.label("answers_count"),
+            avg_score.label("avg_score"),
+        )
+        .where(UserTopicStats.user_id == user_id)
+        .where(UserTopicStats.answers_count > 0)
+        .order_by(avg_score.desc())
+    )
+
+
+def timeseries_query(user_id: int):
+    return (
+        select(
+            InterviewSession.id.label("id"),
+            InterviewSession.start_time.label("start_time"),
+            InterviewSession.topic.label("topic"),
+            InterviewSession.difficulty.label("difficulty"),
+            _average(InterviewSession.score_sum, InterviewSession.graded_count).label("avg_score"),
+            InterviewSession.current_index.label("answered_count"),
+        )
+        .where(InterviewSession.user_id == user_id)
+        .where(InterviewSession.status == "completed")
+        .order_by(InterviewSession.start_time.asc(), InterviewSession.id.asc())
+    )
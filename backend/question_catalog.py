@@ -0,0 +1,121 @@
+import asyncio
+import os
+import threading
+import time
+from dataclasses import dataclass
+
+from sqlalchemy import text
+
+from db import BackgroundSessionLocal
+from models import Question
+
+# the question bank is small and changes rarely, so every process keeps an immutable copy
+# indexed by id and (topic, difficulty). a trigger on questions bumps question_bank_version
+# (alembic 0003), the copy is swapped for a new one when that version moves.
+# the version is checked at most every QUESTION_CATALOG_CHECK_SECONDS, so reads never wait on the db
+QUESTION_CATALOG_CHECK_SECONDS = float(os.getenv("QUESTION_CATALOG_CHECK_SECONDS", "30"))
+
+
+@dataclass(frozen=True)
+class CatalogQuestion:
+    id: int
+    topic: str
+    difficulty: str
+    text: str
+    reference_answer: str
+    keywords: tuple
+
+
+class QuestionCatalog:
+    def __init__(self, version, questions: list[CatalogQuestion]):
+        self.version = version
+        self.by_id = {q.id: q for q in questions}
+        by_key = {}
+        for q in sorted(questions, key=lambda q: q.id):
+            by_key.setdefault((q.topic, q.difficulty), []).append(q)
+        self.by_key = {key: tuple(qs) for key, qs in by_key.items()}
+        self.topics_by_difficulty = {} # difficulty -> {topic: questions}, for the mixed selector
+        for (topic, difficulty), qs in self.by_key.items():
+            self.topics_by_difficulty.setdefault(difficulty, {})[topic] = qs
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def get(self, question_id: int) -> CatalogQuestion | None:
+        return self.by_id.get(question_id)
+
+    def for_topic(self, topic: str, difficulty: str) -> tuple:
+        return self.by_key.get((topic, difficulty), ())
+
+    def topic_buckets(self, difficulty: str) -> dict:
+        return self.topics_by_difficulty.get(difficulty, {})
+
+
+_catalog = None
+_checked_at = 0.0
+_lock = threading.Lock()
+
+
+def _read_version(db):
+    try:
+        return db.execute(text("SELECT version FROM question_bank_version WHERE id = 1")).scalar()
+    except Exception as e:
+        # not migrated yet, reload on every check instead
+        db.rollback()
+        print(f"[CATALOG] No question bank version ({e.__class__.__name__}), reloading")
+        return None
+
+
+def _load(version) -> QuestionCatalog:
+    db = BackgroundSessionLocal()
+    try:
+        questions = [
+            CatalogQuestion(q.id, q.topic, q.difficulty, q.text, q.reference_answer, tuple(q.keywords or ()))
+            for q in db.query(Question).all()
+        ]
+    finally:
+        db.close()
+    print(f"[CATALOG] Loaded {len(questions)} questions (version {version})")
+    return QuestionCatalog(version, questions)
+
+
+def _refresh(force: bool):
+    global _catalog, _checked_at
+    with _lock:
+        now = time.monotonic()
+        if _catalog is not None and not force and now - _checked_at < QUESTION_CATALOG_CHECK_SECONDS:
+            return # another thread checked while this one waited
+        db = BackgroundSessionLocal()
+        try:
+            version = _read_version(db)
+        finally:
+            db.close()
+        if _catalog is None or version is None or version != _catalog.version:
+            _catalog = _load(version)
+        _checked_at = time.monotonic()
+
+
+def get_catalog() -> QuestionCatalog:
+    if _catalog is None or time.monotonic() - _checked_at >= QUESTION_CATALOG_CHECK_SECONDS:
+        _refresh(force=False)
+    return _catalog
+
+
+def get_question(question_id: int) -> CatalogQuestion | None:
+    question = get_catalog().get(question_id)
+    if question is None:
+        # maybe added since the last check
+        _refresh(force=True)
+        question = _catalog.get(question_id)
+    return question
+
+
+async def get_question_async(question_id: int) -> CatalogQuestion | None:
+    # for async endpoints, a fresh catalog answers without leaving the event loop,
+    # a version check or reload reads the db synchronously so it runs in a thread
+    catalog = _catalog
+    if catalog is not None and time.monotonic() - _checked_at < QUESTION_CATALOG_CHECK_SECONDS:
+        question = catalog.get(question_id)
+        if question is not None:
+            return question
+    return await asyncio.to_thread(get_question, question_id)
@@ -1,29 +1,73 @@
 import random
 
-from sqlalchemy.orm import Session
-from models import Question
+from question_catalog import get_catalog
 
-def selected_mixed_random_questions(db:Session, difficulty: str, total_questions: int):
+# mixed interviews draw from per topic buckets so the same topic is never asked twice in a row
+# when the pool allows it. each pick is O(topics) and uses a lazy Fisher-Yates shuffle per
+# bucket (only the swapped positions are stored), so an interview costs O(k) whatever the bank size
 
 
-    all_questions = db.query(Question).filter(Question.difficulty == difficulty).all()
-    if len(all_questions) < total_questions:
-        raise ValueError("Not enough questions in the database for the selected difficulty.")
+class _Bucket:
+    def __init__(self, questions: tuple):
+        self.questions = questions
+        self.remaining = len(questions)
+        self._swapped = {}
+
+    def draw(self, rng: random.Random):
+        j = rng.randrange(self.remaining)
+        last = self.remaining - 1
+        picked = self._swapped.get(j, j)
+        self._swapped[j] = self._swapped.get(last, last)
+        self.remaining = last
+        return self.questions[picked]
+
+
+def _feasible(buckets: dict, picks_left: int, last_topic) -> bool:
+    # picks_left more questions can follow last_topic with no adjacent repeats iff every topic can
+    # supply its share: at most ceil(n/2) from one topic and floor(n/2) from the one just asked
+    if picks_left == 0:
+        return True
+    total = 0
+    for topic, bucket in buckets.items():
+        cap = picks_left // 2 if topic == last_topic else (picks_left + 1) // 2
+        total += min(bucket.remaining, cap)
+    return total >= picks_left
 
-    #mutable copy of all questions
-    pool = all_questions[:]
-    selected_questions = []
 
+def select_mixed(topic_buckets: dict, total_questions: int, rng: random.Random | None = None) -> list:
+    rng = rng or random.Random()
+    buckets = {topic: _Bucket(qs) for topic, qs in topic_buckets.items() if qs}
+    if sum(b.remaining for b in buckets.values()) < total_questions:
+        raise ValueError("Not enough questions in the database for the selected difficulty.")
+
+    selected = []
     last_topic = None
     for i in range(total_questions):
-        attempts = 0
-        question = random.sample(pool, 1)
-        while question[0].topic == last_topic and attempts < 5:
-            question = random.sample(pool, 1)
-            attempts += 1
+        picks_left = total_questions - i - 1
+        open_topics = [t for t, b in buckets.items() if b.remaining]
+        candidates = [t for t in open_topics if t != last_topic]
+        # only topics that still leave a repeat free order for the rest
+        feasible = []
+        for topic in candidates:
+            buckets[topic].remaining -= 1
+            if _feasible(buckets, picks_left, topic):
+                feasible.append(topic)
+            buckets[topic].remaining += 1
+        if feasible:
+            choices = feasible
+        else:
+            # a repeat is unavoidable, drawing from the biggest topic first keeps them to a minimum
+            fallback = candidates or open_topics
+            most = max(buckets[t].remaining for t in fallback)
+            choices = [t for t in fallback if buckets[t].remaining == most]
+
+        # weighted by bucket size so questions from big topics are not under drawn
+        weights = [buckets[t].remaining for t in choices]
+        topic = rng.choices(choices, weights=weights)[0]
+        selected.append(buckets[topic].draw(rng))
+        last_topic = topic
+    return selected
 
-        selected_questions.append(question[0])
-        pool.remove(question[0])
-        last_topic = question[0].topic
 
-    return selected_questions
\ No newline at end of file
+def selected_mixed_random_questions(difficulty: str, total_questions: int, rng: random.Random | None = None):
+    return select_mixed(get_catalog().topic_buckets(difficulty), total_questions, rng)
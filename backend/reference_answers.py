@@ -0,0 +1,42 @@
+import threading
+
+import torch
+
+from embedding_scoring import SBERT_MODEL_NAME, encode_references
+from models import ReferenceAnswer
+
+# question id -> ((row id, text) of every reference, stacked unit length embeddings)
+_matrix_cache = {}
+_cache_lock = threading.Lock()
+
+
+def load_reference_matrix(db, model, question_id: int):
+    # every reference answer of a question as one (references x dim) matrix, None if there are none
+    rows = (
+        db.query(ReferenceAnswer)
+        .filter(ReferenceAnswer.question_id == question_id)
+        .order_by(ReferenceAnswer.id)
+        .all()
+    )
+    if not rows:
+        return None
+
+    # the text is part of the key so an edited reference is never served its old embedding
+    key = tuple((row.id, row.text) for row in rows)
+    with _cache_lock:
+        cached = _matrix_cache.get(question_id)
+    if cached and cached[0] == key:
+        return cached[1]
+
+    # references added outside seed.py have no embedding yet
+    missing = [row for row in rows if not row.embedding or row.embedding_model != SBERT_MODEL_NAME]
+    if missing:
+        embeddings = encode_references(model, [row.text for row in missing])
+        for row, embedding in zip(missing, embeddings):
+            row.embedding = embedding.tolist()
+            row.embedding_model = SBERT_MODEL_NAME
+
+    matrix = torch.tensor([row.embedding for row in rows], dtype=torch.float32)
+    with _cache_lock:
+        _matrix_cache[question_id] = (key, matrix)
+    return matrix
@@ -0,0 +1,64 @@
+from sqlalchemy import update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from models import Answer, User, UserTopicStats
+from models import Session as InterviewSession
+from question_catalog import get_question
+
+# analytics read these instead of aggregating the answer history on every page view.
+# sessions.graded_count / score_sum cover every graded answer of the session,
+# user_topic_stats only covers completed sessions (like the old queries did).
+# answers.counted_score is the score already included, so a regrade only adds the difference.
+# callers hold the session row lock, which keeps the graders and the completing submit in order.
+# every change bumps users.analytics_version, the /analytics/dashboard etag
+
+
+def bump_analytics_version(db: Session, user_id: int):
+    db.execute(update(User).where(User.id == user_id).values(analytics_version=User.analytics_version + 1))
+
+
+def _add_topic_stats(db: Session, user_id: int, topic: str, answers: int, score: int):
+    statement = insert(UserTopicStats).values(user_id=user_id, topic=topic, answers_count=answers, score_sum=score)
+    db.execute(statement.on_conflict_do_update(
+        index_elements=[UserTopicStats.user_id, UserTopicStats.topic],
+        set_={
+            "answers_count": UserTopicStats.answers_count + statement.excluded.answers_count,
+            "score_sum": UserTopicStats.score_sum + statement.excluded.score_sum,
+        },
+    ))
+
+
+def record_graded_answer(db: Session, interview_session: InterviewSession, answer: Answer):
+    if answer.counted_score is None:
+        answers, score = 1, answer.score
+    else:
+        answers, score = 0, answer.score - answer.counted_score # regrade
+    if not answers and not score:
+        return
+    interview_session.graded_count += answers
+    interview_session.score_sum += score
+    answer.counted_score = answer.score
+    if interview_session.status == "completed":
+        question = get_question(answer.question_id)
+        _add_topic_stats(db, interview_session.user_id, question.topic, answers, score)
+    bump_analytics_version(db, interview_session.user_id)
+
+
+def record_completed_session(db: Session, interview_session: InterviewSession):
+    # answers graded while the session was still in progress join the topic stats now
+    db.flush()
+    totals = {}
+    rows = (
+        db.query(Answer.question_id, Answer.counted_score)
+        .filter(Answer.session_id == interview_session.id)
+        .filter(Answer.counted_score.isnot(None))
+        .all()
+    )
+    for question_id, score in rows:
+        topic = get_question(question_id).topic
+        answers, total = totals.get(topic, (0, 0))
+        totals[topic] = (answers + 1, total + score)
+    for topic, (answers, score) in totals.items():
+        _add_topic_stats(db, interview_session.user_id, topic, answers, score)
+    bump_analytics_version(db, interview_session.user_id) # the session joins the history
@@ -0,0 +1,78 @@
+import json
+import math
+import os
+from typing import Dict, List, Optional
+
+# local approximation of the llm rubric score, trained by train_score_model.py
+SCORE_BUCKETS = (0, 25, 50, 75, 100)
+ARTIFACT_FORMAT = 1 # bump when the artifact layout or features change
+DEFAULT_MODEL_PATH = os.getenv("SCORE_MODEL_PATH", "artifacts/score_model.json")
+
+FEATURE_NAMES = [
+    "sbert",
+    "keyword",
+    "sbert_x_keyword",
+    "log_words",
+    "short_answer",
+    "topic_mean",
+]
+LENGTH_CAP_WORDS = 400
+
+
+def snap_to_bucket(score: float) -> int:
+    # nearest rubric value (0/25/50/75/100)
+    return min(SCORE_BUCKETS, key=lambda bucket: abs(bucket - score))
+
+
+def build_features(
+    sbert_score: float,
+    keyword_score: float,
+    answer: str,
+    topic: Optional[str],
+    topic_means: Dict[str, float],
+    global_mean: float,
+) -> List[float]:
+    # scores come in on a 0-100 scale, features are kept roughly in 0-1
+    words = min(len(answer.split()), LENGTH_CAP_WORDS)
+    sbert = max(0.0, min(100.0, sbert_score)) / 100.0
+    keyword = max(0.0, min(100.0, keyword_score)) / 100.0
+    topic_mean = topic_means.get(topic, global_mean) if topic else global_mean
+    return [
+        sbert,
+        keyword,
+        sbert * keyword,
+        math.log1p(words) / math.log1p(LENGTH_CAP_WORDS),
+        1.0 if words < 8 else 0.0,
+        topic_mean / 100.0,
+    ]
+
+
+class ScoreModel:
+    def __init__(self, artifact: dict):
+        if artifact.get("format") != ARTIFACT_FORMAT:
+            raise ValueError(f"Unsupported score model format: {artifact.get('format')}")
+        if artifact.get("feature_names") != FEATURE_NAMES:
+            raise ValueError("Score model was trained on a different feature set")
+
+        self.version = artifact["version"]
+        self.weights = [float(w) for w in artifact["weights"]]
+        self.bias = float(artifact["bias"])
+        self.feature_mean = [float(m) for m in artifact["feature_mean"]]
+        self.feature_std = [float(s) or 1.0 for s in artifact["feature_std"]]
+        self.topic_means = {t: float(m) for t, m in artifact["topic_means"].items()}
+        self.global_mean = float(artifact["global_mean"])
+
+    def predict(self, sbert_score: float, keyword_score: float, answer: str, topic: Optional[str] = None) -> float:
+        # plain python dot product, a handful of features so this is microseconds
+        features = build_features(sbert_score, keyword_score, answer, topic, self.topic_means, self.global_mean)
+        total = self.bias
+        for x, w, m, s in zip(features, self.weights, self.feature_mean, self.feature_std):
+            total += w * (x - m) / s
+        return max(0.0, min(100.0, total))
+
+
+def load_score_model(path: str = DEFAULT_MODEL_PATH) -> Optional[ScoreModel]:
+    if not os.path.isfile(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return ScoreModel(json.load(f))
@@ -13,13 +13,21 @@ if not SECRET_KEY:
 ALGORITHM = "HS256" #signing algorithm, attatches signature to token
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
 
-encrypt_password = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# raising BCRYPT_ROUNDS upgrades existing hashes the next time their owner logs in
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+encrypt_password = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return encrypt_password.verify(plain_password, hashed_password)
 
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    # (matches, new hash when the stored one uses outdated cost parameters)
+    return encrypt_password.verify_and_update(plain_password, hashed_password)
+
+
 def get_password_hash(password: str) -> str:
     return encrypt_password.hash(password)
 
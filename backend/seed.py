@@ -0,0 +1,106 @@
+from sentence_transformers import SentenceTransformer
+
+from db import SessionLocal
+from embedding_scoring import SBERT_MODEL_NAME, encode_references
+from models import Question, ReferenceAnswer
+
+# python seed.py
+# every question's own reference_answer is always one of its references, these are extra
+# accepted phrasings so a correct answer worded differently is not under scored.
+# keyed by (topic, question text), ids differ between databases. ones that match no question are skipped
+ALTERNATE_REFERENCES = {
+    ("Data Structures", "What is a data structure and how does it relate to data organization and retrieval?"): [
+        "A data structure is a way of storing and organising data in memory so it can be accessed and updated efficiently. "
+        "Choosing the right one, like an array, list, tree or hash table, decides how fast you can search, insert and retrieve data.",
+    ],
+    ("Data Structures", "What is a linked list and in what scenarios would you use it over an array?"): [
+        "A linked list is a chain of nodes where each node holds a value and a pointer to the next node, so the elements are not "
+        "next to each other in memory. I would pick it over an array when I insert and delete a lot, especially in the middle, "
+        "and I don't need to jump to an index directly.",
+    ],
+    ("Stacks & Queues", "What are the three fundamental operations that can be performed on a stack?"): [
+        "The main stack operations are push to add an item on top, pop to remove the top item, and peek or top to look at the top "
+        "item without removing it. They all run in constant time because everything happens at one end.",
+    ],
+    ("Trees & Graphs", "What is a binary tree and what information does each node contain?"): [
+        "A binary tree is a hierarchical structure where every node has at most two children, a left child and a right child. "
+        "Each node stores its data plus references to the left and right child nodes.",
+    ],
+    ("Sorting & Searching", "What is binary search and what are its requirements?"): [
+        "Binary search finds a value in a sorted array by checking the middle element and throwing away the half that cannot "
+        "contain the target, repeating until it is found. It needs the data to be sorted and to support random access, and it runs in O(log n).",
+    ],
+    ("Databases", "What is a join and what are the types of joins in SQL?"): [
+        "A join combines rows from two tables using a related column such as a foreign key. Inner join keeps only matching rows, "
+        "left and right joins keep every row from one side and fill the other with nulls, and a full outer join keeps rows from both sides.",
+    ],
+    ("Networking & Web Technologies", "What does TCP stand for and what is its role in networking?"): [
+        "TCP is the Transmission Control Protocol. It is connection based, it sets up a connection with a handshake and then makes sure "
+        "data arrives reliably and in order using sequence numbers, acknowledgements and retransmitting lost packets.",
+    ],
+    ("Networking & Web Technologies", "What is the difference between authentication and authorization?"): [
+        "Authentication is proving who you are, for example logging in with a password or a token. Authorization happens after that "
+        "and decides what you are allowed to do, like which resources or actions your role gives you access to.",
+    ],
+    ("Networking & Web Technologies", "What is caching and what are common caching strategies?"): [
+        "Caching keeps copies of frequently used data somewhere faster, like memory, so repeated requests don't hit the database or "
+        "network again. Common strategies are LRU and LFU eviction, expiring entries with a TTL, and write through or write back for updates.",
+    ],
+}
+
+
+def question_key(topic: str, text: str) -> tuple:
+    return topic.strip(), " ".join(text.split())
+
+
+def seed_reference_answers(db, model) -> dict:
+    alternates = {question_key(*key): texts for key, texts in ALTERNATE_REFERENCES.items()}
+    matched = set()
+    existing = {}
+    for row in db.query(ReferenceAnswer).all():
+        existing.setdefault(row.question_id, []).append(row)
+
+    added = removed = 0
+    for question in db.query(Question).all():
+        key = question_key(question.topic, question.text)
+        wanted = [question.reference_answer] + alternates.get(key, [])
+        if key in alternates:
+            matched.add(key)
+        rows = existing.get(question.id, [])
+        have = {row.text for row in rows}
+
+        for row in rows:
+            if row.text not in wanted:
+                db.delete(row)
+                removed += 1
+        for text in wanted:
+            if text not in have:
+                db.add(ReferenceAnswer(question_id=question.id, text=text))
+                added += 1
+    db.flush()
+    for key in alternates.keys() - matched:
+        print(f"[SEED] No question {key[1]!r} in {key[0]}, its alternate references were skipped")
+
+    # encode every missing embedding in one batch
+    pending = [
+        row for row in db.query(ReferenceAnswer).all()
+        if not row.embedding or row.embedding_model != SBERT_MODEL_NAME
+    ]
+    if pending:
+        embeddings = encode_references(model, [row.text for row in pending])
+        for row, embedding in zip(pending, embeddings):
+            row.embedding = embedding.tolist()
+            row.embedding_model = SBERT_MODEL_NAME
+
+    db.commit()
+    return {"added": added, "removed": removed, "embedded": len(pending), "skipped": len(alternates) - len(matched)}
+
+
+if __name__ == "__main__":
+    db = SessionLocal()
+    try:
+        counts = seed_reference_answers(db, SentenceTransformer(SBERT_MODEL_NAME))
+        print(f"Reference answers: {counts['added']} added, {counts['removed']} removed, {counts['embedded']} embedded, "
+              f"{counts['skipped']} questions with alternates not found")
+    finally:
+        db.close()
@@ -5,6 +5,8 @@ import subprocess
 from fastapi import File, UploadFile, HTTPException, APIRouter
 from faster_whisper import WhisperModel
 
+from bulkheads import BulkheadFull, bulkhead_full, ml_cpu
+
 import shutil
 import os
 
@@ -41,35 +43,44 @@ def convert_to_wav(input_file: str, output_file: str):
     if conversion.returncode != 0:
         raise Exception(f"FFmpeg conversion failed: {conversion.stderr}")
 
-@router.post("/stt/transcribe")
-async def transcribe_audio(file: UploadFile = File(...)):
-    if not file.filename:
-        raise HTTPException(status_code=400, detail="No file uploaded")
+def transcribe_file(input_path: str, wav_path: str) -> str:
+    convert_to_wav(input_path, wav_path)
+    # removes silence
+    segments, info = model.transcribe(wav_path, vad_filter=True)
+    # combine all segments into a string
+    return " ".join([segment.text for segment in segments])
 
+async def transcribe_bytes(filename: str, audio: bytes) -> str:
+    # convert to wav and transcribe on the ml_cpu bulkhead, never on the event loop.
+    # raises BulkheadFull when too many transcriptions are waiting
     # temporary files paths to store audio
-    temp_input_path = os.path.join(TMP_DIR, f"{uuid.uuid4()}_{file.filename}")
+    temp_input_path = os.path.join(TMP_DIR, f"{uuid.uuid4()}_{os.path.basename(filename)}")
     temp_wav_path = os.path.join(TMP_DIR, f"{uuid.uuid4()}.wav")
 
     # save uploaded file to disk
     with open(temp_input_path, "wb") as buffer:
-        buffer.write(await file.read())
+        buffer.write(audio)
 
-    # convert file to wav format
     try:
-        convert_to_wav(temp_input_path, temp_wav_path)
-        # removes silence
-        segments, info = model.transcribe(temp_wav_path, vad_filter=True)
+        return await ml_cpu.run(transcribe_file, temp_input_path, temp_wav_path)
+    finally:
+        # cleanup temporary files
+        if os.path.exists(temp_input_path):
+            os.remove(temp_input_path)
+        if os.path.exists(temp_wav_path):
+            os.remove(temp_wav_path)
 
-        # combine all segments into a string
-        transcript = " ".join([segment.text for segment in segments])
+@router.post("/stt/transcribe")
+async def transcribe_audio(file: UploadFile = File(...)):
+    if not file.filename:
+        raise HTTPException(status_code=400, detail="No file uploaded")
+
+    try:
+        transcript = await transcribe_bytes(file.filename, await file.read())
 
         #return transcript to frontend
         return {"transcript": transcript}
+    except BulkheadFull:
+        raise bulkhead_full()
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Transcription failed: {str(e)}")
-    finally:
-        # cleanup temporary files
-        if os.path.exists(temp_input_path):
-            os.remove(temp_input_path)
-        if os.path.exists(temp_wav_path):
-            os.remove(temp_wav_path)
\ No newline at end of file
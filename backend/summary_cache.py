@@ -0,0 +1,93 @@
+import hashlib
+import json
+import os
+import threading
+import uuid
+from collections import OrderedDict
+
+from sqlalchemy.dialects.postgresql import insert
+
+from events import broker, publish
+from models import SessionSummary
+
+# a finished session's summary never changes until someone regrades it, so it is serialised once.
+# tier 1 is a per process LRU, tier 2 (SUMMARY_CACHE_SHARED=1) is the session_summaries table
+# shared by every web process. a regrade deletes the row and publishes summary_invalidated,
+# which drops the LRU entry in every process. browsers revalidate with the etag (304), the url
+# stays the same across a regrade so they must never keep the body as fresh
+SUMMARY_CACHE_SIZE = int(os.getenv("SUMMARY_CACHE_SIZE", "512"))
+SUMMARY_CACHE_SHARED = os.getenv("SUMMARY_CACHE_SHARED", "0") == "1"
+CACHE_CONTROL = "private, no-cache"
+
+
+class CachedSummary:
+    def __init__(self, user_id: int, etag: str, body: bytes):
+        self.user_id = user_id
+        self.etag = etag
+        self.body = body
+
+
+_entries = OrderedDict() # session id -> CachedSummary
+_lock = threading.Lock()
+
+
+def is_final(interview_session, answers) -> bool:
+    # nothing left that a worker will still write: overall feedback done, no answer waiting
+    # for grading or for its provisional score to be upgraded
+    return (
+        interview_session.status == "completed"
+        and interview_session.overall_status == "ready"
+        and all(a.grading_status != "pending" and not a.provisional for a in answers)
+    )
+
+
+def _remember(session_id: str, entry: CachedSummary):
+    with _lock:
+        _entries[session_id] = entry
+        _entries.move_to_end(session_id)
+        while len(_entries) > SUMMARY_CACHE_SIZE:
+            _entries.popitem(last=False)
+
+
+def get(db, session_id: uuid.UUID, user_id: int) -> CachedSummary | None:
+    key = str(session_id)
+    with _lock:
+        entry = _entries.get(key)
+        if entry:
+            _entries.move_to_end(key)
+    if entry is None and SUMMARY_CACHE_SHARED:
+        row = db.query(SessionSummary).filter(SessionSummary.session_id == session_id).first()
+        if row:
+            entry = CachedSummary(row.user_id, row.etag, row.body.encode("utf-8"))
+            _remember(key, entry)
+    if entry is None or entry.user_id != user_id:
+        return None
+    return entry
+
+
+def put(db, session_id: uuid.UUID, user_id: int, summary: dict) -> CachedSummary:
+    # call while holding a share lock on the session row the summary was read under, a regrade
+    # (FOR UPDATE) then waits and its invalidation always lands after this entry, never before
+    body = json.dumps(summary, separators=(",", ":")).encode("utf-8")
+    entry = CachedSummary(user_id, f'"{hashlib.sha256(body).hexdigest()[:32]}"', body)
+    _remember(str(session_id), entry)
+    if SUMMARY_CACHE_SHARED:
+        db.execute(insert(SessionSummary).values(
+            session_id=session_id, user_id=user_id, etag=entry.etag, body=body.decode("utf-8"),
+        ).on_conflict_do_nothing())
+        db.commit()
+    return entry
+
+
+def invalidate(db, session_id: uuid.UUID):
+    # inside the regrade's transaction, every process drops its copy once it commits
+    db.query(SessionSummary).filter(SessionSummary.session_id == session_id).delete()
+    publish(db, str(session_id), "summary_invalidated", {"session_id": str(session_id)})
+
+
+def _drop(key: str, data: dict):
+    with _lock:
+        _entries.pop(key, None)
+
+
+broker.add_handler("summary_invalidated", _drop)
@@ -0,0 +1,816 @@
+import asyncio
+import json
+import os
+import random
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("JWT_SECRET", "test")
+os.environ.setdefault("EVENTS_BACKEND", "memory")
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event, func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+import circuit_breaker
+import deps
+import governor
+import grading_tasks
+import idempotency
+import job_queue
+import summary_cache
+import train_score_model
+from answers import record_answer
+from bulkheads import Bulkhead, BulkheadFull
+from circuit_breaker import CircuitBreaker, CircuitOpen
+from db import Base, SessionLocal, engine
+from deps import Principal, get_current_user, invalidate_principal
+from events import broker, grading_snapshot
+from models import Answer, Job, Question, ReferenceAnswer, User, UserTopicStats
+from models import Session as InterviewSession
+from prompt_compaction import QUESTION_CAP, compact_overall_summary, count_tokens, to_prompt_json
+from queries import answer_summary, history_page, session_answers
+from rollups import record_completed_session
+from security import create_access_token
+from question_catalog import CatalogQuestion, get_question
+from question_selector import select_mixed
+from score_model import ScoreModel, load_score_model, snap_to_bucket
+from worker import run_job
+
+
+def make_session(db, user_id, question_count):
+    interview_session = InterviewSession(id=uuid.uuid4(), user_id=user_id, topic="OS", difficulty="easy",
+                                         question_count=question_count, status="completed")
+    db.add(interview_session)
+    for i in range(question_count):
+        question = Question(topic="OS", difficulty="easy", text=f"question {i}", reference_answer="ref", keywords=[])
+        db.add(question)
+        db.flush()
+        db.add(Answer(session_id=interview_session.id, question_id=question.id, position=i, transcript="answer",
+                      score=50, feedback="ok", keywords_hit=[], grading_status="graded"))
+    db.commit()
+    return interview_session.id
+
+
+def count_summary_queries(db, session_id):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    db.expunge_all() # nothing cached in the identity map, like a fresh request
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        summary = [answer_summary(answer) for answer in session_answers(db, session_id)]
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    return len(summary), len(statements)
+
+
+def test_session_summary_query_count_does_not_grow_with_answers():
+    # the summary used to run one question query per answer
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    try:
+        user = User(email=f"{uuid.uuid4()}@test.com", password_hash="x")
+        db.add(user)
+        db.commit()
+        user_id = user.id
+
+        counts = []
+        for question_count in (1, 3, 10):
+            session_id = make_session(db, user_id, question_count)
+            answers, queries = count_summary_queries(db, session_id)
+            assert answers == question_count
+            counts.append(queries)
+        assert counts == [1, 1, 1]
+    finally:
+        db.close()
+
+
+def make_buckets(sizes: dict) -> dict:
+    buckets, next_id = {}, 1
+    for topic, size in sizes.items():
+        buckets[topic] = tuple(CatalogQuestion(next_id + i, topic, "easy", "q", "r", ()) for i in range(size))
+        next_id += size
+    return buckets
+
+
+def test_mixed_selection_has_no_adjacent_topics_when_feasible():
+    # 5 questions from one topic only fit in 10 picks when they land on every other slot
+    buckets = make_buckets({"A": 5, "B": 2, "C": 3})
+    for seed in range(200):
+        picked = select_mixed(buckets, 10, random.Random(seed))
+        topics = [q.topic for q in picked]
+        assert len({q.id for q in picked}) == 10
+        assert all(a != b for a, b in zip(topics, topics[1:])), topics
+
+
+def test_mixed_selection_is_reproducible_and_minimises_repeats():
+    buckets = make_buckets({"A": 50, "B": 40, "C": 1})
+    first = [q.id for q in select_mixed(buckets, 8, random.Random(7))]
+    assert first == [q.id for q in select_mixed(buckets, 8, random.Random(7))]
+
+    # only one topic left to draw from, repeats are unavoidable but it still returns
+    picked = select_mixed(make_buckets({"A": 4, "B": 1}), 5, random.Random(1))
+    topics = [q.topic for q in picked]
+    assert topics == ["A", "B", "A", "A", "A"]
+
+
+def test_history_keyset_pages_cover_every_session_once():
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    try:
+        user = User(email=f"{uuid.uuid4()}@test.com", password_hash="x")
+        db.add(user)
+        db.commit()
+        start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        for i in range(23):
+            # pairs share a start_time so the id tie break is exercised
+            db.add(InterviewSession(id=uuid.uuid4(), user_id=user.id, topic="OS", difficulty="easy", question_count=1,
+                                    status="completed", start_time=start + timedelta(minutes=i // 2)))
+        db.commit()
+
+        seen, cursor = [], None
+        while True:
+            rows, cursor = history_page(db, user.id, cursor, limit=5)
+            seen += [(r.start_time, r.id) for r in rows]
+            if not cursor:
+                break
+        assert len(seen) == 23
+        assert len(set(seen)) == 23
+        assert [t for t, _ in seen] == sorted((t for t, _ in seen), reverse=True)
+    finally:
+        db.close()
+
+
+def test_bulkhead_rejects_past_its_queue_and_frees_slots():
+    bulkhead = Bulkhead("test", workers=1, queue=1)
+    release = threading.Event()
+    running = bulkhead.submit(release.wait)
+    queued = bulkhead.submit(lambda: "queued")
+    try:
+        bulkhead.submit(lambda: "rejected")
+        assert False, "expected BulkheadFull"
+    except BulkheadFull:
+        pass
+    release.set()
+    running.result()
+    assert queued.result() == "queued"
+    assert bulkhead.call(lambda: "again") == "again"
+
+
+def test_answer_position_is_unique_per_session():
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    try:
+        user = User(email=f"{uuid.uuid4()}@test.com", password_hash="x")
+        db.add(user)
+        db.commit()
+        session_id = make_session(db, user.id, 1)
+        question_id = db.query(Answer.question_id).filter(Answer.session_id == session_id).scalar()
+        db.add(Answer(session_id=session_id, question_id=question_id, position=0, transcript="again",
+                      score=0, feedback="", keywords_hit=[]))
+        try:
+            db.commit()
+            assert False, "expected IntegrityError"
+        except IntegrityError:
+            db.rollback()
+    finally:
+        db.close()
+
+
+def answer_fingerprint(session_id, transcript, index):
+    return idempotency.fingerprint({"path": "answer", "session_id": session_id, "transcript": transcript, "index": index})
+
+
+async def submit_answers(tmp_path):
+    # record_answer against its own async sqlite file, the question comes from the catalog (sync engine)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    try:
+        question = Question(topic="OS", difficulty="easy", text="what is a process", reference_answer="ref", keywords=[])
+        db.add(question)
+        db.commit()
+        question_id = question.id
+    finally:
+        db.close()
+    # loaded here, the in memory database is per thread and get_question_async reads the catalog
+    assert get_question(question_id) is not None
+
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'answers.db'}")
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    Sessions = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    async with Sessions() as db:
+        user = User(email="candidate@test.com", password_hash="x")
+        db.add(user)
+        await db.flush()
+        interview_session = InterviewSession(id=uuid.uuid4(), user_id=user.id, topic="OS", difficulty="easy",
+                                             question_count=3, status="in_progress", current_index=0,
+                                             question_ids=[question_id] * 3, transition_text=[])
+        db.add(interview_session)
+        await db.commit()
+        principal = Principal(id=user.id, email=user.email)
+        session_id = str(interview_session.id)
+
+    async def submit(transcript, index, key=None):
+        async with Sessions() as db:
+            fp = answer_fingerprint(session_id, transcript, index) if key else None
+            try:
+                response, _ = await record_answer(db, principal, session_id, transcript, index, key, fp)
+            except HTTPException as e:
+                return e.status_code
+            return response
+
+    async def count(model):
+        async with Sessions() as db:
+            return (await db.execute(select(func.count()).select_from(model))).scalar()
+
+    try:
+        results = {
+            "first": await submit("a process is a running program", 0, key="answer-0"),
+            "retry": await submit("a process is a running program", 0, key="answer-0"),
+            "other_body": await submit("something else", 0, key="answer-0"),
+            "stale_index": await submit("a process is a running program", 0),
+            "future_index": await submit("a process is a running program", 2),
+        }
+        results["answers"] = await count(Answer)
+        results["jobs"] = await count(Job)
+    finally:
+        await async_engine.dispose()
+    return results
+
+
+def test_answer_retries_replay_and_stale_index_conflicts(tmp_path):
+    results = asyncio.run(submit_answers(tmp_path))
+
+    first = results["first"]
+    assert first["ok"] and not first["completed"]
+    # same key and body: the stored response, nothing inserted or queued again
+    retry = results["retry"]
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert json.loads(retry.body) == first
+    assert results["answers"] == 1
+    assert results["jobs"] == 1
+    # same key, different transcript
+    assert results["other_body"] == 422
+    # the question was already answered, or is not the current one
+    assert results["stale_index"] == 409
+    assert results["future_index"] == 409
+
+
+def claim_test_job(db, kind, worker_id="worker-1", **kwargs):
+    return job_queue.claim(db, worker_id, [kind], **kwargs)
+
+
+def test_job_claim_then_complete():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        kind = f"test-{uuid.uuid4()}"
+        job_queue.enqueue(db, kind, {"n": 1})
+        db.commit()
+        job = claim_test_job(db, kind)
+        assert (job.status, job.attempts, job.locked_by) == ("running", 1, "worker-1")
+        assert claim_test_job(db, kind, "worker-2") is None # leased
+        assert job_queue.complete(db, job.id, "worker-1", 1)
+        db.refresh(job)
+        assert (job.status, job.locked_by, job.locked_until) == ("done", None, None)
+    finally:
+        db.close()
+
+
+def test_job_failure_backs_off_then_dead_letters():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        kind = f"test-{uuid.uuid4()}"
+        job_queue.enqueue(db, kind, {"n": 1}, max_attempts=2)
+        db.commit()
+        job_id = claim_test_job(db, kind).id
+        assert job_queue.fail(db, job_id, "worker-1", 1, "boom") == "queued"
+        assert db.query(Job).filter(Job.id == job_id).filter(Job.run_after > func.now()).count() == 1
+        assert claim_test_job(db, kind) is None # not due until the backoff has passed
+        db.query(Job).filter(Job.id == job_id).update({Job.run_after: func.now()})
+        db.commit()
+    finally:
+        db.close()
+
+    # the last attempt fails through worker.run_job, the kind's dead handler gets the payload
+    dead = []
+
+    def handler(db, payload):
+        raise RuntimeError("still failing")
+
+    assert run_job({kind: handler}, {kind: lambda db, payload: dead.append(payload)}, "worker-1", [kind], 60)
+    db = SessionLocal()
+    try:
+        job = db.query(Job).filter(Job.id == job_id).one()
+        assert (job.status, job.attempts) == ("dead", 2)
+        assert "still failing" in job.last_error
+        assert dead == [{"n": 1}]
+    finally:
+        db.close()
+
+
+def test_expired_lease_is_reclaimed_and_stale_attempt_cannot_complete():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        kind = f"test-{uuid.uuid4()}"
+        job_queue.enqueue(db, kind, {"n": 1}, max_attempts=2)
+        db.commit()
+        first = claim_test_job(db, kind, visibility_seconds=-60) # the lease is already over
+        job_id = first.id
+
+        second = claim_test_job(db, kind, "worker-2", visibility_seconds=-60)
+        assert (second.id, second.attempts, second.locked_by) == (job_id, 2, "worker-2")
+        assert not job_queue.complete(db, job_id, "worker-1", 1) # the first worker's result is dropped
+        assert job_queue.fail(db, job_id, "worker-1", 1, "late") == "lost"
+
+        # the final attempt never reports back either, the next claim dead-letters it
+        dead = []
+        assert claim_test_job(db, kind, "worker-3", on_dead=lambda db, job: dead.append(job.id)) is None
+        job = db.query(Job).filter(Job.id == job_id).one()
+        assert (job.status, job.last_error) == ("dead", "lease expired on final attempt")
+        assert dead == [job_id]
+        assert not job_queue.complete(db, job_id, "worker-2", 2)
+
+        assert job_queue.requeue_dead(db, [kind]) == 1
+        job = claim_test_job(db, kind, "worker-3")
+        assert (job.id, job.attempts) == (job_id, 1)
+        assert job_queue.complete(db, job_id, "worker-3", 1)
+    finally:
+        db.close()
+
+
+def make_graded_session(db, answers: int) -> InterviewSession:
+    # a completed session whose answers are all still waiting for a grader
+    user = User(email=f"{uuid.uuid4()}@test.com", password_hash="x")
+    db.add(user)
+    db.flush()
+    interview_session = InterviewSession(id=uuid.uuid4(), user_id=user.id, topic="OS", difficulty="easy",
+                                         question_count=answers, status="completed", current_index=answers,
+                                         question_ids=[], transition_text=[])
+    db.add(interview_session)
+    for i in range(answers):
+        question = Question(topic="OS", difficulty="easy", text=f"question {i}", reference_answer="ref", keywords=[])
+        db.add(question)
+        db.flush()
+        db.add(Answer(session_id=interview_session.id, question_id=question.id, position=i, transcript="answer",
+                      score=0, feedback="", keywords_hit=[]))
+    db.commit()
+    get_question(question.id) # rollups look topics up in the catalog
+    return interview_session
+
+
+def overall_jobs(db, session_id) -> int:
+    jobs = db.query(Job).filter(Job.kind == "overall_feedback").all()
+    return sum(job.payload["session_id"] == str(session_id) for job in jobs)
+
+
+def test_overall_feedback_is_queued_once_by_the_last_grader():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        interview_session = make_graded_session(db, 3)
+        answers = db.query(Answer).filter(Answer.session_id == interview_session.id).order_by(Answer.position).all()
+
+        for answer, score in zip(answers[:2], (80, 60)):
+            answer.score = score
+            grading_tasks.finish_answer(db, answer, "graded")
+            db.commit()
+            assert interview_session.overall_status == "pending"
+            assert overall_jobs(db, interview_session.id) == 0
+
+        # the third grader runs out of retries, the session is still released
+        grading_tasks.grade_answer_dead(db, {"answer_id": answers[2].id})
+        db.commit()
+        assert answers[2].grading_status == "failed"
+        assert interview_session.overall_status == "queued"
+        assert overall_jobs(db, interview_session.id) == 1
+
+        # a late duplicate (e.g. a redelivered dead handler) queues nothing more
+        grading_tasks.grade_answer_dead(db, {"answer_id": answers[2].id})
+        assert not grading_tasks.queue_overall_feedback_if_ready(db, interview_session)
+        db.commit()
+        assert overall_jobs(db, interview_session.id) == 1
+
+        summary = grading_tasks.overall_summary(db, interview_session.id)
+        assert [a["score"] for a in summary] == [80, 60]
+        assert all(a["grading_status"] == "graded" for a in summary)
+    finally:
+        db.close()
+
+
+def test_overall_feedback_without_graded_answers():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        interview_session = make_graded_session(db, 2)
+        for answer in db.query(Answer).filter(Answer.session_id == interview_session.id).all():
+            grading_tasks.grade_answer_dead(db, {"answer_id": answer.id})
+            db.commit()
+        assert overall_jobs(db, interview_session.id) == 1
+
+        grading_tasks.build_overall_feedback(db, {"session_id": str(interview_session.id)})
+        db.commit()
+        assert interview_session.overall_status == "ready"
+        assert "None of the answers" in interview_session.overall_feedback
+    finally:
+        db.close()
+
+
+def test_summary_is_cached_only_when_final_and_dropped_by_a_regrade():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        user = User(email=f"{uuid.uuid4()}@test.com", password_hash="x")
+        db.add(user)
+        db.commit()
+        session_id = make_session(db, user.id, 2)
+        interview_session = db.query(InterviewSession).filter(InterviewSession.id == session_id).one()
+        answers = session_answers(db, session_id)
+
+        # anything a worker may still write keeps the summary out of the cache
+        assert not summary_cache.is_final(interview_session, answers) # overall feedback pending
+        interview_session.overall_status = "ready"
+        answers[0].provisional = True
+        assert not summary_cache.is_final(interview_session, answers)
+        answers[0].provisional = False
+        answers[1].grading_status = "pending"
+        assert not summary_cache.is_final(interview_session, answers)
+        answers[1].grading_status = "graded"
+        assert summary_cache.is_final(interview_session, answers)
+        db.commit()
+
+        cached = summary_cache.put(db, session_id, user.id, {"session": {"id": str(session_id)}})
+        assert summary_cache.get(db, session_id, user.id) is cached
+        assert summary_cache.get(db, session_id, user.id + 1) is None # someone else's session
+
+        # a regrade that rolls back keeps the entry, one that commits drops it in every process
+        summary_cache.invalidate(db, session_id)
+        db.rollback()
+        assert summary_cache.get(db, session_id, user.id) is cached
+        summary_cache.invalidate(db, session_id)
+        db.commit()
+        assert summary_cache.get(db, session_id, user.id) is None
+    finally:
+        db.close()
+
+
+def test_memory_events_follow_the_transaction_and_the_snapshot():
+    Base.metadata.create_all(bind=engine)
+
+    async def scenario():
+        db = SessionLocal()
+        try:
+            interview_session = make_graded_session(db, 2)
+            key = str(interview_session.id)
+            answers = db.query(Answer).filter(Answer.session_id == interview_session.id).order_by(Answer.position).all()
+            queue = broker.subscribe(key) # the endpoint subscribes before taking the snapshot
+            try:
+                # graded between the subscription and the snapshot: in both, never in neither
+                grading_tasks.finish_answer(db, answers[0], "graded")
+                db.commit()
+                snapshot = grading_snapshot(db, interview_session.id, interview_session.user_id)
+                assert [m["data"]["answer_id"] for m in snapshot] == [answers[0].id]
+                first = await asyncio.wait_for(queue.get(), 1)
+                assert (first["type"], first["data"]["answer_id"]) == ("graded", answers[0].id)
+
+                # a rolled back grade publishes nothing
+                grading_tasks.finish_answer(db, answers[1], "graded")
+                db.rollback()
+                await asyncio.sleep(0)
+                assert queue.empty()
+
+                grading_tasks.grade_answer_dead(db, {"answer_id": answers[1].id})
+                db.commit()
+                second = await asyncio.wait_for(queue.get(), 1)
+                assert (second["data"]["answer_id"], second["data"]["grading_status"]) == (answers[1].id, "failed")
+                assert queue.empty()
+            finally:
+                broker.unsubscribe(key, queue)
+        finally:
+            db.close()
+
+    asyncio.run(scenario())
+
+
+def fresh_governor(monkeypatch, tmp_path):
+    monkeypatch.setattr(governor, "GOVERNOR_STATE_PATH", str(tmp_path / "governor.sqlite3"))
+    monkeypatch.setattr(governor._local, "conn", None, raising=False)
+
+
+def test_governor_buckets_are_all_or_nothing_and_keep_the_reserve(monkeypatch, tmp_path):
+    fresh_governor(monkeypatch, tmp_path)
+    slow = 0.001 # tokens per second, no refill worth counting during the test
+
+    assert governor.take([("a", 10, slow, 4)]) == 0.0
+    assert governor.take([("a", 10, slow, 4)]) == 0.0
+    assert governor.take([("a", 10, slow, 4)]) > 0 # 2 left
+    # "b" is full but "a" cannot pay, so "b" is not charged either
+    assert governor.take([("b", 10, slow, 10), ("a", 10, slow, 4)]) > 0
+    assert governor.take([("b", 10, slow, 10)]) == 0.0
+
+    # batch calls leave a quarter of the bucket to interactive ones
+    assert governor.take([("c", 10, slow, 4)], reserve=0.25) == 0.0
+    assert governor.take([("c", 10, slow, 4)], reserve=0.25) > 0 # would leave 2 < 2.5
+    assert governor.take([("c", 10, slow, 4)]) == 0.0
+
+    # a batch cost bigger than the non reserved part is clamped instead of waiting forever
+    assert governor.take([("d", 10, slow, 50)], reserve=0.25) == 0.0
+    assert governor.take([("d", 10, slow, 1)]) == 0.0 # the reserve is still there
+    assert governor.take([("d", 10, slow, 2)]) > 0
+
+
+def test_governor_leases_cap_concurrency_and_expire(monkeypatch, tmp_path):
+    fresh_governor(monkeypatch, tmp_path)
+    first = governor._lease("p", 2)
+    assert governor._lease("p", 2) is not None
+    assert governor._lease("p", 2) is None
+    assert governor._lease("q", 2) is not None # per provider
+    governor._release(first)
+    assert governor._lease("p", 2) is not None
+
+    # a crashed process never releases, its lease runs out instead
+    monkeypatch.setattr(governor, "GOVERNOR_LEASE_SECONDS", -1)
+    assert governor._lease("r", 1) is not None
+    assert governor._lease("r", 1) is not None
+
+
+def test_retry_after_accepts_seconds_and_http_dates():
+    assert governor.retry_after_seconds("5") == 5.0
+    assert governor.retry_after_seconds(None) == 10.0
+    assert governor.retry_after_seconds("soon") == 10.0
+    assert governor.retry_after_seconds("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0 # already passed
+    later = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=120), usegmt=True)
+    assert 100 < governor.retry_after_seconds(later) <= 120
+
+
+def test_editing_a_reference_answer_clears_its_embedding():
+    db = SessionLocal()
+    try:
+        question = Question(topic="OS", difficulty="easy", text="what is paging", reference_answer="ref", keywords=[])
+        db.add(question)
+        db.flush()
+        row = ReferenceAnswer(question_id=question.id, text="old answer", embedding=[1.0, 0.0], embedding_model="m")
+        db.add(row)
+        db.commit()
+
+        row.text = "old answer"
+        assert row.embedding == [1.0, 0.0]
+        row.text = "new answer"
+        db.commit()
+        db.refresh(row)
+        assert row.embedding is None and row.embedding_model is None
+
+    finally:
+        db.close()
+
+
+def test_snap_to_bucket_and_legacy_llm_targets():
+    assert [snap_to_bucket(s) for s in (-5, 12, 13, 62.4, 88, 140)] == [0, 0, 25, 50, 100, 100]
+
+    assert train_score_model.llm_target(Answer(score=80, llm_score=75, llm_score_source="llm"), 0, 0) == 75.0
+    assert train_score_model.llm_target(Answer(score=80, llm_score=75, llm_score_source="model"), 0, 0) is None
+    # legacy rows: 0.4 * 80 + 0.3 * 60 + 0.3 * 50 = 65
+    assert train_score_model.llm_target(Answer(score=65, llm_score=None), 80, 60) == 50.0
+    # a recovered 0 may have been a failed call
+    assert train_score_model.llm_target(Answer(score=50, llm_score=None), 80, 60) is None
+    assert train_score_model.llm_target(Answer(score=100, llm_score=None), 0, 0) is None
+
+
+def test_score_model_fit_evaluate_and_artifact_round_trip(tmp_path):
+    rng = random.Random(7)
+    examples = []
+    for i in range(200):
+        sbert, keyword = rng.uniform(0, 100), rng.uniform(0, 100)
+        examples.append({
+            "sbert": sbert,
+            "keyword": keyword,
+            "answer": " ".join(["word"] * rng.randint(3, 60)),
+            "topic": "OS" if i % 2 else "DB",
+            "target": float(snap_to_bucket(0.7 * sbert + 0.3 * keyword)),
+        })
+    train, held_out = examples[:150], examples[150:]
+
+    artifact = train_score_model.fit(train, l2=1.0)
+    model = ScoreModel(artifact)
+    report = train_score_model.evaluate(model, held_out)
+    assert report["size"] == 50
+    assert report["within_one_bucket"] > 0.9
+    assert report["mae"] < 15
+    assert 0.0 <= model.predict(100, 100, "word") <= 100.0
+
+    path = tmp_path / "score_model.json"
+    path.write_text(json.dumps(artifact))
+    loaded = load_score_model(str(path))
+    for ex in held_out:
+        assert loaded.predict(ex["sbert"], ex["keyword"], ex["answer"], ex["topic"]) == model.predict(
+            ex["sbert"], ex["keyword"], ex["answer"], ex["topic"])
+    assert load_score_model(str(tmp_path / "missing.json")) is None
+
+    artifact["feature_names"] = ["sbert"]
+    try:
+        ScoreModel(artifact)
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+
+
+def test_rollups_count_each_answer_once_across_completion_and_regrades():
+    db = SessionLocal()
+    try:
+        interview_session = make_graded_session(db, 3)
+        interview_session.status = "in_progress"
+        db.commit()
+        first, second, third = session_answers(db, interview_session.id)
+        user_id = interview_session.user_id
+
+        def grade(answer, score, status="graded"):
+            answer.score = score
+            grading_tasks.finish_answer(db, answer, status)
+            db.commit()
+
+        def topic_stats():
+            row = db.query(UserTopicStats).filter(UserTopicStats.user_id == user_id).first()
+            return (row.answers_count, row.score_sum) if row else None
+
+        # graded while in progress: the session totals move, the topic stats wait for completion
+        grade(first, 60)
+        assert (interview_session.graded_count, interview_session.score_sum) == (1, 60)
+        assert topic_stats() is None
+
+        interview_session.status = "completed"
+        record_completed_session(db, interview_session)
+        db.commit()
+        assert topic_stats() == (1, 60)
+
+        grade(second, 40)
+        assert topic_stats() == (2, 100)
+
+        # a regrade adds only the difference
+        grade(first, 80)
+        assert (interview_session.graded_count, interview_session.score_sum) == (2, 120)
+        assert topic_stats() == (2, 120)
+
+        # a failed answer counts nothing until it is graded
+        grade(third, 0, "failed")
+        assert third.counted_score is None
+        assert topic_stats() == (2, 120)
+        grade(third, 30)
+        assert (interview_session.graded_count, interview_session.score_sum) == (3, 150)
+        assert topic_stats() == (3, 150)
+        assert db.get(User, user_id).analytics_version >= 5
+    finally:
+        db.close()
+
+
+def test_principal_cache_hits_expiry_and_invalidation(monkeypatch):
+    monkeypatch.setattr(deps, "AUTH_CACHE_TTL_SECONDS", 3600)
+    db = SessionLocal()
+    try:
+        users = [User(email=f"{uuid.uuid4()}@test.com", password_hash="x") for _ in range(2)]
+        db.add_all(users)
+        db.commit()
+        first, second, other = (
+            create_access_token(sub=str(users[0].id), expires_delta=timedelta(minutes=5)),
+            create_access_token(sub=str(users[0].id), expires_delta=timedelta(minutes=6)),
+            create_access_token(sub=str(users[1].id), expires_delta=timedelta(minutes=5)),
+        )
+        for token in (first, second, other):
+            get_current_user(token=token, db=db)
+
+        # a hit never touches the database
+        assert get_current_user(token=first, db=None) == Principal(id=users[0].id, email=users[0].email)
+
+        # invalidation evicts every token of that user on commit, and only theirs
+        invalidate_principal(db, users[0].id)
+        assert deps._cached(deps._token_key(second)) is not None
+        db.commit()
+        assert deps._cached(deps._token_key(second)) is None
+        assert deps._cached(deps._token_key(other)) is not None
+
+        # entries end at the token's exp even with a longer ttl
+        exp = deps._principals[deps._token_key(other)][1]
+        assert exp <= (datetime.now(timezone.utc) + timedelta(minutes=5)).timestamp()
+        monkeypatch.setattr(deps.time, "time", lambda: exp)
+        assert deps._cached(deps._token_key(other)) is None
+    finally:
+        db.close()
+
+
+def overall_item(i, words):
+    return {
+        "topic": "OS" if i % 2 else "DB",
+        "question_text": "explain " * 100,
+        "reference_answer": "ref",
+        "transcript": " ".join(f"word{j}" for j in range(words)),
+        "score": 50 + i % 2 * 50,
+        "feedback": "Score: 50\nStrengths:\n- clear\nNeeds work:\n- cover paging\n- give an example",
+        "keywords_hit": ["page"],
+    }
+
+
+def test_overall_summary_compaction_keeps_to_the_budget():
+    # short sessions go out whole apart from the question cap
+    payload = compact_overall_summary([overall_item(i, 10) for i in range(2)], budget=1500)
+    assert payload["answers"] == 2 and payload["avg_score"] == 75
+    assert {t["topic"]: t["avg_score"] for t in payload["topics"]} == {"DB": 50, "OS": 100}
+    first = payload["per_answer"][0]
+    assert first["answer"].split() == [f"word{j}" for j in range(10)]
+    assert "Needs work:" in first["feedback"] and first["keywords_hit"] == ["page"]
+    assert count_tokens(first["question"].removesuffix(" ...")) <= QUESTION_CAP
+
+    # long transcripts are cut before anything else
+    payload = compact_overall_summary([overall_item(i, 2000) for i in range(10)], budget=1500)
+    assert count_tokens(to_prompt_json(payload)) <= 1500
+    assert len(payload["per_answer"]) == 10
+    assert all(count_tokens(a.get("answer", "")) < 200 for a in payload["per_answer"])
+
+    # then the feedback shrinks to its needs work bullets, and answers are dropped last
+    payload = compact_overall_summary([overall_item(i, 2000) for i in range(40)], budget=300)
+    assert count_tokens(to_prompt_json(payload)) <= 300
+    assert payload["answers"] == 40 and len(payload["topics"]) == 2
+    assert 0 < len(payload["per_answer"]) < 40
+    assert payload["per_answer"][0]["needs_work"] == "cover paging; give an example"
+    assert "answer" not in payload["per_answer"][0]
+
+
+def test_circuit_breaker_opens_then_lets_one_trial_through(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", lambda: clock[0])
+    breaker = CircuitBreaker("test", window=4, min_calls=4, failure_rate=0.5, open_seconds=30)
+
+    def fail():
+        try:
+            with breaker.call():
+                raise RuntimeError("provider down")
+        except RuntimeError:
+            pass
+
+    def rejected() -> bool:
+        try:
+            with breaker.call():
+                pass
+            return False
+        except CircuitOpen:
+            return True
+
+    for _ in range(2):
+        with breaker.call():
+            pass
+    fail()
+    assert breaker.state == circuit_breaker.CLOSED # not enough calls yet
+    fail()
+    assert breaker.state == circuit_breaker.OPEN
+    assert rejected()
+
+    # after open_seconds exactly one trial runs, a failed trial opens it again
+    clock[0] += 30
+    trial = breaker.call()
+    trial.__enter__()
+    assert breaker.state == circuit_breaker.HALF_OPEN
+    assert rejected()
+    try:
+        trial.__exit__(RuntimeError, RuntimeError("still down"), None)
+    except RuntimeError:
+        pass
+    assert breaker.state == circuit_breaker.OPEN
+    assert rejected()
+
+    # a successful trial closes it with a fresh window
+    clock[0] += 30
+    with breaker.call():
+        pass
+    assert breaker.state == circuit_breaker.CLOSED
+    fail()
+    assert breaker.state == circuit_breaker.CLOSED
+
+
+def test_sbert_windows_and_aggregation():
+    torch = pytest.importorskip("torch")
+    from embedding_scoring import aggregate, split_sentences, split_windows
+
+    # run-ons without punctuation are cut at max_words
+    assert [len(s) for s in split_sentences(" ".join(["w"] * 12), 5)] == [5, 5, 2]
+
+    # whole sentences are packed up to the budget, neighbours share `overlap` sentences
+    text = "a b c. d e. f g h i. j."
+    assert split_windows(text, max_words=5, overlap=0) == ["a b c. d e.", "f g h i. j."]
+    assert split_windows(text, max_words=5, overlap=1) == ["a b c. d e.", "d e.", "f g h i. j."]
+    assert split_windows("one short answer.", max_words=5) == ["one short answer."]
+    assert split_windows("   ") == []
+
+    windows = ["a b c", "d"]
+    similarities = torch.tensor([0.2, 0.8])
+    assert aggregate(similarities, windows, "max") == pytest.approx(0.8)
+    assert aggregate(similarities, windows, "weighted") == pytest.approx((3 * 0.2 + 0.8) / 4)
@@ -0,0 +1,183 @@
+import argparse
+import json
+import os
+import random
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from db import SessionLocal
+from models import Answer, Question
+from score_model import (
+    ARTIFACT_FORMAT,
+    DEFAULT_MODEL_PATH,
+    FEATURE_NAMES,
+    ScoreModel,
+    build_features,
+    snap_to_bucket,
+)
+
+# python train_score_model.py [--out artifacts/score_model.json] [--eval-split 0.2]
+
+
+def llm_target(answer: Answer, sbert_score: float, keyword_score: float):
+    # rubric score the llm gave this answer, None if it cannot be trusted
+    if answer.llm_score is not None:
+        if answer.llm_score_source != "llm":
+            return None # scored by this model, training on it would feed back on itself
+        return float(answer.llm_score)
+
+    # rows graded before llm_score was stored: final = 0.4 sbert + 0.3 keyword + 0.3 llm,
+    # the rounding error on the stored score is < 2 points so snapping recovers the rubric value
+    recovered = (answer.score - sbert_score * 0.40 - keyword_score * 0.30) / 0.30
+    if recovered < -12.5 or recovered > 112.5:
+        return None
+    bucket = snap_to_bucket(recovered)
+    if bucket == 0:
+        return None # back then a failed llm call also scored 0, a real 0 cannot be told apart
+    return float(bucket)
+
+
+def load_examples():
+    from grading import grader # loads sbert, only needed when training
+    from reference_answers import load_reference_matrix
+
+    db = SessionLocal()
+    try:
+        rows = (
+            db.query(Answer, Question)
+            .join(Question, Question.id == Answer.question_id)
+            .filter(Answer.feedback != "") # skip answers that were never graded
+            .all()
+        )
+        examples = []
+        for answer, question in rows:
+            # same reference matrix grade_answer scores against, otherwise the model learns a different sbert feature
+            reference_matrix = load_reference_matrix(db, grader.sbert, question.id)
+            sbert_score = grader._sbert_score(answer.transcript, question.reference_answer, reference_matrix)
+            keyword_score, _ = grader._keyword_score(answer.transcript, question.keywords or [])
+            target = llm_target(answer, sbert_score, keyword_score)
+            if target is None:
+                continue
+            examples.append({
+                "sbert": sbert_score,
+                "keyword": keyword_score,
+                "answer": answer.transcript,
+                "topic": question.topic,
+                "target": target,
+            })
+        db.commit() # keeps embeddings load_reference_matrix had to encode
+        return examples
+    finally:
+        db.close()
+
+
+def topic_stats(examples):
+    sums, counts = {}, {}
+    for ex in examples:
+        sums[ex["topic"]] = sums.get(ex["topic"], 0.0) + ex["target"]
+        counts[ex["topic"]] = counts.get(ex["topic"], 0) + 1
+    global_mean = sum(sums.values()) / max(1, sum(counts.values()))
+    return {t: sums[t] / counts[t] for t in sums}, global_mean
+
+
+def fit(train, l2: float) -> dict:
+    # ridge regression on standardised features, closed form
+    topic_means, global_mean = topic_stats(train)
+    X = np.array([
+        build_features(ex["sbert"], ex["keyword"], ex["answer"], ex["topic"], topic_means, global_mean)
+        for ex in train
+    ])
+    y = np.array([ex["target"] for ex in train])
+
+    mean = X.mean(axis=0)
+    std = X.std(axis=0)
+    std[std == 0] = 1.0
+    Z = (X - mean) / std
+
+    bias = float(y.mean())
+    weights = np.linalg.solve(Z.T @ Z + l2 * np.eye(Z.shape[1]), Z.T @ (y - bias))
+
+    return {
+        "format": ARTIFACT_FORMAT,
+        "version": datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ"),
+        "feature_names": FEATURE_NAMES,
+        "weights": weights.tolist(),
+        "bias": bias,
+        "feature_mean": mean.tolist(),
+        "feature_std": std.tolist(),
+        "topic_means": topic_means,
+        "global_mean": global_mean,
+        "train_size": len(train),
+    }
+
+
+def evaluate(model: ScoreModel, examples) -> dict:
+    if not examples:
+        return {"size": 0}
+
+    predictions = []
+    start = time.perf_counter()
+    for ex in examples:
+        predictions.append(model.predict(ex["sbert"], ex["keyword"], ex["answer"], ex["topic"]))
+    per_answer_us = (time.perf_counter() - start) / len(examples) * 1e6
+
+    buckets = [snap_to_bucket(p) for p in predictions]
+    targets = [int(ex["target"]) for ex in examples]
+    confusion = {str(t): {str(b): 0 for b in (0, 25, 50, 75, 100)} for t in (0, 25, 50, 75, 100)}
+    for t, b in zip(targets, buckets):
+        confusion[str(t)][str(b)] += 1
+
+    return {
+        "size": len(examples),
+        "mae": sum(abs(p - t) for p, t in zip(predictions, targets)) / len(examples),
+        "bucket_mae": sum(abs(b - t) for b, t in zip(buckets, targets)) / len(examples),
+        "exact_agreement": sum(b == t for b, t in zip(buckets, targets)) / len(examples),
+        "within_one_bucket": sum(abs(b - t) <= 25 for b, t in zip(buckets, targets)) / len(examples),
+        "inference_us_per_answer": per_answer_us,
+        "confusion_llm_vs_model": confusion,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the local rubric score model from graded answers")
+    parser.add_argument("--out", default=DEFAULT_MODEL_PATH)
+    parser.add_argument("--eval-split", type=float, default=0.2)
+    parser.add_argument("--l2", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--min-examples", type=int, default=50)
+    args = parser.parse_args()
+
+    examples = load_examples()
+    print(f"Loaded {len(examples)} graded answers")
+    if len(examples) < args.min_examples:
+        raise SystemExit(f"Need at least {args.min_examples} graded answers to train")
+
+    random.Random(args.seed).shuffle(examples)
+    split = int(len(examples) * (1 - args.eval_split))
+    train, held_out = examples[:split], examples[split:]
+
+    artifact = fit(train, args.l2)
+    model = ScoreModel(artifact)
+    artifact["evaluation"] = evaluate(model, held_out)
+
+    # versioned copy next to the file grading.py loads
+    out_dir = os.path.dirname(args.out) or "."
+    os.makedirs(out_dir, exist_ok=True)
+    versioned = os.path.join(out_dir, f"score_model_{artifact['version']}.json")
+    for path in (versioned, args.out):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(artifact, f, indent=2)
+
+    report = artifact["evaluation"]
+    print(f"Model {artifact['version']} written to {args.out} ({versioned})")
+    if report["size"]:
+        print(f"Held out answers: {report['size']}")
+        print(f"MAE vs LLM: {report['mae']:.1f} (snapped {report['bucket_mae']:.1f})")
+        print(f"Exact agreement: {report['exact_agreement']:.1%}, within one bucket: {report['within_one_bucket']:.1%}")
+        print(f"Inference: {report['inference_us_per_answer']:.1f} us/answer")
+
+
+if __name__ == "__main__":
+    main()
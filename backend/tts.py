@@ -1,14 +1,18 @@
 import hashlib
 from gtts import gTTS
-from openai import OpenAI
+from openai import OpenAI, RateLimitError
 import os
 from dotenv import load_dotenv
 
+from circuit_breaker import breakers
+from governor import INTERACTIVE, governed, report_throttled, retry_after_seconds
+
 load_dotenv()
 
 TTS_DIR = "static/tts"
 client = OpenAI(
     api_key=os.getenv("OPEN_API_KEY"),
+    timeout=float(os.getenv("OPENAI_TTS_TIMEOUT_SECONDS", "15")),
 )
 
 def generate_tts_audio(text: str) -> str:
@@ -27,7 +31,7 @@ def generate_tts_audio(text: str) -> str:
     # return browser path
     return f"/static/tts/{filename}"
 
-def generate_OPENAI_tts_audio(text: str) -> str:
+def generate_OPENAI_tts_audio(text: str, priority: str = INTERACTIVE) -> str:
     # ensure folder exists
     os.makedirs(TTS_DIR, exist_ok=True)
 
@@ -39,14 +43,41 @@ def generate_OPENAI_tts_audio(text: str) -> str:
 
     # generate audio only once cache
     if not os.path.isfile(file_path):
-         with client.audio.speech.with_streaming_response.create(
-            model="gpt-4o-mini-tts",
-            voice="echo",
-            input=text,
-            instructions="Speak in a friendly conversational tone.",
-        )as response:
-            response.stream_to_file(file_path)
+        # shared rate limiter, tts for a waiting candidate goes ahead of batch work
+        breaker = breakers["openai_tts"]
+        breaker.raise_if_open()
+        with governed("openai_tts", priority), breaker.call():
+            try:
+                with client.audio.speech.with_streaming_response.create(
+                    model="gpt-4o-mini-tts",
+                    voice="echo",
+                    input=text,
+                    instructions="Speak in a friendly conversational tone.",
+                )as response:
+                    # a failed stream must not leave a truncated clip in the cache
+                    response.stream_to_file(file_path + ".part")
+                os.replace(file_path + ".part", file_path)
+            except RateLimitError as e:
+                report_throttled("openai_tts", retry_after_seconds(e.response.headers.get("retry-after")))
+                raise
     print("USING OPENAI TTS", file_path)
 
     # return browser path
     return f"/static/tts/{filename}"
+
+
+def generate_question_audio(text: str, priority: str = INTERACTIVE) -> str | None:
+    # openai voice (or its cached clip), then gtts, then text only (None)
+    try:
+        return generate_OPENAI_tts_audio(text, priority)
+    except Exception as e:
+        print(f"[TTS] OpenAI TTS unavailable ({e}), falling back to gTTS")
+
+    try:
+        breaker = breakers["gtts"]
+        breaker.raise_if_open()
+        with breaker.call():
+            return generate_tts_audio(text)
+    except Exception as e:
+        print(f"[TTS] gTTS unavailable ({e}), text only")
+        return None
@@ -0,0 +1,123 @@
+import argparse
+import os
+import signal
+import socket
+import threading
+import time
+import traceback
+
+from db import DB_BACKGROUND_MAX_OVERFLOW, DB_BACKGROUND_POOL_SIZE, BackgroundSessionLocal
+from job_queue import JOB_VISIBILITY_SECONDS, claim, complete, fail, requeue_dead
+from metrics import serve_metrics
+
+# python worker.py [--concurrency 2] [--kinds grade_answer overall_feedback]
+# python worker.py --requeue-dead
+# python worker.py --prune-idempotency-keys (from cron, deletes expired Idempotency-Key responses)
+# run as many worker processes on as many machines as needed, they coordinate through the jobs table
+
+stop_event = threading.Event()
+
+
+def run_job(handlers: dict, dead_handlers: dict, worker_id: str, kinds: list[str] | None, visibility: int) -> bool:
+    # returns False when there was nothing to do
+    def on_dead(db, job):
+        print(f"[WORKER] Job {job.id} ({job.kind}) dead-lettered after {job.attempts} attempts")
+        if job.kind in dead_handlers:
+            dead_handlers[job.kind](db, job.payload)
+
+    db = BackgroundSessionLocal()
+    try:
+        job = claim(db, worker_id, kinds, visibility, on_dead)
+        if not job:
+            return False
+
+        job_id, kind, attempt, payload = job.id, job.kind, job.attempts, job.payload
+        handler = handlers.get(kind)
+        try:
+            if not handler:
+                raise RuntimeError(f"No handler for job kind {kind}")
+            handler(db, payload)
+            if not complete(db, job_id, worker_id, attempt):
+                print(f"[WORKER] Lost lease on job {job_id} ({kind}), result discarded")
+        except Exception as e:
+            status = fail(db, job_id, worker_id, attempt, f"{e}\n{traceback.format_exc()}", on_dead)
+            print(f"[WORKER] Job {job_id} ({kind}) attempt {attempt} failed: {e} -> {status}")
+        return True
+    finally:
+        db.close()
+
+
+def worker_loop(handlers: dict, dead_handlers: dict, worker_id: str, kinds: list[str] | None, poll_interval: float, visibility: int):
+    while not stop_event.is_set():
+        try:
+            if not run_job(handlers, dead_handlers, worker_id, kinds, visibility):
+                stop_event.wait(poll_interval)
+        except Exception as e:
+            # database unavailable etc, keep the worker alive
+            print(f"[WORKER] {worker_id} error: {e}")
+            stop_event.wait(poll_interval * 5)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Consume grading jobs from the jobs table")
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv("WORKER_CONCURRENCY", "2")))
+    parser.add_argument("--kinds", nargs="*", default=None)
+    parser.add_argument("--poll-interval", type=float, default=1.0)
+    parser.add_argument("--visibility", type=int, default=JOB_VISIBILITY_SECONDS)
+    parser.add_argument("--metrics-port", type=int, default=int(os.getenv("WORKER_METRICS_PORT", "0")))
+    parser.add_argument("--requeue-dead", action="store_true", help="move dead-lettered jobs back to the queue and exit")
+    parser.add_argument("--prune-idempotency-keys", action="store_true", help="delete expired idempotency keys and exit")
+    args = parser.parse_args()
+
+    if args.prune_idempotency_keys:
+        from idempotency import prune
+
+        db = BackgroundSessionLocal()
+        try:
+            print(f"Deleted {prune(db)} expired idempotency keys")
+        finally:
+            db.close()
+        return
+
+    if args.requeue_dead:
+        db = BackgroundSessionLocal()
+        try:
+            print(f"Requeued {requeue_dead(db, args.kinds)} dead jobs")
+        finally:
+            db.close()
+        return
+
+    from grading_tasks import DEAD_HANDLERS, HANDLERS
+    import grading # loads the grading models before the first job, only needed when consuming
+
+    if args.metrics_port:
+        serve_metrics(args.metrics_port) # circuit breaker state etc. for this process
+
+    # finish the current jobs on shutdown instead of dropping them
+    signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+    signal.signal(signal.SIGINT, lambda *_: stop_event.set())
+
+    if args.concurrency > DB_BACKGROUND_POOL_SIZE + DB_BACKGROUND_MAX_OVERFLOW:
+        # every job thread holds a connection, the rest would queue on the pool
+        print(f"[WORKER] --concurrency {args.concurrency} is more than the background pool allows "
+              f"({DB_BACKGROUND_POOL_SIZE}+{DB_BACKGROUND_MAX_OVERFLOW}), raise DB_BACKGROUND_POOL_SIZE")
+
+    base_id = f"{socket.gethostname()}:{os.getpid()}"
+    threads = []
+    for i in range(args.concurrency):
+        t = threading.Thread(
+            target=worker_loop,
+            args=(HANDLERS, DEAD_HANDLERS, f"{base_id}:{i}", args.kinds, args.poll_interval, args.visibility),
+            name=f"worker-{i}",
+        )
+        t.start()
+        threads.append(t)
+    print(f"[WORKER] {base_id} started {args.concurrency} threads")
+
+    while any(t.is_alive() for t in threads):
+        time.sleep(0.5)
+    print(f"[WORKER] {base_id} stopped")
+
+
+if __name__ == "__main__":
+    main()
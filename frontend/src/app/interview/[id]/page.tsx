@@ -170,6 +170,9 @@ export default function InterviewPage() {
     //closing text
     const [closingText, setClosingText] = useState<string | null>(null);
 
+    // one idempotency key per question, reused by retries so an answer is never stored or graded twice
+    const answerKeyRef = useRef<{index: number; key: string} | null>(null);
+
 
     // get current question from api
     async function loadCurrentQuestion() {
@@ -280,6 +283,15 @@ export default function InterviewPage() {
             return;
         }
 
+        if (autoSubmit) {
+            setAnswerSubmitted(true); // Mark as answered, prevents VAD restart
+            if (!(await submitAudioAnswer(blob, token))) {
+                setAnswerSubmitted(false); // not accepted, listen for another attempt
+            }
+            setIsTranscribing(false);
+            return;
+        }
+
         try {
             // prepare form data key value filename
             const formData = new FormData();
@@ -308,11 +320,6 @@ export default function InterviewPage() {
             const transcript = data.transcript || "";
             setAnswer(transcript) // put answer into text box
             setAnswerSubmitted(true); // Mark as answered, prevents VAD restart
-
-            //autosubmit for voice
-            if (autoSubmit) {
-                await submitTranscribedAnswer(transcript);
-            }
         } catch {
             setError("Failed to upload and transcribe audio");
         }
@@ -364,26 +371,35 @@ export default function InterviewPage() {
         setIsRecording(false);
     }
 
-    async function submitTranscribedAnswer(text: string) {
-        setError("")
-
-        const token = localStorage.getItem("token");
-        if (!token) {
-            router.push("/login");
-            return;
+    // same key for every retry of the current question's answer
+    function answerKey(index: number): string {
+        if (answerKeyRef.current?.index !== index) {
+            answerKeyRef.current = {index, key: crypto.randomUUID()};
         }
+        return answerKeyRef.current.key;
+    }
 
-        // check answer is not empty
-        if (!text.trim()) {
-            setError("Answer cannot be empty");
-            return;
+    // network errors and 5xx are retried with the same key, the server replays the first response
+    async function postAnswer(url: string, init: () => RequestInit): Promise<Response | null> {
+        let res: Response | null = null;
+        for (let attempt = 0; attempt < 3; attempt++) {
+            try {
+                res = await fetch(url, init());
+                if (res.status < 500) break;
+            } catch {
+                res = null;
+            }
+            if (attempt < 2) await new Promise((resolve) => setTimeout(resolve, 500 * (attempt + 1)));
         }
+        return res;
+    }
 
-        const res = await fetch(`http://localhost:8000/interview/${sessionId}/answer`, {
-            method: "POST",
-            headers: {"Content-Type": "application/json", Authorization: `Bearer ${token}`,},
-            body: JSON.stringify({transcript: text}),
-        });
+    // returns false when the answer was not accepted
+    async function handleAnswerResponse(res: Response | null): Promise<boolean> {
+        if (!res) {
+            setError("Failed to submit answer");
+            return false;
+        }
 
         const data = await res.json().catch(() => ({}));
         if (!res.ok) {
@@ -394,19 +410,72 @@ export default function InterviewPage() {
                 message = data.detail[0]?.msg || message;
             }
             setError(message);
-            return;
+            return false;
         }
 
         //clear answer box
         setAnswer("");
         if (data.completed) {
             router.push(`/results/${sessionId}`);
-            return;
+            return true;
+        }
+        // next question came with the response, no /current round trip
+        if (data.next) {
+            setAnswerSubmitted(false);
+            setCurrent(data.next);
+            return true;
         }
         // Small delay before loading next question
         setTimeout(() => {
             loadCurrentQuestion();
         }, 300);
+        return true;
+    }
+
+    async function submitTranscribedAnswer(text: string) {
+        setError("")
+
+        const token = localStorage.getItem("token");
+        if (!token) {
+            router.push("/login");
+            return;
+        }
+
+        // check answer is not empty
+        if (!text.trim()) {
+            setError("Answer cannot be empty");
+            return;
+        }
+
+        const index = current?.index ?? 0;
+        const key = answerKey(index);
+        const res = await postAnswer(`http://localhost:8000/interview/${sessionId}/answer`, () => ({
+            method: "POST",
+            headers: {
+                "Content-Type": "application/json",
+                Authorization: `Bearer ${token}`,
+                "Idempotency-Key": key,
+            },
+            body: JSON.stringify({transcript: text, index}),
+        }));
+        await handleAnswerResponse(res);
+    }
+
+    // auto submit: transcribed and submitted by the server in one request
+    async function submitAudioAnswer(blob: Blob, token: string): Promise<boolean> {
+        const index = current?.index ?? 0;
+        const key = answerKey(index);
+        const res = await postAnswer(`http://localhost:8000/interview/${sessionId}/answer-audio?include_next=true`, () => {
+            const formData = new FormData();
+            formData.append("file", blob, "answer.webm");
+            formData.append("index", String(index));
+            return {
+                method: "POST",
+                headers: {Authorization: `Bearer ${token}`, "Idempotency-Key": key},
+                body: formData,
+            };
+        });
+        return handleAnswerResponse(res);
     }
 
 
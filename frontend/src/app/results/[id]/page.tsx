@@ -10,6 +10,7 @@ type SummaryResponse = {
         difficulty: string;
         status: string;
         overall_feedback: string;
+        overall_status: string;
     };
     answers: Array<{
         question_id: number;
@@ -18,6 +19,7 @@ type SummaryResponse = {
         score: number;
         feedback: string;
         keywords_hit: string[];
+        provisional: boolean;
     }>;
 };
 
@@ -30,12 +32,34 @@ export default function ResultsPage() {
     const [error, setError] = useState("");
     const [isLoading, setIsLoading] = useState(true);
     const [retryCount, setRetryCount] = useState(0);
+    const [gradedCount, setGradedCount] = useState(0);
+    // bumped by a regrade, starts waiting for the new grades
+    const [regradeCount, setRegradeCount] = useState(0);
     const MAX_RETRIES = 60;
 
     function logout() {
         localStorage.removeItem("token");
         router.push("/login");
     }
+
+    async function regrade() {
+        const token = localStorage.getItem("token");
+        const res = await fetch(`http://localhost:8000/interview/${sessionId}/regrade`, {
+            method: "POST",
+            headers: { Authorization: `Bearer ${token}` },
+        });
+        const json = await res.json().catch(() => ({}));
+        if (!res.ok) {
+            setError(typeof json.detail === "string" ? json.detail : "Failed to regrade interview");
+            return;
+        }
+        setSummary(null);
+        setError("");
+        setGradedCount(0);
+        setRetryCount(0);
+        setIsLoading(true);
+        setRegradeCount((n) => n + 1);
+    }
     useEffect(() => {
         const token = localStorage.getItem("token");
         if (!token) {
@@ -44,8 +68,17 @@ export default function ResultsPage() {
         }
 
         let retries = 0;
+        let interval: NodeJS.Timeout | undefined;
+        let timedOut = false;
+        const controller = new AbortController();
+        // the event stream gets as long as polling would, then it is closed
+        const deadline = setTimeout(() => {
+            timedOut = true;
+            controller.abort();
+        }, MAX_RETRIES * 3000);
 
-        async function loadSummary() {
+        // returns true once the overall feedback is in the summary
+        async function loadSummary(): Promise<boolean> {
             try {
                 const res = await fetch(`http://localhost:8000/interview/${sessionId}/summary`, {
                     headers: {
@@ -64,39 +97,118 @@ export default function ResultsPage() {
 
                     setError(message);
                     setIsLoading(false);
-                    return;
+                    return true;
+                }
+                if (json.session?.overall_status === "failed") {
+                    setError("Overall feedback could not be generated.");
+                    setIsLoading(false);
+                    return true;
                 }
                 // Only set summary when overall_feedback is ready
-                if (json.session?.overall_feedback) {
+                if (json.session?.overall_status === "ready" && json.session?.overall_feedback) {
                     setSummary(json);
                     setIsLoading(false);
-                    clearInterval(interval);
+                    return true;
                 }
+                return false;
             } catch (e: unknown) {
                 const msg = e instanceof Error ? e.message : String(e);
                 setError(msg || "Failed to load interview summary");
                 setIsLoading(false);
+                return true;
             }
         }
 
-        let interval: NodeJS.Timeout;
-        
-        loadSummary();
-        
-        interval = setInterval(() => {
-            retries++;
-            setRetryCount(retries);
-            if (retries >= MAX_RETRIES) {
-                clearInterval(interval);
-                setError("Feedback generation timed out.");
-                setIsLoading(false);
+        // server sent events, the summary is only fetched once grading has finished
+        async function waitForGrading() {
+            const res = await fetch(`http://localhost:8000/interview/${sessionId}/events`, {
+                headers: {Authorization: `Bearer ${token}`},
+                signal: controller.signal,
+            });
+            if (!res.ok || !res.body) {
+                throw new Error("Event stream unavailable");
+            }
+
+            const reader = res.body.getReader();
+            const decoder = new TextDecoder();
+            const graded = new Set<number>();
+            let buffer = "";
+
+            while (true) {
+                const {value, done} = await reader.read();
+                if (done) break;
+                buffer += decoder.decode(value, {stream: true});
+
+                // events are separated by a blank line
+                let boundary = buffer.indexOf("\n\n");
+                while (boundary !== -1) {
+                    const raw = buffer.slice(0, boundary);
+                    buffer = buffer.slice(boundary + 2);
+                    boundary = buffer.indexOf("\n\n");
+
+                    let eventType = "message";
+                    let data = "";
+                    for (const line of raw.split("\n")) {
+                        if (line.startsWith("event: ")) eventType = line.slice(7);
+                        else if (line.startsWith("data: ")) data += line.slice(6);
+                    }
+
+                    if (eventType === "graded") {
+                        const payload = JSON.parse(data);
+                        graded.add(payload.answer_id);
+                        setGradedCount(graded.size);
+                    } else if (eventType === "overall_feedback_ready") {
+                        await loadSummary();
+                        return;
+                    } else if (eventType === "overall_feedback_failed") {
+                        setError("Overall feedback could not be generated.");
+                        setIsLoading(false);
+                        return;
+                    }
+                }
+            }
+            throw new Error("Event stream closed early");
+        }
+
+        // older behaviour, only used if the event stream cannot be opened
+        function pollSummary() {
+            interval = setInterval(async () => {
+                retries++;
+                setRetryCount(retries);
+                if (retries >= MAX_RETRIES) {
+                    clearInterval(interval);
+                    setError("Feedback generation timed out.");
+                    setIsLoading(false);
+                    return;
+                }
+                if (await loadSummary()) {
+                    clearInterval(interval);
+                }
+            }, 3000);
+        }
+
+        waitForGrading().then(() => clearTimeout(deadline)).catch(async () => {
+            clearTimeout(deadline);
+            if (timedOut) {
+                // grading never finished (or was never announced), one last look before giving up
+                if (!(await loadSummary())) {
+                    setError("Feedback generation timed out.");
+                    setIsLoading(false);
+                }
                 return;
             }
-            loadSummary();
-        }, 3000);
-        
-        return () => clearInterval(interval);
-    }, [router, sessionId]);
+            if (controller.signal.aborted) return;
+            if (!(await loadSummary())) {
+                pollSummary();
+            }
+        });
+
+        return () => {
+            clearTimeout(deadline);
+            controller.abort();
+            if (interval) clearInterval(interval);
+        };
+    }, [router, sessionId, regradeCount]);
 
     const averageScore = summary?.answers.length
         ? Math.round(summary.answers.reduce((sum, a) => sum + a.score, 0) / summary.answers.length)
@@ -116,7 +228,7 @@ export default function ResultsPage() {
         <h2>Results</h2>
         {error && <p className="error">{error}</p>}
         {isLoading && !error && (
-          <p>Loading...</p>
+          <p>{gradedCount > 0 ? `Grading... ${gradedCount} answer(s) graded` : "Loading..."}</p>
         )}
 
         {!isLoading && summary && (
@@ -126,6 +238,7 @@ export default function ResultsPage() {
               <p><b>Difficulty:</b> {summary.session.difficulty}</p>
               <p><b>Status:</b> {summary.session.status}</p>
               <p><b>Average Score:</b> {averageScore}%</p>
+              <button onClick={regrade}>Regrade answers</button>
             </div>
 
             <hr style={{ border: "none", borderTop: "1px solid var(--border)", margin: "16px 0" }} />
@@ -165,6 +278,9 @@ export default function ResultsPage() {
                   >
                     {answer_map.score}%
                   </span>
+                  {answer_map.provisional && (
+                    <span style={{ marginLeft: 8, fontSize: 13, opacity: 0.8 }}>(provisional)</span>
+                  )}
                 </p>
                 <hr style={{ border: "none", borderTop: "1px solid var(--border)", margin: "16px 0" }} />
               </div>
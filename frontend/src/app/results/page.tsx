@@ -28,20 +28,12 @@ type HistorySession = {
   has_overall_feedback: boolean;
 };
 
-type HistoryResponse = {
-  sessions: HistorySession[];
-};
-
 type TopicBreakdownItem = {
   topic: string;
   answers_count: number;
   avg_score: number;
 };
 
-type TopicBreakdownResponse = {
-  topics: TopicBreakdownItem[];
-};
-
 type TimeseriesPoint = {
   id: string;
   ts: string | null; // ISO timestamp
@@ -51,7 +43,10 @@ type TimeseriesPoint = {
   difficulty: string;
 };
 
-type TimeseriesResponse = {
+type DashboardResponse = {
+  sessions: HistorySession[];
+  next_cursor: string | null;
+  topics: TopicBreakdownItem[];
   points: TimeseriesPoint[];
 };
 
@@ -62,6 +57,8 @@ export default function ResultsHistoryPage() {
   const [sessions, setSessions] = useState<HistorySession[]>([]);
   const [topics, setTopics] = useState<TopicBreakdownItem[]>([]);
   const [series, setSeries] = useState<TimeseriesPoint[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [error, setError] = useState("");
   const [loading, setLoading] = useState(true);
 
@@ -85,29 +82,19 @@ export default function ResultsHistoryPage() {
         setLoading(true);
         setError("");
 
-        const [historyRes, topicRes, seriesRes] = await Promise.all([
-          fetch("http://localhost:8000/interviews/history", {
-            headers: { Authorization: `Bearer ${token}` },
-          }),
-          fetch("http://localhost:8000/analytics/topic-breakdown", {
-            headers: { Authorization: `Bearer ${token}` },
-          }),
-          fetch("http://localhost:8000/analytics/sessions-timeseries", {
-            headers: { Authorization: `Bearer ${token}` },
-          }),
-        ]);
-
-        const historyJson: HistoryResponse = await historyRes.json();
-        const topicJson: TopicBreakdownResponse = await topicRes.json();
-        const seriesJson: TimeseriesResponse = await seriesRes.json();
-
-        if (!historyRes.ok) throw new Error((historyJson as any)?.detail || "Failed to load history");
-        if (!topicRes.ok) throw new Error((topicJson as any)?.detail || "Failed to load topic breakdown");
-        if (!seriesRes.ok) throw new Error((seriesJson as any)?.detail || "Failed to load timeseries");
-
-        setSessions(historyJson.sessions || []);
-        setTopics(topicJson.topics || []);
-        setSeries(seriesJson.points || []);
+        // one request for the whole dashboard, no-cache makes the browser revalidate
+        // with the stored ETag so an unchanged dashboard comes back as a 304
+        const res = await fetch("http://localhost:8000/analytics/dashboard", {
+          headers: { Authorization: `Bearer ${token}` },
+          cache: "no-cache",
+        });
+        const json: DashboardResponse = await res.json();
+        if (!res.ok) throw new Error((json as any)?.detail || "Failed to load results history");
+
+        setSessions(json.sessions || []);
+        setNextCursor(json.next_cursor || null);
+        setTopics(json.topics || []);
+        setSeries(json.points || []);
       } catch (e: any) {
         setError(e?.message || "Failed to load results history");
       } finally {
@@ -118,17 +105,38 @@ export default function ResultsHistoryPage() {
     loadAll();
   }, [router]);
 
+  // history is paged, the timeseries has every session so the filters come from it
+  async function loadMore() {
+    const token = localStorage.getItem("token");
+    if (!token || !nextCursor) return;
+    try {
+      setLoadingMore(true);
+      const res = await fetch(
+        `http://localhost:8000/interviews/history?cursor=${encodeURIComponent(nextCursor)}`,
+        { headers: { Authorization: `Bearer ${token}` } }
+      );
+      const json = await res.json();
+      if (!res.ok) throw new Error(json?.detail || "Failed to load more sessions");
+      setSessions((prev) => [...prev, ...(json.sessions || [])]);
+      setNextCursor(json.next_cursor || null);
+    } catch (e: any) {
+      setError(e?.message || "Failed to load more sessions");
+    } finally {
+      setLoadingMore(false);
+    }
+  }
+
   const uniqueTopics = useMemo(() => {
     const set = new Set<string>();
-    sessions.forEach((s) => set.add(s.topic));
+    series.forEach((s) => set.add(s.topic));
     return ["All", ...Array.from(set)];
-  }, [sessions]);
+  }, [series]);
 
   const uniqueDifficulties = useMemo(() => {
     const set = new Set<string>();
-    sessions.forEach((s) => set.add(s.difficulty));
+    series.forEach((s) => set.add(s.difficulty));
     return ["All", ...Array.from(set)];
-  }, [sessions]);
+  }, [series]);
 
   const filteredSessions = useMemo(() => {
     return sessions.filter((s) => {
@@ -334,6 +342,16 @@ const chartSeries = useMemo(() => {
                   ))}
                 </div>
               )}
+
+              {nextCursor && (
+                <button
+                  onClick={loadMore}
+                  disabled={loadingMore}
+                  style={{ marginTop: 12 }}
+                >
+                  {loadingMore ? "Loading..." : "Load more sessions"}
+                </button>
+              )}
             </div>
           </>
         )}